@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+다중 파일 단계의 미리 읽기(src/common/prefetch.py) 효과 벤치마크.
+
+같은 합성 입력을 미리 읽기 깊이(--depths)별로 읽고, 페이지 캐시가 비어 있는 경우(cold)와
+채워진 경우(warm)의 실행 시간을 비교합니다. cold 측정 전에는 입력 파일을
+posix_fadvise(POSIX_FADV_DONTNEED)로 페이지 캐시에서 내립니다(Linux 전용).
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import tempfile
+from pathlib import Path
+
+import synthetic_data
+from run_benchmarks import REPO_ROOT, STAGE_DIRS, generate_inputs, git_commit
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('bench_prefetch')
+
+def setup_arg_parser():
+    """인자 파서를 설정하고 반환합니다."""
+    parser = argparse.ArgumentParser(description='다중 파일 단계의 미리 읽기 효과 벤치마크')
+
+    parser.add_argument('--size', type=str, default='medium', choices=sorted(synthetic_data.SIZES),
+                        help='합성 데이터 크기 프리셋(기본값: medium)')
+    parser.add_argument('--depths', type=int, nargs='+', default=[0, 1, 2, 4],
+                        help='비교할 미리 읽기 깊이 목록(기본값: 0 1 2 4, 0은 순차 읽기)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='조합별 반복 횟수, 최소 실행 시간을 기록(기본값: 3)')
+    parser.add_argument('--workdir', type=str,
+                        help='합성 데이터 디렉토리(기본값: 임시 디렉토리)')
+    parser.add_argument('--output', type=str,
+                        help='결과 JSON 경로(기본값: benchmarks/results/<commit>_<size>_prefetch.json)')
+
+    return parser
+
+def evict_page_cache(paths):
+    """
+    파일들을 페이지 캐시에서 내립니다.
+
+    반환:
+    --------
+    bool : 지원되지 않는 플랫폼이면 False
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return False
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            # 기록 직후의 dirty 페이지는 내려가지 않으므로 먼저 디스크에 기록
+            os.fsync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    return True
+
+def list_files(directory, suffix='.csv'):
+    return sorted(str(p) for p in Path(directory).glob(f'*{suffix}'))
+
+# --- 측정 대상 ---
+# 각 함수는 (입력 파일 목록, 미리 읽기 깊이를 받아 처리한 행 수를 반환하는 실행 함수)를 반환합니다.
+
+def target_load_af_data(inputs, workdir):
+    import process_af_flag
+
+    def run(depth):
+        return len(process_af_flag.load_af_data(inputs['firms'], prefetch_depth=depth))
+    return list_files(inputs['firms']), run
+
+def target_combine_weather_data(inputs, workdir):
+    import combine_weather_data
+
+    def run(depth):
+        return len(combine_weather_data.combine_weather_files(inputs['weather'], prefetch_depth=depth))
+    return list_files(inputs['weather']), run
+
+def target_csv_to_parquet(inputs, workdir):
+    import csv_to_parquet
+
+    # 출력 Parquet이 입력 디렉토리에 기록되므로 날씨 CSV를 작업 디렉토리로 복사해 사용
+    csv_dir = Path(workdir) / 'outputs' / 'prefetch_csv'
+    csv_dir.mkdir(parents=True, exist_ok=True)
+    for path in list_files(inputs['weather']):
+        target = csv_dir / os.path.basename(path)
+        if not target.exists():
+            target.write_bytes(Path(path).read_bytes())
+
+    def run(depth):
+        csv_to_parquet.combine_csvs_to_parquet_pyarrow(csv_dir, prefetch_depth=depth)
+        return len(list_files(csv_dir))
+    return list_files(csv_dir), run
+
+TARGETS = {
+    'load_af_data': (target_load_af_data, {'firms'}),
+    'combine_weather_data': (target_combine_weather_data, {'weather'}),
+    'csv_to_parquet': (target_csv_to_parquet, {'weather'}),
+}
+
+def measure(run, files, depth, cold, repeat):
+    """조합 하나를 repeat번 실행하여 최소 실행 시간(초)과 처리 행 수를 반환합니다."""
+    best = None
+    rows = 0
+    for _ in range(repeat):
+        if cold:
+            evict_page_cache(files)
+        start = time.perf_counter()
+        rows = run(depth)
+        wall = time.perf_counter() - start
+        best = wall if best is None else min(best, wall)
+    return best, rows
+
+def main():
+    """미리 읽기 벤치마크를 실행하는 메인 함수."""
+    parser = setup_arg_parser()
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='preprocess_bench_')
+    os.makedirs(workdir, exist_ok=True)
+    datasets = set().union(*(datasets for _, datasets in TARGETS.values()))
+    inputs = generate_inputs(workdir, args.size, datasets)
+
+    sys.path[:0] = STAGE_DIRS
+    # 단계 스크립트의 진행 출력은 측정 시간에 영향을 주므로 숨김
+    logging.disable(logging.INFO)
+    devnull = open(os.devnull, 'w')
+
+    cold_supported = hasattr(os, 'posix_fadvise')
+    cache_states = ['warm', 'cold'] if cold_supported else ['warm']
+    results = []
+    for name, (make_target, _) in TARGETS.items():
+        files, run = make_target(inputs, workdir)
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            run(0)  # 모듈 import와 첫 실행 비용은 측정에서 제외
+            for cache_state in cache_states:
+                baseline = None
+                for depth in args.depths:
+                    wall, rows = measure(run, files, depth, cache_state == 'cold', args.repeat)
+                    baseline = wall if baseline is None else baseline
+                    results.append({'target': name, 'cache': cache_state, 'depth': depth,
+                                    'files': len(files), 'rows': int(rows), 'wall_s': wall,
+                                    'speedup': baseline / wall if wall > 0 else None})
+        finally:
+            sys.stdout = stdout
+
+    logging.disable(logging.NOTSET)
+    if not cold_supported:
+        logger.warning("posix_fadvise is not available, only warm cache runs were measured")
+    for r in results:
+        logger.info(f"{r['target']:<22} {r['cache']:<5} depth={r['depth']}  {r['wall_s']:.3f}s  "
+                    f"x{r['speedup']:.2f} vs depth={args.depths[0]}")
+
+    report = {
+        'commit': git_commit(),
+        'size': args.size,
+        'repeat': args.repeat,
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+    output_file = args.output or os.path.join(
+        REPO_ROOT, 'benchmarks', 'results', f"{report['commit']}_{args.size}_prefetch.json")
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    with open(output_file, 'w') as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Saved prefetch benchmark results to {output_file}")
+
+if __name__ == '__main__':
+    main()
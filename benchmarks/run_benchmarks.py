@@ -0,0 +1,397 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+전처리 단계별 처리량 벤치마크.
+
+합성 입력 데이터를 생성한 뒤 각 단계를 별도 프로세스에서 실행하여
+실행 시간(wall/CPU), 초당 처리 행 수, 최대 RSS를 측정하고 JSON으로 저장합니다.
+같은 머신에서 커밋 간 결과를 --compare로 비교할 수 있습니다.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import platform
+import tempfile
+import contextlib
+import subprocess
+import multiprocessing as mp
+from datetime import datetime
+
+import synthetic_data
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('run_benchmarks')
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 단계 스크립트가 있는 디렉토리(스크립트들은 패키지가 아니므로 경로에 직접 추가)
+STAGE_DIRS = [
+    os.path.join(REPO_ROOT, 'yong-weather-target'),
+    os.path.join(REPO_ROOT, 'yong-weather-target', 'target'),
+    os.path.join(REPO_ROOT, 'yong-weather-target', 'weather'),
+    os.path.join(REPO_ROOT, 'src', 'fuel'),
+    os.path.join(REPO_ROOT, 'src', 'population'),
+]
+
+FUEL_VARIABLES = ['DFMC_Foliage', 'DFMC_Wood']
+
+def setup_arg_parser():
+    """인자 파서를 설정하고 반환합니다."""
+    parser = argparse.ArgumentParser(description='전처리 단계별 처리량 벤치마크')
+
+    parser.add_argument('--size', type=str, default='small', choices=sorted(synthetic_data.SIZES),
+                        help='합성 데이터 크기 프리셋(기본값: small)')
+    parser.add_argument('--stages', type=str,
+                        help='실행할 단계 목록(쉼표 구분, 기본값: 전체)')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='단계별 반복 횟수, 최소 실행 시간을 기록(기본값: 1)')
+    parser.add_argument('--workdir', type=str,
+                        help='합성 데이터와 중간 산출물 디렉토리(기본값: 임시 디렉토리)')
+    parser.add_argument('--output', type=str,
+                        help='결과 JSON 경로(기본값: benchmarks/results/<commit>_<size>.json)')
+    parser.add_argument('--compare', type=str,
+                        help='비교할 이전 결과 JSON 경로')
+    parser.add_argument('--threshold', type=float, default=1.10,
+                        help='회귀로 표시할 실행 시간 비율(기본값: 1.10)')
+    parser.add_argument('--verbose', action='store_true',
+                        help='단계 스크립트의 출력을 그대로 표시')
+    parser.add_argument('--generate-all', action='store_true',
+                        help='단계에서 사용하지 않는 데이터셋(ERA5-Land, VOD NetCDF)까지 모두 생성')
+
+    return parser
+
+def peak_rss_mb():
+    """현재 프로세스의 최대 RSS(MB)를 반환합니다."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux는 KB, macOS는 바이트 단위
+        return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 1024 ** 2
+
+def git_commit():
+    """현재 git 커밋 해시를 반환합니다."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+# --- 입력 데이터 ---
+
+def generate_inputs(workdir, size, datasets):
+    """
+    선택된 단계에 필요한 합성 입력 데이터를 생성합니다. 이미 있으면 재사용합니다.
+
+    매개변수:
+    -----------
+    workdir : str
+        작업 디렉토리
+    size : str
+        크기 프리셋 이름
+    datasets : set
+        생성할 데이터셋 이름 집합
+
+    반환:
+    --------
+    dict : 데이터셋 이름별 경로
+    """
+    params = synthetic_data.SIZES[size]
+    data_dir = os.path.join(workdir, 'inputs', size)
+    inputs = {}
+
+    def cached(name, path, make):
+        if not os.path.exists(path):
+            logger.info(f"Generating {name}: {path}")
+            make()
+        inputs[name] = path
+
+    if 'firms' in datasets:
+        firms_dir = os.path.join(data_dir, 'firms')
+        cached('firms', firms_dir, lambda: synthetic_data.make_firms_csvs(
+            firms_dir, params['fire_rows'], params['firms_files'], days=params['days']))
+        # 검증 단계는 원본 파일 하나를 읽음
+        firms_single = os.path.join(data_dir, 'firms_single', 'fire_archive_M-C61_000.csv')
+        cached('firms_single', firms_single, lambda: synthetic_data.make_firms_csvs(
+            os.path.dirname(firms_single), params['fire_rows'], 1, days=params['days']))
+    if 'weather' in datasets:
+        weather_dir = os.path.join(data_dir, 'weather')
+        cached('weather', weather_dir, lambda: synthetic_data.make_weather_csvs(
+            weather_dir, params['days'], params['weather_files']))
+    if 'era5' in datasets:
+        era5_file = os.path.join(data_dir, 'era5', 'era5_land.nc')
+        cached('era5', era5_file, lambda: synthetic_data.make_era5_land_netcdf(era5_file, params['era5_days']))
+    if 'fuel' in datasets:
+        fuel_file = os.path.join(data_dir, 'fuel', 'DFMC', 'dfmc_2021_12.nc')
+        cached('fuel', fuel_file, lambda: synthetic_data.make_fuel_netcdf(
+            fuel_file, FUEL_VARIABLES, params['fuel_steps']))
+    if 'vod' in datasets:
+        vod_dir = os.path.join(data_dir, 'vod')
+        cached('vod', vod_dir, lambda: synthetic_data.make_vod_netcdf(vod_dir, params['vod_days']))
+    if 'gpw_tif' in datasets:
+        tif_file = os.path.join(data_dir, 'gpw', 'gpw_v4_population_density_rev11_2020_30_sec_2020.tif')
+        cached('gpw_tif', tif_file, lambda: synthetic_data.make_gpw_geotiff(tif_file, params['gpw_fraction']))
+    if 'gpw_csv' in datasets:
+        xy_file = os.path.join(data_dir, 'gpw_filtered', 'gpw_v4_population_density_rev11_2020_30_sec_2020.csv')
+        cached('gpw_csv', xy_file, lambda: synthetic_data.make_gpw_xy_csv(xy_file, params['gpw_fraction']))
+
+    return inputs
+
+# --- 단계 정의 ---
+# 각 함수는 (시간 측정에서 제외되는) 준비 작업을 수행한 뒤,
+# 처리한 입력 행 수를 반환하는 실행 함수를 반환합니다.
+
+def _processed_af_flag(inputs, workdir):
+    """검증/결합 단계 입력용 af_flag 파일을 만들어 경로를 반환합니다(시간 측정 제외)."""
+    import process_af_flag
+
+    path = os.path.join(workdir, 'outputs', 'af_flag_processed.csv')
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df = process_af_flag.load_af_data(os.path.dirname(inputs['firms_single']))
+        process_af_flag.process_af_data(df).to_csv(path, index=False)
+    return path
+
+def stage_process_af_flag(inputs, workdir):
+    import process_af_flag
+
+    def run():
+        df = process_af_flag.load_af_data(inputs['firms'])
+        process_af_flag.process_af_data(df)
+        return len(df)
+    return run
+
+def stage_validate_af_flag(inputs, workdir):
+    import validate_af_flag
+
+    processed_file = _processed_af_flag(inputs, workdir)
+
+    def run():
+        results = validate_af_flag.validate_af_flag_processing(inputs['firms_single'], processed_file)
+        return results['original_rows']
+    return run
+
+def stage_nc_to_csv(inputs, workdir):
+    import netCDF4 as nc
+    import nc_to_csv
+
+    output_file = os.path.join(workdir, 'outputs', 'fuel_csv', 'DFMC', 'dfmc_2021_12.csv')
+
+    def run():
+        with nc.Dataset(inputs['fuel']) as ds:
+            nc_to_csv.convert_nc_to_csv(ds, output_file, FUEL_VARIABLES)
+            return ds.variables[FUEL_VARIABLES[0]].size
+    return run
+
+def stage_tif_to_csv(inputs, workdir):
+    import rasterio
+    import tif_to_csv
+
+    output_file = os.path.join(workdir, 'outputs', 'population_csv', 'gpw_2020.csv')
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+    def run():
+        tif_to_csv.tif_to_csv_memory_efficient(inputs['gpw_tif'], output_file)
+        with rasterio.open(inputs['gpw_tif']) as src:
+            return src.width * src.height
+    return run
+
+def stage_geocode_to_grid(inputs, workdir):
+    import geocode_to_grid
+
+    output_file = os.path.join(workdir, 'outputs', 'population_grid', os.path.basename(inputs['gpw_csv']))
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+    def run():
+        geocode_to_grid.transform_geocode_to_grid_id(inputs['gpw_csv'], output_file)
+        with open(inputs['gpw_csv']) as f:
+            return sum(1 for _ in f) - 1
+    return run
+
+def stage_join_weather_target(inputs, workdir):
+    import combine_weather_data
+    import join_weather_target
+
+    target_file = _processed_af_flag(inputs, workdir)
+    weather_file = os.path.join(workdir, 'outputs', 'weather_combined.parquet')
+    if not os.path.exists(weather_file):
+        combine_weather_data.combine_weather_files(inputs['weather']).to_parquet(weather_file, index=False)
+
+    def run():
+        weather_df = join_weather_target.load_data(weather_file)
+        target_df = join_weather_target.load_data(target_file)
+        join_weather_target.join_data(weather_df, target_df, fill_zeros=True)
+        return len(weather_df)
+    return run
+
+def stage_combine_weather_data(inputs, workdir):
+    import combine_weather_data
+
+    def run():
+        return len(combine_weather_data.combine_weather_files(inputs['weather']))
+    return run
+
+# 단계 이름 -> (단계 함수, 필요한 데이터셋)
+STAGES = {
+    'process_af_flag': (stage_process_af_flag, {'firms'}),
+    'validate_af_flag': (stage_validate_af_flag, {'firms'}),
+    'nc_to_csv': (stage_nc_to_csv, {'fuel'}),
+    'tif_to_csv': (stage_tif_to_csv, {'gpw_tif'}),
+    'geocode_to_grid': (stage_geocode_to_grid, {'gpw_csv'}),
+    'join_weather_target': (stage_join_weather_target, {'firms', 'weather'}),
+    'combine_weather_data': (stage_combine_weather_data, {'weather'}),
+}
+
+ALL_DATASETS = {'firms', 'weather', 'era5', 'fuel', 'vod', 'gpw_tif', 'gpw_csv'}
+
+# --- 실행 ---
+
+def _stage_worker(stage, inputs, workdir, verbose, queue):
+    """별도 프로세스에서 한 단계를 실행하고 측정 결과를 큐에 넣습니다."""
+    sys.path[:0] = STAGE_DIRS
+    try:
+        with contextlib.ExitStack() as stack:
+            # 단계 스크립트의 진행 출력은 측정 시간에 영향을 주므로 기본적으로 숨김
+            if not verbose:
+                stack.enter_context(contextlib.redirect_stdout(open(os.devnull, 'w')))
+                logging.disable(logging.INFO)
+            run = STAGES[stage][0](inputs, workdir)
+            rss_before = peak_rss_mb()
+            cpu_start = time.process_time()
+            wall_start = time.perf_counter()
+            rows = run()
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+        queue.put({
+            'stage': stage,
+            'rows': int(rows),
+            'wall_s': wall,
+            'cpu_s': cpu,
+            'rows_per_s': rows / wall if wall > 0 else None,
+            'rss_before_mb': rss_before,
+            'peak_rss_mb': peak_rss_mb(),
+        })
+    except Exception as e:
+        queue.put({'stage': stage, 'error': f"{type(e).__name__}: {e}"})
+
+def run_stage(stage, inputs, workdir, verbose=False):
+    """
+    새 프로세스에서 단계를 실행합니다. 단계마다 프로세스를 분리해야
+    최대 RSS가 이전 단계의 메모리 사용량에 영향받지 않습니다.
+    """
+    ctx = mp.get_context('spawn')
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_stage_worker, args=(stage, inputs, workdir, verbose, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+def compare_results(current, baseline_file, threshold=1.10):
+    """
+    이전 결과 JSON과 비교하여 단계별 실행 시간 비율을 출력합니다.
+
+    반환:
+    --------
+    list : 실행 시간이 threshold 배 이상 늘어난 단계 목록
+    """
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+
+    base_stages = {s['stage']: s for s in baseline['stages'] if 'error' not in s}
+    regressions = []
+
+    logger.info(f"Comparing with {baseline_file} (commit {baseline.get('commit')}, size {baseline.get('size')})")
+    for stage in current['stages']:
+        base = base_stages.get(stage['stage'])
+        if base is None or 'error' in stage:
+            continue
+        ratio = stage['wall_s'] / base['wall_s'] if base['wall_s'] > 0 else float('inf')
+        mem_ratio = stage['peak_rss_mb'] / base['peak_rss_mb'] if base['peak_rss_mb'] else float('inf')
+        flag = ' REGRESSION' if ratio >= threshold else ''
+        logger.info(f"  {stage['stage']:<22} wall x{ratio:.2f}  peak_rss x{mem_ratio:.2f}{flag}")
+        if ratio >= threshold:
+            regressions.append(stage['stage'])
+
+    return regressions
+
+def main():
+    """벤치마크를 실행하는 메인 함수."""
+    parser = setup_arg_parser()
+    args = parser.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(',')] if args.stages else list(STAGES)
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"Unknown stages: {unknown} (available: {list(STAGES)})")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='preprocess_bench_')
+    os.makedirs(workdir, exist_ok=True)
+    logger.info(f"Working directory: {workdir}")
+
+    datasets = set().union(*(STAGES[s][1] for s in stages))
+    if args.generate_all:
+        datasets |= ALL_DATASETS
+    inputs = generate_inputs(workdir, args.size, datasets)
+
+    results = []
+    for stage in stages:
+        best = None
+        for _ in range(args.repeat):
+            result = run_stage(stage, inputs, workdir, verbose=args.verbose)
+            if 'error' in result:
+                best = result
+                break
+            if best is None or result['wall_s'] < best['wall_s']:
+                best = result
+        if 'error' in best:
+            logger.error(f"{stage}: {best['error']}")
+        else:
+            logger.info(f"{stage}: {best['wall_s']:.3f}s wall, {best['rows_per_s']:.0f} rows/s, "
+                        f"peak RSS {best['peak_rss_mb']:.1f} MB")
+        results.append(best)
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'size': args.size,
+        'params': synthetic_data.SIZES[args.size],
+        'repeat': args.repeat,
+        'machine': {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+        },
+        'stages': results,
+    }
+
+    output_file = args.output or os.path.join(
+        REPO_ROOT, 'benchmarks', 'results', f"{report['commit']}_{args.size}.json")
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    with open(output_file, 'w') as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Saved benchmark results to {output_file}")
+
+    if args.compare:
+        regressions = compare_results(report, args.compare, args.threshold)
+        if regressions:
+            logger.warning(f"Regressions: {regressions}")
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+벤치마크용 합성 입력 데이터 생성기.
+
+실제 원본과 같은 열 구성/차원/좌표 범위(한국 33~39°N, 124~132°E)를 가진
+FIRMS CSV, ERA5-Land NetCDF, GPW GeoTIFF, 연료 NetCDF, VOD NetCDF 등을
+원하는 크기로 생성합니다.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+# 한국 지역 범위
+LAT_MIN, LAT_MAX = 33.0, 39.0
+LON_MIN, LON_MAX = 124.0, 132.0
+
+# GPW v4 GeoTIFF의 nodata 값
+GPW_NODATA = -3.4028230607370965e+38
+
+# 크기 프리셋: 각 값은 해당 데이터셋의 행/시간 단계/해상도 규모를 결정
+SIZES = {
+    'small': {
+        'fire_rows': 50_000,
+        'firms_files': 4,
+        'days': 31,
+        'weather_files': 4,
+        'era5_days': 2,
+        'fuel_steps': 2,
+        'gpw_fraction': 0.25,
+        'vod_days': 2,
+    },
+    'medium': {
+        'fire_rows': 500_000,
+        'firms_files': 12,
+        'days': 365,
+        'weather_files': 12,
+        'era5_days': 7,
+        'fuel_steps': 6,
+        'gpw_fraction': 0.5,
+        'vod_days': 7,
+    },
+    'large': {
+        'fire_rows': 2_000_000,
+        'firms_files': 24,
+        'days': 365 * 4,
+        'weather_files': 48,
+        'era5_days': 31,
+        'fuel_steps': 12,
+        'gpw_fraction': 1.0,
+        'vod_days': 31,
+    },
+}
+
+def korea_grid_ids():
+    """한국 범위의 모든 0.1도 그리드 ID를 반환합니다."""
+    lat_idx = np.arange(int(LAT_MIN * 10), int(LAT_MAX * 10)) + 900
+    lon_idx = np.arange(int(LON_MIN * 10), int(LON_MAX * 10)) + 1800
+    return (lat_idx[:, None] * 3600 + lon_idx[None, :]).ravel()
+
+def make_firms_csvs(output_dir, n_rows, n_files=1, start_date='2020-01-01', days=365, seed=0):
+    """
+    NASA FIRMS MODIS 아카이브 형식의 활성 화재 CSV 파일을 생성합니다.
+
+    매개변수:
+    -----------
+    output_dir : str
+        출력 디렉토리
+    n_rows : int
+        전체 화재 탐지 행 수(파일에 균등 분배)
+    n_files : int
+        생성할 CSV 파일 수
+    start_date : str
+        첫 탐지 날짜
+    days : int
+        탐지 날짜 범위(일)
+    seed : int
+        난수 시드
+
+    반환:
+    --------
+    list : 생성된 파일 경로 목록
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start_date, periods=days, freq='D')
+
+    paths = []
+    for i, n in enumerate(np.array_split(np.arange(n_rows), n_files)):
+        size = len(n)
+        df = pd.DataFrame({
+            'latitude': rng.uniform(LAT_MIN, LAT_MAX, size).round(4),
+            'longitude': rng.uniform(LON_MIN, LON_MAX, size).round(4),
+            'brightness': rng.normal(320, 12, size).round(1),
+            'scan': rng.uniform(1.0, 4.0, size).round(1),
+            'track': rng.uniform(1.0, 2.0, size).round(1),
+            'acq_date': dates[rng.integers(0, days, size)].strftime('%Y-%m-%d'),
+            'acq_time': rng.integers(0, 2400, size),
+            'satellite': rng.choice(['Terra', 'Aqua'], size),
+            'instrument': 'MODIS',
+            'confidence': rng.integers(0, 101, size),
+            'version': '6.1',
+            'bright_t31': rng.normal(295, 8, size).round(1),
+            'frp': rng.gamma(1.5, 10.0, size).round(1),
+            'daynight': rng.choice(['D', 'N'], size, p=[0.7, 0.3]),
+            'type': rng.choice([0, 2, 3], size, p=[0.95, 0.03, 0.02]),
+        })
+        path = os.path.join(output_dir, f"fire_archive_M-C61_{i:03d}.csv")
+        df.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+def make_weather_csvs(output_dir, days, n_files=1, start_date='2020-01-01', seed=0):
+    """
+    process_weather.py 출력 형식(acq_date, grid_id, 기상 변수)의 일별 그리드 날씨 CSV를
+    날짜 구간별 파일로 나누어 생성합니다.
+
+    반환:
+    --------
+    list : 생성된 파일 경로 목록
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    grid_ids = korea_grid_ids()
+    dates = pd.date_range(start_date, periods=days, freq='D')
+
+    paths = []
+    for i, date_chunk in enumerate(np.array_split(dates, n_files)):
+        n = len(date_chunk) * len(grid_ids)
+        df = pd.DataFrame({
+            'acq_date': np.repeat(date_chunk.strftime('%Y-%m-%d'), len(grid_ids)),
+            'grid_id': np.tile(grid_ids, len(date_chunk)),
+            'temperature': rng.normal(285, 10, n).round(2),
+            'relative_humidity': rng.uniform(20, 100, n).round(1),
+            'precipitation': rng.exponential(0.002, n).round(5),
+            'wind_speed': rng.gamma(2.0, 1.5, n).round(2),
+        })
+        path = os.path.join(output_dir, f"weather_{i:03d}.csv")
+        df.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+def _write_netcdf(path, times, time_units, lat_name, lon_name, lats, lons, variables):
+    """(time, lat, lon) 차원의 NetCDF 파일을 작성합니다."""
+    import netCDF4 as nc
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with nc.Dataset(path, 'w') as ds:
+        ds.createDimension('time', len(times))
+        ds.createDimension(lat_name, len(lats))
+        ds.createDimension(lon_name, len(lons))
+
+        time_var = ds.createVariable('time', 'f8', ('time',))
+        time_var.units = time_units
+        time_var.calendar = 'standard'
+        time_var[:] = times
+        ds.createVariable(lat_name, 'f8', (lat_name,))[:] = lats
+        ds.createVariable(lon_name, 'f8', (lon_name,))[:] = lons
+
+        for name, values in variables.items():
+            var = ds.createVariable(name, 'f4', ('time', lat_name, lon_name), fill_value=np.float32(np.nan))
+            var[:] = values
+    return path
+
+def make_era5_land_netcdf(path, days, start_date='2020-01-01', seed=0):
+    """
+    ERA5-Land 시간별 자료 형식(0.1도, 북→남 위도 순서, t2m/d2m/u10/v10/tp)의 NetCDF를 생성합니다.
+    """
+    rng = np.random.default_rng(seed)
+    lats = np.round(np.arange(LAT_MAX, LAT_MIN - 0.05, -0.1), 1)
+    lons = np.round(np.arange(LON_MIN, LON_MAX + 0.05, 0.1), 1)
+    hours = days * 24
+    shape = (hours, len(lats), len(lons))
+    times = np.arange(hours, dtype='f8')
+
+    variables = {
+        't2m': rng.normal(285, 10, shape).astype('f4'),
+        'd2m': rng.normal(278, 8, shape).astype('f4'),
+        'u10': rng.normal(0, 3, shape).astype('f4'),
+        'v10': rng.normal(0, 3, shape).astype('f4'),
+        'tp': rng.exponential(0.0002, shape).astype('f4'),
+    }
+    # 해양 격자는 결측 처리(ERA5-Land는 육지 전용)
+    ocean = rng.random((len(lats), len(lons))) < 0.3
+    for values in variables.values():
+        values[:, ocean] = np.nan
+
+    return _write_netcdf(path, times, f"hours since {start_date} 00:00:00",
+                         'latitude', 'longitude', lats, lons, variables)
+
+def make_fuel_netcdf(path, variables, steps, start_date='2021-12-01', seed=0):
+    """
+    CDS derived-fire-fuel-biomass 형식(약 0.07도, lat/lon 차원)의 연료 NetCDF를 생성합니다.
+
+    매개변수:
+    -----------
+    path : str
+        출력 파일 경로
+    variables : list
+        데이터 변수 이름(예: ['DFMC_Foliage', 'DFMC_Wood'])
+    steps : int
+        시간 단계 수
+    """
+    rng = np.random.default_rng(seed)
+    lats = np.linspace(LAT_MAX - 0.02, LAT_MIN + 0.02, 86)
+    lons = np.linspace(LON_MIN + 0.03, LON_MAX - 0.03, 115)
+    shape = (steps, len(lats), len(lons))
+
+    data = {}
+    for name in variables:
+        values = rng.gamma(2.0, 30.0, shape).astype('f4')
+        values[rng.random(shape) < 0.2] = np.nan
+        values[rng.random(shape) < 0.1] = 0.0
+        data[name] = values
+
+    return _write_netcdf(path, np.arange(steps, dtype='f8') * 24.0, f"hours since {start_date} 12:00:00",
+                         'lat', 'lon', lats, lons, data)
+
+def make_vod_netcdf(output_dir, days, start_date='2011-02-23', seed=0):
+    """
+    kye/Depth.py가 읽는 VOD 일별 NetCDF(VOD_ASC, VOD_DESC, VOD_ASC_DESC, 날짜는 파일명 4번째 토큰)를 생성합니다.
+
+    반환:
+    --------
+    list : 생성된 파일 경로 목록
+    """
+    rng = np.random.default_rng(seed)
+    lats = np.arange(LAT_MAX - 0.125, LAT_MIN, -0.25)
+    lons = np.arange(LON_MIN + 0.125, LON_MAX, 0.25)
+    shape = (1, len(lats), len(lons))
+
+    paths = []
+    for date in pd.date_range(start_date, periods=days, freq='D'):
+        data = {}
+        for name in ['VOD_ASC', 'VOD_DESC', 'VOD_ASC_DESC']:
+            values = rng.uniform(0.0, 1.2, shape).astype('f4')
+            values[rng.random(shape) < 0.3] = np.nan
+            data[name] = values
+        path = os.path.join(output_dir, f"VODCA_CXKu_daily_{date.strftime('%Y%m%d')}_v01.nc")
+        paths.append(_write_netcdf(path, np.zeros(1), f"days since {date.strftime('%Y-%m-%d')}",
+                                   'lat', 'lon', lats, lons, data))
+    return paths
+
+def make_gpw_geotiff(path, fraction=1.0, year=2020, seed=0):
+    """
+    GPW v4 인구밀도(30초 해상도, float32, nodata=-3.4e38) 형식의 GeoTIFF를 한국 범위로 생성합니다.
+
+    매개변수:
+    -----------
+    path : str
+        출력 파일 경로
+    fraction : float
+        한국 범위 중 생성할 변 길이 비율(1.0 = 960 x 720 픽셀)
+    """
+    import rasterio
+    from rasterio.transform import from_origin
+
+    rng = np.random.default_rng(seed)
+    res = 1.0 / 120.0
+    width = max(int(round((LON_MAX - LON_MIN) / res * fraction)), 1)
+    height = max(int(round((LAT_MAX - LAT_MIN) / res * fraction)), 1)
+
+    data = rng.lognormal(3.0, 2.0, (height, width)).astype('f4')
+    data[rng.random((height, width)) < 0.25] = GPW_NODATA
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with rasterio.open(
+        path, 'w', driver='GTiff', height=height, width=width, count=1, dtype='float32',
+        crs='EPSG:4326', transform=from_origin(LON_MIN, LAT_MAX, res, res),
+        nodata=GPW_NODATA, tiled=True, blockxsize=256, blockysize=256,
+    ) as dst:
+        dst.write(data, 1)
+    return path
+
+def make_gpw_xy_csv(path, fraction=1.0, seed=0):
+    """
+    filter_large_csv.py 출력 형식(x, y, value)의 인구밀도 CSV를 생성합니다.
+    파일 이름은 geocode_to_grid.py가 연도를 인식하도록 '_YYYY.csv'로 끝나야 합니다.
+    """
+    rng = np.random.default_rng(seed)
+    res = 1.0 / 120.0
+    xs = np.arange(LON_MIN, LON_MIN + (LON_MAX - LON_MIN) * fraction, res)
+    ys = np.arange(LAT_MAX, LAT_MAX - (LAT_MAX - LAT_MIN) * fraction, -res)
+    x, y = np.meshgrid(xs, ys)
+
+    df = pd.DataFrame({
+        'x': x.ravel(),
+        'y': y.ravel(),
+        'value': rng.lognormal(3.0, 2.0, x.size).astype('f4'),
+    })
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    df.to_csv(path, index=False)
+    return path
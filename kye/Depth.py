@@ -1,73 +1,153 @@
 import os
+import sys
+import argparse
 import xarray as xr
 import numpy as np
 import pandas as pd
 from collections import defaultdict
 
-data_dir = "C:/Users/USER/Downloads/data"
-target_vars = ['VOD_ASC', 'VOD_DESC', 'VOD_ASC_DESC']
-output_dir = "vod_per_day_csv"
-os.makedirs(output_dir, exist_ok=True)
+# 공용 모듈(src/common) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from common.grid import add_grid_arguments, registry_from_args
+from common.cache import add_cache_arguments, cache_from_args
+
+# 저장 CSV 형식이 바뀌도록 코드를 수정하면 값을 올려 기존 캐시를 무효화
+CACHE_VERSION = 1
+
+TARGET_VARS = ['VOD_ASC', 'VOD_DESC', 'VOD_ASC_DESC']
 
 def compute_grid_id(lat_val, lon_val):
     lat_bin = int(np.floor(lat_val / 0.1))
     lon_bin = int(np.floor(lon_val / 0.1))
     return (lat_bin + 900) * 3600 + (lon_bin + 1800)
 
-for file in os.listdir(data_dir):
-    if file.endswith(".nc"):
-        file_path = os.path.join(data_dir, file)
-        print(f"Processing: {file_path}")
-
-        # ✅ 메모리 최적화를 위해 chunking 사용
-        ds = xr.open_dataset(file_path, chunks={'lat': 100, 'lon': 100})  
-
-        try:
-            lat = ds['lat'].values
-            lon = ds['lon'].values
-        except Exception as e:
-            print(f"❌ 위경도 로딩 실패: {e}")
-            continue
-
-        date_str = file.split('_')[3]
-        date = pd.to_datetime(date_str, format="%Y%m%d")
-        daily_records = []
-
-        for var_name in target_vars:
-            if var_name in ds.variables:
-                var_data = ds[var_name]
-
-                if 'time' in var_data.dims:
-                    data = var_data.isel(time=0).load().values  # lazy → 메모리에 올림
-                else:
-                    data = var_data.load().values
-
-                dim_order = var_data.dims
-                for i in range(data.shape[0]):
-                    for j in range(data.shape[1]):
-                        if 'lat' in dim_order[0]:
-                            lat_val = lat[i]
-                            lon_val = lon[j]
-                        else:
-                            lat_val = lat[j]
-                            lon_val = lon[i]
-                        val = data[i, j]
-                        if not np.isnan(val):
-                            grid_id = compute_grid_id(lat_val, lon_val)
-                            daily_records.append({
-                                'date': date,
-                                'lat': lat_val,
-                                'lon': lon_val,
-                                'grid_id': grid_id,
-                                'variable': var_name,
-                                'value': val
-                            })
-
-        # ✅ 날짜별 CSV 저장
-        if daily_records:
-            df = pd.DataFrame(daily_records)
-            output_path = os.path.join(output_dir, f"vod_{date.strftime('%Y%m%d')}.csv")
-            df.to_csv(output_path, index=False)
-            print(f"✅ 저장 완료 → {output_path}")
-
-print("\n🎉 모든 날짜별 파일 저장 완료!")
+def process_vod_file(file_path, output_dir, target_vars=TARGET_VARS, registry=None):
+    """
+    VOD NetCDF 파일 하나를 grid_id가 붙은 날짜별 CSV(vod_YYYYMMDD.csv)로 저장합니다.
+
+    :param file_path: VOD NetCDF 파일 경로 (파일명 네 번째 '_' 구분 항목이 YYYYMMDD 날짜)
+    :param output_dir: 날짜별 CSV 저장 디렉토리
+    :param target_vars: 추출할 VOD 변수 목록
+    :param registry: common.grid.GridRegistry (지정 시 유효 그리드에 속한 셀만 저장)
+    :return: 저장한 CSV 경로 (저장할 값이 없으면 None)
+    """
+    print(f"Processing: {file_path}")
+
+    # ✅ 메모리 최적화를 위해 chunking 사용
+    ds = xr.open_dataset(file_path, chunks={'lat': 100, 'lon': 100})
+
+    try:
+        lat = ds['lat'].values
+        lon = ds['lon'].values
+    except Exception as e:
+        print(f"❌ 위경도 로딩 실패: {e}")
+        return None
+
+    date_str = os.path.basename(file_path).split('_')[3]
+    date = pd.to_datetime(date_str, format="%Y%m%d")
+    daily_records = []
+
+    for var_name in target_vars:
+        if var_name in ds.variables:
+            var_data = ds[var_name]
+
+            if 'time' in var_data.dims:
+                data = var_data.isel(time=0).load().values  # lazy → 메모리에 올림
+            else:
+                data = var_data.load().values
+
+            dim_order = var_data.dims
+
+            # 바다/범위 밖 셀은 루프 전에 마스크로 제외
+            if 'lat' in dim_order[0]:
+                lat_mesh, lon_mesh = np.meshgrid(lat, lon, indexing='ij')
+            else:
+                lon_mesh, lat_mesh = np.meshgrid(lon, lat, indexing='ij')
+            keep_cell = ~np.isnan(data)
+            if registry is not None:
+                mesh_grid_ids = (np.floor(lat_mesh / 0.1).astype(np.int64) + 900) * 3600 + \
+                                (np.floor(lon_mesh / 0.1).astype(np.int64) + 1800)
+                keep_cell &= registry.contains(mesh_grid_ids)
+            for i in range(data.shape[0]):
+                for j in range(data.shape[1]):
+                    if 'lat' in dim_order[0]:
+                        lat_val = lat[i]
+                        lon_val = lon[j]
+                    else:
+                        lat_val = lat[j]
+                        lon_val = lon[i]
+                    val = data[i, j]
+                    if keep_cell[i, j]:
+                        grid_id = compute_grid_id(lat_val, lon_val)
+                        daily_records.append({
+                            'date': date,
+                            'lat': lat_val,
+                            'lon': lon_val,
+                            'grid_id': grid_id,
+                            'variable': var_name,
+                            'value': val
+                        })
+
+    # ✅ 날짜별 CSV 저장
+    if not daily_records:
+        return None
+    df = pd.DataFrame(daily_records)
+    output_path = os.path.join(output_dir, f"vod_{date.strftime('%Y%m%d')}.csv")
+    df.to_csv(output_path, index=False)
+    print(f"✅ 저장 완료 → {output_path}")
+    return output_path
+
+def vod_nc_to_daily_csv(data_dir, output_dir, target_vars=TARGET_VARS, registry=None, cache=None):
+    """
+    디렉토리의 모든 VOD NetCDF 파일을 날짜별 CSV로 변환합니다.
+
+    :param cache: common.cache.ConversionCache (지정 시 이전에 변환한 파일은 캐시에서 복원)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    for file in os.listdir(data_dir):
+        if file.endswith(".nc"):
+            file_path = os.path.join(data_dir, file)
+            if cache is None:
+                process_vod_file(file_path, output_dir, target_vars, registry)
+                continue
+
+            date_str = file.split('_')[3]
+            output_path = os.path.join(output_dir, f"vod_{date_str}.csv")
+            params = {
+                'variables': list(target_vars),
+                'grid': registry.fingerprint if registry is not None else None
+            }
+            _, hit = cache.cached_csv('vod_daily_csv', CACHE_VERSION, [file_path], params, output_path,
+                                      lambda: process_vod_file(file_path, output_dir, target_vars, registry))
+            if hit:
+                print(f"♻️ 캐시에서 복원 → {output_path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="VOD NetCDF 파일을 grid_id 기준 날짜별 CSV로 변환합니다.")
+    parser.add_argument("--data-dir", type=str, default=os.path.join('.', 'data', 'vod', 'raw'),
+                        help="VOD NetCDF 파일 디렉토리 (기본값: ./data/vod/raw)")
+    parser.add_argument("--output-dir", type=str, default=os.path.join('.', 'data', 'vod', 'daily'),
+                        help="날짜별 CSV 저장 디렉토리 (기본값: ./data/vod/daily)")
+    parser.add_argument("--variables", type=str, nargs='+', default=TARGET_VARS,
+                        help="추출할 VOD 변수 (기본값: VOD_ASC VOD_DESC VOD_ASC_DESC)")
+    add_grid_arguments(parser)
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+
+    # 유효 그리드 목록(KOREA_GRID_FILE 또는 sara/grid_address)이 있으면 해당 셀만 저장
+    registry = registry_from_args(args)
+    if registry is None:
+        print("⚠️ 유효 그리드 필터 없이 모든 셀을 저장합니다.")
+
+    cache = cache_from_args(args)
+    vod_nc_to_daily_csv(args.data_dir, args.output_dir, args.variables, registry, cache)
+
+    if cache is not None:
+        for line in cache.report():
+            print(line)
+
+    print("\n🎉 모든 날짜별 파일 저장 완료!")
+
+if __name__ == '__main__':
+    main()
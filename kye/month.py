@@ -1,31 +1,60 @@
 import os
+import sys
+import argparse
 import pandas as pd
 from collections import defaultdict
 
-# 날짜별 CSV가 저장된 폴더 경로
-input_dir = "vod_per_day_csv"
-output_dir = "vod_per_month_csv"
-os.makedirs(output_dir, exist_ok=True)
+# 공용 모듈(src/common) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from common.prefetch import prefetch, add_prefetch_arguments
+from common.schema import write_frame
 
-# 월별 데이터 저장용 딕셔너리
-monthly_records = defaultdict(list)
+def combine_daily_to_monthly(input_dir, output_dir, prefetch_depth=None):
+    """
+    날짜별 VOD CSV(vod_YYYYMMDD.csv)를 월별 CSV(vod_YYYYMM.csv)로 병합합니다.
 
-# 폴더 내 모든 파일 순회
-for file in os.listdir(input_dir):
-    if file.endswith(".csv"):
+    :param input_dir: 날짜별 CSV가 저장된 폴더 경로
+    :param output_dir: 월별 CSV를 저장할 폴더 경로
+    :param prefetch_depth: 백그라운드 스레드로 미리 읽을 파일 수 (None이면 기본값, 0이면 순차)
+    :return: 저장한 월별 CSV 경로 목록
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    # 월별 데이터 저장용 딕셔너리
+    monthly_records = defaultdict(list)
+
+    # 폴더 내 모든 CSV 파일 순회 (다음 파일은 백그라운드 스레드에서 미리 읽음)
+    csv_files = [file for file in os.listdir(input_dir) if file.endswith(".csv")]
+    for file, fetch in prefetch(csv_files, lambda file: pd.read_csv(os.path.join(input_dir, file)),
+                                depth=prefetch_depth):
         # 파일명에서 날짜(예: vod_20110223.csv → 20110223) 추출
         date_str = file.replace("vod_", "").replace(".csv", "")
         month_key = date_str[:6]  # 'YYYYMM' 형식
 
-        file_path = os.path.join(input_dir, file)
-        df = pd.read_csv(file_path)
-        monthly_records[month_key].append(df)
+        monthly_records[month_key].append(fetch())
+
+    # 월별로 하나의 CSV로 병합 저장
+    output_paths = []
+    for month, dfs in monthly_records.items():
+        combined_df = pd.concat(dfs, ignore_index=True)
+        output_path = os.path.join(output_dir, f"vod_{month}.csv")
+        write_frame(combined_df, output_path)
+        output_paths.append(output_path)
+        print(f"✅ 월별 저장 완료 → {output_path}")
+    return output_paths
+
+def main():
+    parser = argparse.ArgumentParser(description="날짜별 VOD CSV를 월별 CSV로 병합합니다.")
+    parser.add_argument("--input-dir", type=str, default=os.path.join('.', 'data', 'vod', 'daily'),
+                        help="날짜별 CSV 폴더 (기본값: ./data/vod/daily)")
+    parser.add_argument("--output-dir", type=str, default=os.path.join('.', 'data', 'vod', 'monthly'),
+                        help="월별 CSV 폴더 (기본값: ./data/vod/monthly)")
+    add_prefetch_arguments(parser)
+    args = parser.parse_args()
+
+    combine_daily_to_monthly(args.input_dir, args.output_dir, args.prefetch)
 
-# 월별로 하나의 CSV로 병합 저장
-for month, dfs in monthly_records.items():
-    combined_df = pd.concat(dfs, ignore_index=True)
-    output_path = os.path.join(output_dir, f"vod_{month}.csv")
-    combined_df.to_csv(output_path, index=False)
-    print(f"✅ 월별 저장 완료 → {output_path}")
+    print("\n🎉 모든 월별 CSV 파일 저장 완료!")
 
-print("\n🎉 모든 월별 CSV 파일 저장 완료!")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+전처리 파이프라인 실행기.
+
+JSON 설정(pipeline.example.json 참고)에 선언된 단계(download → convert → grid →
+aggregate → join)를 입력/출력 산출물 기준 의존성 순서로 실행합니다.
+입력 파일 내용, 파라미터, 단계 코드가 이전 실행과 같고 출력이 존재하는 단계는 건너뛰며,
+서로 독립적인 단계는 여러 프로세스에서 동시에 실행합니다.
+"""
+
+import os
+import sys
+import argparse
+import logging
+
+# 공용 모듈(src/common) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from common.pipeline import load_pipeline_config
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('run_pipeline')
+
+def setup_arg_parser():
+    """인자 파서를 설정하고 반환합니다."""
+    parser = argparse.ArgumentParser(description='전처리 파이프라인 증분 실행')
+
+    parser.add_argument('--config', type=str,
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pipeline.example.json'),
+                        help='파이프라인 설정 JSON 파일 경로(기본값: pipeline/pipeline.example.json)')
+    parser.add_argument('--stages', type=str, nargs='+',
+                        help='실행할 단계 이름 또는 그룹(download, convert, grid, aggregate, join). '
+                             '선행 단계도 함께 확인합니다(기본값: 수동 단계를 제외한 전체)')
+    parser.add_argument('--set', type=str, nargs='+', default=[], metavar='NAME=VALUE',
+                        help='설정의 vars 값 덮어쓰기(예: data=/mnt/data)')
+    parser.add_argument('--force', action='store_true',
+                        help='최신 상태여도 선택한 단계를 다시 실행')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='실행하지 않고 다시 실행될 단계만 출력')
+    parser.add_argument('--jobs', type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help='동시에 실행할 최대 단계 수(기본값: CPU 코어 수의 절반)')
+    parser.add_argument('--state-file', type=str,
+                        help='단계 fingerprint 상태 파일(기본값: <root>/.pipeline_state.json)')
+    parser.add_argument('--list', action='store_true',
+                        help='단계와 의존성 목록만 출력')
+
+    return parser
+
+def parse_overrides(items):
+    """
+    NAME=VALUE 형식의 인자를 딕셔너리로 변환합니다.
+
+    매개변수:
+    -----------
+    items : list
+        NAME=VALUE 문자열 목록
+
+    반환:
+    --------
+    dict
+        변수 이름 → 값
+    """
+    overrides = {}
+    for item in items:
+        if '=' not in item:
+            raise ValueError(f"Invalid --set value (expected NAME=VALUE): {item}")
+        name, value = item.split('=', 1)
+        overrides[name] = value
+    return overrides
+
+def main():
+    """파이프라인을 실행하는 메인 함수."""
+    parser = setup_arg_parser()
+    args = parser.parse_args()
+
+    pipeline = load_pipeline_config(
+        args.config,
+        variables=parse_overrides(args.set),
+        state_file=args.state_file,
+        log=logger.info
+    )
+
+    if args.list:
+        for name, stage in pipeline.stages.items():
+            deps = ', '.join(sorted(pipeline.deps[name])) or '-'
+            manual = ' (manual)' if stage.manual else ''
+            logger.info(f"{name} [{stage.group}]{manual} <- {deps}")
+        return
+
+    status = pipeline.run(args.stages, force=args.force, jobs=args.jobs, dry_run=args.dry_run)
+
+    counts = {}
+    for result in status.values():
+        counts[result] = counts.get(result, 0) + 1
+    logger.info("Pipeline finished: " + ', '.join(f"{k}={v}" for k, v in sorted(counts.items())))
+
+    if counts.get('failed') or counts.get('blocked'):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+"""
+Shared helpers for the preprocessing scripts.
+
+The scripts are not installed as a package, so each script adds the ``src``
+directory to ``sys.path`` before importing from ``common``.
+"""
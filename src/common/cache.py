@@ -0,0 +1,269 @@
+"""
+Content-addressed cache for deterministic file conversions.
+
+Conversions such as NetCDF -> CSV (src/fuel/nc_to_csv.py), GPW TIF -> CSV
+(src/population/tif_to_csv.py) and VOD NetCDF -> daily CSV (kye/Depth.py)
+depend only on their source files, the conversion code and its parameters.
+``ConversionCache`` keys each result by
+
+    sha256(stage, version, params, source file hashes)
+
+and stores the produced CSV as a Parquet file under the cache directory. On a
+rerun with the same key the CSV is rewritten from the cache (byte-identical,
+streamed in record batches) instead of being recomputed.
+
+- Source hashes are sha256 of the file contents, memoized by (size, mtime) in
+  ``source_hashes.json``; with ``fast_key=True`` the (path, size, mtime) tuple
+  is used directly without reading the file.
+- The cache is bounded by ``max_bytes``; entries are evicted least recently
+  used first (a hit refreshes the entry's mtime).
+- Hits/misses and bytes restored/stored are counted per stage; ``report()``
+  summarizes them and callers can copy ``last_status`` into metrics records.
+
+Configure from argparse with ``add_cache_arguments`` / ``cache_from_args`` or
+the PREPROCESS_CACHE_DIR / PREPROCESS_CACHE_MAX_GB environment variables.
+"""
+
+import hashlib
+import json
+import os
+import uuid
+
+ENV_CACHE_DIR = 'PREPROCESS_CACHE_DIR'
+ENV_CACHE_MAX_GB = 'PREPROCESS_CACHE_MAX_GB'
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '.cache', 'conversions')
+DEFAULT_MAX_GB = 20.0
+
+ENTRY_SUFFIX = '.parquet'
+HASH_BLOCK_SIZE = 8 * 1024 * 1024
+CSV_BLOCK_SIZE = 64 * 1024 * 1024
+
+class ConversionCache:
+    """
+    LRU-bounded cache of conversion outputs.
+
+    :param cache_dir: directory holding the Parquet entries
+    :param max_bytes: total entry size above which the oldest entries are evicted
+    :param fast_key: key sources by (path, size, mtime) instead of content hash
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=int(DEFAULT_MAX_GB * 1024 ** 3), fast_key=False):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        self.fast_key = fast_key
+        self.stats = {}
+        self.last_status = None
+        self._hashes_file = os.path.join(self.cache_dir, 'source_hashes.json')
+        self._hashes = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _stage_stats(self, stage):
+        return self.stats.setdefault(stage, {'hits': 0, 'misses': 0, 'bytes_restored': 0, 'bytes_stored': 0})
+
+    def source_hash(self, path):
+        """Content hash of a source file (or its stat tuple with fast_key)."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        stat_key = f"{st.st_size}:{st.st_mtime_ns}"
+        if self.fast_key:
+            return f"{path}:{stat_key}"
+
+        if self._hashes is None:
+            try:
+                with open(self._hashes_file, encoding='utf-8') as f:
+                    self._hashes = json.load(f)
+            except (OSError, ValueError):
+                self._hashes = {}
+        cached = self._hashes.get(path)
+        if cached and cached[0] == stat_key:
+            return cached[1]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+        value = digest.hexdigest()
+        self._hashes[path] = [stat_key, value]
+        self._atomic_write_json(self._hashes_file, self._hashes)
+        return value
+
+    def make_key(self, stage, version, sources, params=None):
+        """
+        Cache key of one conversion.
+
+        :param stage: conversion name (e.g. 'nc_to_csv')
+        :param version: conversion code version; bump it when the output format changes
+        :param sources: source file paths
+        :param params: JSON-serializable parameters that affect the output
+        """
+        payload = {
+            'stage': stage,
+            'version': version,
+            'params': params or {},
+            'sources': [self.source_hash(path) for path in sources],
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ENTRY_SUFFIX)
+
+    def restore_csv(self, key, output_path):
+        """
+        Writes the cached CSV for key to output_path.
+
+        :return: True on a hit, False when the key is not cached
+        """
+        import pyarrow.csv as pv
+        import pyarrow.parquet as pq
+
+        entry = self.entry_path(key)
+        if not os.path.exists(entry):
+            return False
+
+        parquet_file = pq.ParquetFile(entry)
+        meta = parquet_file.schema_arrow.metadata or {}
+        header = meta.get(b'csv_header', b'').decode('utf-8')
+        eol = meta.get(b'csv_eol', b'\n').decode('utf-8')
+
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        tmp_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
+        options = pv.WriteOptions(include_header=False, quoting_style='none', eol=eol)
+        with open(tmp_path, 'wb') as sink:
+            sink.write((header + eol).encode('utf-8'))
+            with pv.CSVWriter(sink, parquet_file.schema_arrow, write_options=options) as writer:
+                for batch in parquet_file.iter_batches():
+                    writer.write_batch(batch)
+        os.replace(tmp_path, output_path)
+
+        # LRU: 적중한 항목의 수정 시각을 갱신
+        os.utime(entry)
+        return True
+
+    def store_csv(self, key, csv_path):
+        """Stores a produced CSV under key as Parquet (values kept as text) and evicts old entries."""
+        import pyarrow as pa
+        import pyarrow.csv as pv
+        import pyarrow.parquet as pq
+
+        with open(csv_path, 'rb') as f:
+            first_line = f.readline()
+        eol = '\r\n' if first_line.endswith(b'\r\n') else '\n'
+        header = first_line.decode('utf-8').rstrip('\r\n')
+        columns = header.split(',')
+
+        entry = self.entry_path(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        tmp_path = f"{entry}.{uuid.uuid4().hex}.tmp"
+
+        # 모든 열을 문자열로 읽어 복원 시 원본 CSV와 같은 바이트가 되도록 함
+        schema = pa.schema([(name, pa.string()) for name in columns],
+                           metadata={'csv_header': header, 'csv_eol': eol})
+        reader = pv.open_csv(
+            csv_path,
+            read_options=pv.ReadOptions(block_size=CSV_BLOCK_SIZE),
+            convert_options=pv.ConvertOptions(column_types=schema, strings_can_be_null=False)
+        )
+        with pq.ParquetWriter(tmp_path, schema, compression='zstd') as writer:
+            for batch in reader:
+                writer.write_table(pa.Table.from_batches([batch]).cast(schema))
+        os.replace(tmp_path, entry)
+
+        self.evict(keep=key)
+        return os.path.getsize(entry)
+
+    def cached_csv(self, stage, version, sources, params, output_path, produce):
+        """
+        Returns output_path from the cache, or calls produce() and caches the CSV it writes.
+
+        :param produce: callable that writes output_path; returns None when nothing was written
+        :return: (output_path or None, hit)
+        """
+        stats = self._stage_stats(stage)
+        key = self.make_key(stage, version, sources, params)
+        if self.restore_csv(key, output_path):
+            stats['hits'] += 1
+            stats['bytes_restored'] += os.path.getsize(output_path)
+            self.last_status = 'hit'
+            return output_path, True
+
+        stats['misses'] += 1
+        self.last_status = 'miss'
+        result = produce()
+        if result is not None and os.path.exists(output_path):
+            stats['bytes_stored'] += self.store_csv(key, output_path)
+            return output_path, False
+        return None, False
+
+    def entries(self):
+        """(mtime, size, path) of every cache entry."""
+        found = []
+        for dirpath, _, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                if filename.endswith(ENTRY_SUFFIX):
+                    path = os.path.join(dirpath, filename)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    found.append((st.st_mtime, st.st_size, path))
+        return found
+
+    def evict(self, keep=None):
+        """Deletes least recently used entries until the cache fits in max_bytes."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        keep_path = self.entry_path(keep) if keep else None
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep_path:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def report(self):
+        """One summary line per stage with hit/miss counts."""
+        lines = []
+        for stage, s in sorted(self.stats.items()):
+            total = s['hits'] + s['misses']
+            rate = s['hits'] / total * 100 if total else 0.0
+            lines.append(f"cache[{stage}]: {s['hits']} hits, {s['misses']} misses ({rate:.1f}% hit), "
+                         f"restored {s['bytes_restored'] / 1024 ** 2:.1f} MB, stored {s['bytes_stored'] / 1024 ** 2:.1f} MB")
+        return lines
+
+    def _atomic_write_json(self, path, data):
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+def add_cache_arguments(parser):
+    """Adds --cache-dir, --cache-max-gb, --cache-fast-key and --no-cache options to an argparse parser."""
+    parser.add_argument('--cache-dir', type=str, default=os.environ.get(ENV_CACHE_DIR, DEFAULT_CACHE_DIR),
+                        help=f'변환 결과 캐시 디렉토리(기본값: 환경 변수 {ENV_CACHE_DIR} 또는 .cache/conversions)')
+    parser.add_argument('--cache-max-gb', type=float,
+                        default=float(os.environ.get(ENV_CACHE_MAX_GB, DEFAULT_MAX_GB)),
+                        help=f'캐시 최대 크기(GB), 초과 시 오래 사용하지 않은 항목부터 삭제(기본값: {DEFAULT_MAX_GB:g})')
+    parser.add_argument('--cache-fast-key', action='store_true',
+                        help='원본 파일 내용 해시 대신 (경로, 크기, 수정 시각)으로 캐시 키 계산')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='변환 결과 캐시 사용 안 함')
+    return parser
+
+def cache_from_args(args):
+    """Returns the ConversionCache selected by the cache options, or None with --no-cache."""
+    if getattr(args, 'no_cache', False):
+        return None
+    return ConversionCache(
+        args.cache_dir,
+        max_bytes=int(args.cache_max_gb * 1024 ** 3),
+        fast_key=getattr(args, 'cache_fast_key', False)
+    )
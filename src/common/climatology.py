@@ -0,0 +1,203 @@
+"""
+Per-grid day-of-year climatology and anomaly transform.
+
+Anomalies (how hot or dry a day is compared to normal for that cell and
+season) need a mean and standard deviation per (day of year, grid). A pandas
+groupby over (grid_id, dayofyear) on decades of long weather rows is slow and
+holds the whole table in memory. ``Climatology`` instead keeps Welford
+accumulators (count, mean, M2) as dense (variable x 366 x grid) arrays and
+folds (day x grid) blocks into them one day slot at a time, so daily data is
+streamed once (e.g. chunk by chunk from a ``GridCube``).
+
+Days map to 366 slots by calendar day: slot 59 is Feb 29, and days after
+Feb 28 of non-leap years skip it, so Mar 1 is always slot 60. Feb 29 therefore
+has about a quarter of the samples of other slots; a smoothing window fixes
+that. With ``window`` > 1 the statistics of each slot are pooled over the
+``window`` slots centred on it (wrapping around the year end), weighted by
+count, which is the same as computing them over all those days directly.
+
+The accumulators are saved with ``save``/``load`` (``.npz``) so the
+climatology can be extended with new days later; ``anomaly`` converts
+arbitrary (date, grid_id, value) batches to anomalies or z-scores with one
+gather.
+"""
+
+import numpy as np
+import pandas as pd
+
+N_SLOTS = 366
+FEB29_SLOT = 59
+
+def _to_dates(dates):
+    """Converts dates (strings, datetime64, pandas Series) to datetime64[D]."""
+    if isinstance(dates, pd.Series):
+        dates = dates.values
+    dates = np.asarray(dates)
+    if not np.issubdtype(dates.dtype, np.datetime64):
+        dates = pd.to_datetime(dates).values
+    return dates.astype('datetime64[D]')
+
+def day_slots(dates):
+    """
+    Maps dates to day-of-year slots 0..365 (Feb 29 = 59, Mar 1 = 60 in every year).
+
+    :return: int64 array
+    """
+    dates = _to_dates(dates)
+    years = dates.astype('datetime64[Y]')
+    doy = (dates - years.astype('datetime64[D]')).astype(np.int64)
+    year = years.astype(np.int64) + 1970
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    return doy + ((~leap) & (doy >= FEB29_SLOT))
+
+def _window_sum(values, window):
+    """Circular moving sum over the slot axis (axis 0) of a centred odd window."""
+    half = window // 2
+    extended = np.concatenate([values[N_SLOTS - half:], values, values[:half]])
+    csum = np.zeros((len(extended) + 1,) + values.shape[1:], dtype=np.float64)
+    np.cumsum(extended, axis=0, out=csum[1:])
+    return csum[window:window + N_SLOTS] - csum[:N_SLOTS]
+
+class Climatology:
+    """
+    Welford day-of-year statistics for every (variable, slot, grid).
+
+    :param variables: variable names
+    :param grid_ids: grid_id for each dense grid index (same order as the source cube)
+    :param window: default smoothing window in days (1 = none, even values are rounded up to odd)
+    """
+
+    def __init__(self, variables, grid_ids, window=1):
+        self.variables = list(variables)
+        self.grid_ids = np.asarray(grid_ids, dtype=np.int64)
+        self.window = int(window)
+        self._grid_order = np.argsort(self.grid_ids, kind='stable')
+        shape = (len(self.variables), N_SLOTS, len(self.grid_ids))
+        self.count = np.zeros(shape, dtype=np.int32)
+        self.mean = np.zeros(shape, dtype=np.float64)
+        self.m2 = np.zeros(shape, dtype=np.float64)
+        # 누적된 날짜 범위(update 호출자가 기록)
+        self.start_date = None
+        self.end_date = None
+        self._stats = {}
+
+    @property
+    def n_grids(self):
+        return len(self.grid_ids)
+
+    def _var_index(self, var):
+        if var not in self.variables:
+            raise KeyError(f"Unknown climatology variable: {var}")
+        return self.variables.index(var)
+
+    def update(self, var, dates, values):
+        """
+        Adds a (day x grid) block of one variable; NaN values are skipped.
+
+        :param dates: date of every row of values (any order, repeats allowed)
+        :param values: (day x grid) array with columns in grid_ids order
+        """
+        v = self._var_index(var)
+        slots = day_slots(dates)
+        values = np.asarray(values, dtype=np.float64)
+        if values.shape != (len(slots), self.n_grids):
+            raise ValueError(f"values must have shape {(len(slots), self.n_grids)}, got {values.shape}")
+
+        # 같은 슬롯이 두 번 이상 나오면 gather/scatter가 겹치므로 슬롯이 서로 다른 행 묶음으로 나눠 처리
+        remaining = np.arange(len(slots))
+        while len(remaining):
+            _, first = np.unique(slots[remaining], return_index=True)
+            rows = remaining[first]
+            self._add(v, slots[rows], values[rows])
+            remaining = np.delete(remaining, first)
+        self._stats = {}
+
+    def _add(self, v, slots, x):
+        """One Welford step for rows with distinct slots."""
+        valid = ~np.isnan(x)
+        count = self.count[v, slots] + valid
+        mean = self.mean[v, slots]
+        # 결측은 delta = 0이 되도록 현재 평균으로 채움
+        delta = np.where(valid, x, mean) - mean
+        new_mean = mean + delta / np.maximum(count, 1)
+        self.m2[v, slots] += delta * (np.where(valid, x, new_mean) - new_mean)
+        self.mean[v, slots] = new_mean
+        self.count[v, slots] = count
+
+    def stats(self, var, window=None, min_count=2):
+        """
+        Mean and standard deviation (ddof=1) per (slot, grid), pooled over the smoothing window.
+
+        :param window: smoothing window in days (default: self.window)
+        :param min_count: slots with fewer samples are NaN
+        :return: (mean, std, count) arrays of shape (366, n_grids)
+        """
+        window = self.window if window is None else int(window)
+        window = max(window, 1) | 1
+        key = (var, window, min_count)
+        if key in self._stats:
+            return self._stats[key]
+
+        v = self._var_index(var)
+        count, mean, m2 = self.count[v], self.mean[v], self.m2[v]
+        if window > 1:
+            # 창 안의 (개수, 합, 제곱합)을 합쳐 창 전체의 평균/분산을 계산
+            total = _window_sum(count, window)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                pooled_mean = _window_sum(count * mean, window) / total
+            pooled_m2 = _window_sum(m2 + count * mean * mean, window) - total * pooled_mean * pooled_mean
+            count, mean, m2 = total, pooled_mean, np.maximum(pooled_m2, 0.0)
+
+        enough = count >= max(min_count, 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            std = np.sqrt(m2 / (count - 1))
+        result = (np.where(enough, mean, np.nan), np.where(enough & (count > 1), std, np.nan), count)
+        self._stats[key] = result
+        return result
+
+    def grid_positions(self, grid_ids):
+        """Maps grid_ids to dense grid indices, -1 for unknown grids."""
+        grid_ids = np.asarray(grid_ids, dtype=np.int64)
+        sorted_ids = self.grid_ids[self._grid_order]
+        pos = np.minimum(np.searchsorted(sorted_ids, grid_ids), len(sorted_ids) - 1)
+        return np.where(sorted_ids[pos] == grid_ids, self._grid_order[pos], -1)
+
+    def anomaly(self, var, dates, grid_ids, values, zscore=False, window=None, min_count=2):
+        """
+        Converts values to anomalies (value - mean) or z-scores ((value - mean) / std).
+
+        :param dates, grid_ids, values: aligned 1-D arrays (e.g. columns of a long table)
+        :return: float32 array, NaN for unknown grids, thin slots or zero std
+        """
+        mean, std, _ = self.stats(var, window, min_count)
+        slots = day_slots(dates)
+        pos = self.grid_positions(grid_ids)
+        known = pos >= 0
+        safe = np.maximum(pos, 0)
+
+        result = np.asarray(values, dtype=np.float64) - mean[slots, safe]
+        if zscore:
+            scale = std[slots, safe]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result = np.where(scale > 0, result / scale, np.nan)
+        return np.where(known, result, np.nan).astype(np.float32)
+
+    def save(self, path):
+        """Saves the accumulators to path (.npz format, written to path as given)."""
+        with open(path, 'wb') as f:
+            np.savez(f, variables=np.array(self.variables), grid_ids=self.grid_ids, window=self.window,
+                     start_date=str(self.start_date), end_date=str(self.end_date),
+                     count=self.count, mean=self.mean, m2=self.m2)
+
+    @classmethod
+    def load(cls, path):
+        """Loads accumulators written by save()."""
+        with np.load(path) as saved:
+            clim = cls(saved['variables'].tolist(), saved['grid_ids'], int(saved['window']))
+            clim.count = saved['count']
+            clim.mean = saved['mean']
+            clim.m2 = saved['m2']
+            for name in ('start_date', 'end_date'):
+                value = str(saved[name])
+                setattr(clim, name, np.datetime64(value, 'D') if value != 'None' else None)
+        return clim
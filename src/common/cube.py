@@ -0,0 +1,267 @@
+"""
+Dense (variable x day x grid) cube storage for daily gridded data.
+
+A cube is a directory holding one raw float32 file per variable, each a
+C-ordered (day x grid) array, plus ``index.json``:
+
+    {
+      "format": "grid-cube",
+      "version": 1,
+      "dtype": "float32",
+      "variables": ["temperature", ...],
+      "start_date": "2000-01-01",
+      "n_days": 9132,
+      "grid_ids": [3123456, ...]
+    }
+
+Dense grid index ``i`` maps to ``grid_ids[i]`` and day offset ``d`` maps to
+``start_date + d``. Files are opened with ``np.memmap``, so reading one day's
+map or one grid cell's series touches only that slice, with no parsing.
+Storing each variable separately keeps the day axis outermost, so new days are
+appended to the end of every file without rewriting the cube.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+INDEX_FILE = 'index.json'
+CUBE_FORMAT = 'grid-cube'
+CUBE_VERSION = 1
+
+class GridCube:
+    """
+    Memory-mapped (variable x day x grid) cube.
+
+    :param path: cube directory
+    :param mode: 'r' (read-only) or 'r+' (read/write, allows append_days)
+    """
+
+    def __init__(self, path, mode='r'):
+        if mode not in ('r', 'r+'):
+            raise ValueError(f"Unsupported cube mode: {mode}")
+        self.path = str(path)
+        self.mode = mode
+        with open(os.path.join(self.path, INDEX_FILE), encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('format') != CUBE_FORMAT:
+            raise ValueError(f"{self.path} is not a grid cube")
+
+        self.variables = list(index['variables'])
+        self.dtype = np.dtype(index['dtype'])
+        self.start_date = np.datetime64(index['start_date'], 'D')
+        self.n_days = int(index['n_days'])
+        self.grid_ids = np.asarray(index['grid_ids'], dtype=np.int64)
+        self._grid_order = np.argsort(self.grid_ids, kind='stable')
+        self._arrays = {}
+
+    @classmethod
+    def create(cls, path, variables, grid_ids, start_date, n_days=0, fill_value=np.nan):
+        """
+        Creates an empty cube filled with fill_value and opens it in 'r+' mode.
+
+        :param variables: variable names
+        :param grid_ids: grid_id for each dense grid index
+        :param start_date: date of day offset 0
+        :param n_days: initial number of days
+        """
+        path = str(path)
+        os.makedirs(path, exist_ok=True)
+        grid_ids = [int(g) for g in grid_ids]
+        if len(set(grid_ids)) != len(grid_ids):
+            raise ValueError("grid_ids must be unique")
+
+        index = {
+            'format': CUBE_FORMAT,
+            'version': CUBE_VERSION,
+            'dtype': 'float32',
+            'variables': list(variables),
+            'start_date': str(np.datetime64(pd.Timestamp(start_date).date(), 'D')),
+            'n_days': 0,
+            'grid_ids': grid_ids,
+        }
+        for var in index['variables']:
+            open(os.path.join(path, f"{var}.f32"), 'wb').close()
+        with open(os.path.join(path, INDEX_FILE), 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+
+        cube = cls(path, mode='r+')
+        if n_days:
+            cube.append_days(n_days, fill_value)
+        return cube
+
+    @property
+    def n_grids(self):
+        return len(self.grid_ids)
+
+    @property
+    def shape(self):
+        return (len(self.variables), self.n_days, self.n_grids)
+
+    @property
+    def end_date(self):
+        """Last date in the cube (start_date - 1 day when empty)."""
+        return self.start_date + np.timedelta64(self.n_days - 1, 'D')
+
+    @property
+    def dates(self):
+        return self.start_date + np.arange(self.n_days).astype('timedelta64[D]')
+
+    def variable_path(self, var):
+        """Path of the raw (day x grid) file of one variable."""
+        return os.path.join(self.path, f"{var}.f32")
+
+    def array(self, var):
+        """Returns the (day x grid) memmap of one variable."""
+        if var not in self.variables:
+            raise KeyError(f"Unknown cube variable: {var}")
+        arr = self._arrays.get(var)
+        if arr is None:
+            if self.n_days == 0:
+                return np.empty((0, self.n_grids), dtype=self.dtype)
+            arr = np.memmap(self.variable_path(var), dtype=self.dtype, mode=self.mode,
+                            shape=(self.n_days, self.n_grids))
+            self._arrays[var] = arr
+        return arr
+
+    def grid_positions(self, grid_ids, strict=True):
+        """
+        Maps grid_ids to dense grid indices.
+
+        :param strict: raise KeyError for unknown grid_ids; otherwise return -1 for them
+        """
+        grid_ids = np.asarray(grid_ids, dtype=np.int64)
+        sorted_ids = self.grid_ids[self._grid_order]
+        pos = np.minimum(np.searchsorted(sorted_ids, grid_ids), len(sorted_ids) - 1)
+        found = sorted_ids[pos] == grid_ids
+        if strict and not found.all():
+            raise KeyError(f"grid_id not in cube: {grid_ids[~found][:5].tolist()}")
+        return np.where(found, self._grid_order[pos], -1)
+
+    def day_offsets(self, dates):
+        """Maps dates to day offsets from start_date (may be out of range)."""
+        if isinstance(dates, pd.Series):
+            dates = dates.values
+        dates = np.asarray(dates)
+        if not np.issubdtype(dates.dtype, np.datetime64):
+            dates = pd.to_datetime(dates).values
+        return (dates.astype('datetime64[D]') - self.start_date).astype(np.int64)
+
+    def _day_offset(self, date):
+        offset = int(self.day_offsets([date])[0])
+        if not 0 <= offset < self.n_days:
+            raise KeyError(f"Date {date} is outside the cube ({self.start_date} ~ {self.end_date})")
+        return offset
+
+    def read_day(self, date, variables=None):
+        """Returns a (variable x grid) array for one date."""
+        offset = self._day_offset(date)
+        variables = variables or self.variables
+        return np.stack([np.asarray(self.array(v)[offset]) for v in variables])
+
+    def read_grid(self, grid_id, variables=None, start_date=None, end_date=None):
+        """Returns a (variable x day) time series for one grid cell."""
+        pos = int(self.grid_positions([grid_id])[0])
+        d0 = self._day_offset(start_date) if start_date is not None else 0
+        d1 = self._day_offset(end_date) + 1 if end_date is not None else self.n_days
+        variables = variables or self.variables
+        return np.stack([np.asarray(self.array(v)[d0:d1, pos]) for v in variables])
+
+    def read_window(self, var, start_date=None, end_date=None):
+        """Returns the (day x grid) slice of one variable between two dates (inclusive)."""
+        d0 = self._day_offset(start_date) if start_date is not None else 0
+        d1 = self._day_offset(end_date) + 1 if end_date is not None else self.n_days
+        return self.array(var)[d0:d1]
+
+    def append_days(self, n_days, fill_value=np.nan):
+        """
+        Extends every variable by n_days filled with fill_value and updates the index.
+
+        :return: day offset of the first appended day
+        """
+        if self.mode != 'r+':
+            raise PermissionError("Cube is opened read-only")
+        first = self.n_days
+        if n_days <= 0:
+            return first
+
+        self.flush()
+        self._arrays = {}
+        block = np.full((n_days, self.n_grids), fill_value, dtype=self.dtype)
+        for var in self.variables:
+            with open(self.variable_path(var), 'ab') as f:
+                block.tofile(f)
+
+        self.n_days += n_days
+        self._write_index()
+        return first
+
+    def extend_to(self, end_date, fill_value=np.nan):
+        """Appends days until end_date is inside the cube."""
+        missing = int(self.day_offsets([end_date])[0]) + 1 - self.n_days
+        if missing > 0:
+            self.append_days(missing, fill_value)
+
+    def write_frame(self, df, date_col, variables=None, grid_col='grid_id'):
+        """
+        Scatters a long (date, grid_id, variables...) table into the cube.
+
+        Rows outside the cube's date range or grid index are skipped.
+
+        :return: number of rows written
+        """
+        if self.mode != 'r+':
+            raise PermissionError("Cube is opened read-only")
+        days = self.day_offsets(df[date_col])
+        grids = self.grid_positions(df[grid_col].values, strict=False)
+        valid = (days >= 0) & (days < self.n_days) & (grids >= 0)
+        days, grids = days[valid], grids[valid]
+
+        for var in (variables or [v for v in self.variables if v in df.columns]):
+            self.array(var)[days, grids] = df[var].values[valid].astype(self.dtype)
+        return int(valid.sum())
+
+    def to_frame(self, start_date=None, end_date=None, variables=None, dropna=True):
+        """Converts a date range back to a long (date, grid_id, variables...) DataFrame."""
+        d0 = self._day_offset(start_date) if start_date is not None else 0
+        d1 = self._day_offset(end_date) + 1 if end_date is not None else self.n_days
+        variables = variables or self.variables
+
+        df = pd.DataFrame({
+            'date': np.repeat(self.dates[d0:d1], self.n_grids),
+            'grid_id': np.tile(self.grid_ids, d1 - d0),
+        })
+        for var in variables:
+            df[var] = np.asarray(self.array(var)[d0:d1]).ravel()
+        if dropna:
+            df = df.dropna(subset=variables, how='all').reset_index(drop=True)
+        return df
+
+    def flush(self):
+        for arr in self._arrays.values():
+            if isinstance(arr, np.memmap):
+                arr.flush()
+
+    def _write_index(self):
+        index = {
+            'format': CUBE_FORMAT,
+            'version': CUBE_VERSION,
+            'dtype': self.dtype.name,
+            'variables': self.variables,
+            'start_date': str(self.start_date),
+            'n_days': self.n_days,
+            'grid_ids': self.grid_ids.tolist(),
+        }
+        tmp = os.path.join(self.path, INDEX_FILE + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp, os.path.join(self.path, INDEX_FILE))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+        self._arrays = {}
@@ -0,0 +1,313 @@
+"""
+0.1-degree grid helpers shared by the preprocessing scripts.
+
+All datasets are keyed by the global grid ID
+
+    grid_id = (floor(lat * 10) + 900) * 3600 + (floor(lon * 10) + 1800)
+
+so neighbouring cells are pure index arithmetic: the cell to the north is
+``grid_id + 3600`` and the cell to the east is ``grid_id + 1``. ``GridRaster``
+maps per-grid vectors onto the dense lat x lon raster of a bounding box and
+back, which lets raster operations (convolutions, maps) run on whole days at
+once.
+
+``GridRegistry`` is the canonical list of target cells (the Korean land grids
+from sara/grid_address). Readers use it to drop ocean and out-of-country cells
+at read time instead of carrying the whole bounding box downstream.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+
+GRID_RESOLUTION = 0.1
+LAT_OFFSET = 900
+LON_OFFSET = 1800
+LON_CELLS = 3600
+
+# [서쪽 경도, 동쪽 경도, 남쪽 위도, 북쪽 위도]
+KOREA_EXTENT = [124, 132, 33, 39]
+
+def latlon_to_grid_id(lat, lon):
+    """Converts latitude/longitude (scalars or arrays) to grid IDs."""
+    lat_idx = np.floor(np.asarray(lat) * 10).astype(np.int64) + LAT_OFFSET
+    lon_idx = np.floor(np.asarray(lon) * 10).astype(np.int64) + LON_OFFSET
+    return lat_idx * LON_CELLS + lon_idx
+
+def grid_id_to_index(grid_id):
+    """Returns (lat_index, lon_index), i.e. floor(lat * 10) and floor(lon * 10)."""
+    grid_id = np.asarray(grid_id, dtype=np.int64)
+    return np.floor_divide(grid_id, LON_CELLS) - LAT_OFFSET, np.remainder(grid_id, LON_CELLS) - LON_OFFSET
+
+def grid_id_to_latlon(grid_id):
+    """Returns the (lat, lon) of grid cell centers."""
+    lat_idx, lon_idx = grid_id_to_index(grid_id)
+    return lat_idx * GRID_RESOLUTION + GRID_RESOLUTION / 2, lon_idx * GRID_RESOLUTION + GRID_RESOLUTION / 2
+
+EARTH_RADIUS_KM = 6371.0088
+# 기존 전처리(sara/lightning_density 등)에서 사용한 0.1° 셀 면적 근사값 (111 km × 0.1)²
+APPROX_CELL_AREA_KM2 = 123.21
+
+def cell_area_km2(grid_id):
+    """
+    Spherical area (km²) of 0.1-degree grid cells; shrinks with cos(latitude).
+
+        area = R² · Δλ · (sin φ_north − sin φ_south)
+    """
+    lat_idx, _ = grid_id_to_index(grid_id)
+    south = np.radians(lat_idx * GRID_RESOLUTION)
+    north = np.radians((lat_idx + 1) * GRID_RESOLUTION)
+    return EARTH_RADIUS_KM ** 2 * np.radians(GRID_RESOLUTION) * (np.sin(north) - np.sin(south))
+
+class GridRaster:
+    """
+    Dense lat x lon raster over a bounding box. Row 0 is the southernmost
+    cell row and column 0 the westernmost cell column.
+
+    :param extent: [west lon, east lon, south lat, north lat]
+    """
+
+    def __init__(self, extent=KOREA_EXTENT):
+        self.extent = list(extent)
+        self.lat0 = int(round(extent[2] * 10))
+        self.lon0 = int(round(extent[0] * 10))
+        self.shape = (int(round(extent[3] * 10)) - self.lat0, int(round(extent[1] * 10)) - self.lon0)
+
+    @property
+    def size(self):
+        return self.shape[0] * self.shape[1]
+
+    def raster_index(self, grid_ids):
+        """
+        Maps grid IDs to raster cells.
+
+        :return: (rows, cols, inside) where inside marks grid IDs within the extent
+        """
+        lat_idx, lon_idx = grid_id_to_index(grid_ids)
+        rows = lat_idx - self.lat0
+        cols = lon_idx - self.lon0
+        inside = (rows >= 0) & (rows < self.shape[0]) & (cols >= 0) & (cols < self.shape[1])
+        return rows, cols, inside
+
+    def flat_index(self, grid_ids):
+        """Maps grid IDs to flat raster positions (row * width + col), -1 outside the extent."""
+        rows, cols, inside = self.raster_index(grid_ids)
+        return np.where(inside, rows * self.shape[1] + cols, -1)
+
+    def grid_ids(self):
+        """Grid ID of every raster cell, shape (rows, cols)."""
+        rows, cols = np.indices(self.shape)
+        return (rows + self.lat0 + LAT_OFFSET) * LON_CELLS + (cols + self.lon0 + LON_OFFSET)
+
+    def cell_areas(self):
+        """Area (km²) of every raster cell, shape (rows, cols); shared per extent, read-only."""
+        return cell_area_table(self.extent)
+
+    def to_raster(self, values, grid_ids, fill_value=np.nan):
+        """
+        Scatters per-grid values onto the raster.
+
+        :param values: array of shape (..., n_grids)
+        :param grid_ids: grid ID of each value column
+        :return: array of shape (..., rows, cols); cells without a value get fill_value
+        """
+        values = np.asarray(values)
+        flat = self.flat_index(grid_ids)
+        inside = flat >= 0
+        dtype = np.result_type(values, fill_value)
+        raster = np.full(values.shape[:-1] + (self.size,), fill_value, dtype=dtype)
+        raster[..., flat[inside]] = values[..., inside]
+        return raster.reshape(values.shape[:-1] + self.shape)
+
+    def from_raster(self, raster, grid_ids, fill_value=np.nan):
+        """
+        Gathers raster cells back to per-grid vectors (inverse of to_raster).
+
+        :param raster: array of shape (..., rows, cols)
+        :return: array of shape (..., n_grids); grid IDs outside the extent get fill_value
+        """
+        raster = np.asarray(raster)
+        flat = self.flat_index(grid_ids)
+        inside = flat >= 0
+        values = raster.reshape(raster.shape[:-2] + (self.size,))[..., np.maximum(flat, 0)]
+        if not inside.all():
+            values = values.astype(np.result_type(values.dtype, np.float32))
+            values[..., ~inside] = fill_value
+        return values
+
+_cell_area_tables = {}
+
+def cell_area_table(extent=KOREA_EXTENT):
+    """
+    (rows, cols) raster of cell areas (km²) over an extent, computed once per
+    extent and cached. Index it with GridRaster.flat_index or use
+    lookup_cell_area for grid IDs.
+    """
+    key = tuple(float(v) for v in extent)
+    if key not in _cell_area_tables:
+        table = cell_area_km2(GridRaster(extent).grid_ids())
+        table.setflags(write=False)
+        _cell_area_tables[key] = table
+    return _cell_area_tables[key]
+
+def lookup_cell_area(grid_ids, extent=KOREA_EXTENT):
+    """Vectorized cell area (km²) of grid IDs from the cached table; computed directly outside the extent."""
+    grid_ids = np.asarray(grid_ids, dtype=np.int64)
+    flat = GridRaster(extent).flat_index(grid_ids)
+    areas = cell_area_table(extent).ravel()[np.maximum(flat, 0)]
+    outside = flat < 0
+    if outside.any():
+        areas = np.where(outside, cell_area_km2(grid_ids), areas)
+    return areas
+
+def area_weighted_aggregate(keys, values, grid_ids, how='mean', extent=KOREA_EXTENT):
+    """
+    Groups per-cell values by keys with cell-area weights. NaN values are skipped.
+
+    - mean: sum(value * area) / sum(area), e.g. a regional average of a density
+    - sum: sum(value * area), e.g. a density (per km²) turned into a total
+
+    :return: (unique keys, aggregated values)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    areas = lookup_cell_area(grid_ids, extent)
+    valid = ~np.isnan(values)
+    unique_keys, inverse = np.unique(np.asarray(keys), return_inverse=True)
+    weighted = np.bincount(inverse[valid], weights=values[valid] * areas[valid], minlength=len(unique_keys))
+    if how == 'sum':
+        return unique_keys, weighted
+    if how != 'mean':
+        raise ValueError(f"Unknown aggregation '{how}' (expected mean or sum)")
+    area_sum = np.bincount(inverse[valid], weights=areas[valid], minlength=len(unique_keys))
+    return unique_keys, np.divide(weighted, area_sum, out=np.full_like(weighted, np.nan), where=area_sum > 0)
+
+# 유효 그리드 목록(sara/grid_address 참고) 기본 경로와 경로 지정 환경 변수
+ENV_GRID_FILE = 'KOREA_GRID_FILE'
+DEFAULT_GRID_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..',
+                                 'sara', 'grid_address', 'korea_grids_with_jibun.parquet')
+
+_registry_cache = {}
+
+class GridRegistry:
+    """
+    Canonical set of target grid cells (the 4,275 Korean land grids).
+
+    Membership and dense-index lookups go through a lookup table over the
+    GridRaster of the extent, so each lookup is O(1) per grid ID with no
+    hashing or sorting.
+
+    :param grid_ids: valid grid IDs
+    :param lat, lon: optional cell-center coordinates aligned with grid_ids
+    :param jibun: optional jibun address per grid (attribute only)
+    :param extent: raster extent that must contain every grid
+    """
+
+    def __init__(self, grid_ids, lat=None, lon=None, jibun=None, extent=KOREA_EXTENT):
+        grid_ids = np.asarray(grid_ids, dtype=np.int64)
+        order = np.argsort(grid_ids, kind='stable')
+        self.grid_ids = grid_ids[order]
+        if len(np.unique(self.grid_ids)) != len(self.grid_ids):
+            raise ValueError("Registry grid_ids must be unique")
+
+        if lat is None or lon is None:
+            lat, lon = grid_id_to_latlon(self.grid_ids)
+        else:
+            lat, lon = np.asarray(lat)[order], np.asarray(lon)[order]
+        self.lat = lat
+        self.lon = lon
+        self.jibun = None if jibun is None else np.asarray(jibun, dtype=object)[order]
+
+        self.raster = GridRaster(extent)
+        flat = self.raster.flat_index(self.grid_ids)
+        if (flat < 0).any():
+            raise ValueError(f"{int((flat < 0).sum())} registry grid_ids are outside the extent {extent}")
+        self._lookup = np.full(self.raster.size, -1, dtype=np.int32)
+        self._lookup[flat] = np.arange(len(self.grid_ids), dtype=np.int32)
+
+    @classmethod
+    def from_file(cls, path, with_jibun=False, extent=KOREA_EXTENT):
+        """Loads a registry from a CSV/Parquet file with grid_id (and optionally lat, lon, jibun) columns."""
+        import pandas as pd
+
+        if str(path).lower().endswith('.parquet'):
+            df = pd.read_parquet(path)
+        else:
+            df = pd.read_csv(path)
+        lat = df['lat'].values if 'lat' in df.columns else None
+        lon = df['lon'].values if 'lon' in df.columns else None
+        jibun = df['jibun'].values if with_jibun and 'jibun' in df.columns else None
+        return cls(df['grid_id'].values, lat, lon, jibun, extent)
+
+    def __len__(self):
+        return len(self.grid_ids)
+
+    @property
+    def mask(self):
+        """Boolean (rows x cols) raster of valid cells."""
+        return (self._lookup >= 0).reshape(self.raster.shape)
+
+    @property
+    def bounds(self):
+        """[west, east, south, north] of the valid cells' outer edges."""
+        half = GRID_RESOLUTION / 2
+        return [float(self.lon.min() - half), float(self.lon.max() + half),
+                float(self.lat.min() - half), float(self.lat.max() + half)]
+
+    @property
+    def fingerprint(self):
+        """sha256 of the sorted grid IDs, for cache keys of registry-filtered outputs."""
+        return hashlib.sha256(np.ascontiguousarray(self.grid_ids, dtype=np.int64).tobytes()).hexdigest()
+
+    def dense_index(self, grid_ids):
+        """Maps grid IDs to positions in self.grid_ids, -1 for cells not in the registry."""
+        flat = self.raster.flat_index(grid_ids)
+        return np.where(flat >= 0, self._lookup[np.maximum(flat, 0)], -1).astype(np.int64)
+
+    def contains(self, grid_ids):
+        """Vectorized membership test for grid IDs."""
+        return self.dense_index(grid_ids) >= 0
+
+    def contains_latlon(self, lat, lon):
+        """Vectorized membership test for latitude/longitude points."""
+        return self.contains(latlon_to_grid_id(lat, lon))
+
+    def filter_frame(self, df, grid_col='grid_id'):
+        """Returns the rows of df whose grid_col is in the registry."""
+        return df[self.contains(df[grid_col].values)]
+
+def load_registry(path=None, with_jibun=False):
+    """
+    Loads the grid registry once per (path, with_jibun) and caches it.
+
+    The path defaults to $KOREA_GRID_FILE, then to
+    sara/grid_address/korea_grids_with_jibun.parquet. Returns None when the file
+    does not exist so callers can fall back to keeping every cell.
+    """
+    path = path or os.environ.get(ENV_GRID_FILE) or DEFAULT_GRID_FILE
+    path = os.path.abspath(path)
+    if not os.path.exists(path):
+        return None
+
+    key = (path, with_jibun)
+    if key not in _registry_cache:
+        _registry_cache[key] = GridRegistry.from_file(path, with_jibun=with_jibun)
+    return _registry_cache[key]
+
+def add_grid_arguments(parser):
+    """Adds --grid-file and --all-cells options to an argparse parser."""
+    parser.add_argument('--grid-file', type=str, default=None,
+                        help=f'유효 그리드 목록 파일(기본값: 환경 변수 {ENV_GRID_FILE} 또는 '
+                             'sara/grid_address/korea_grids_with_jibun.parquet)')
+    parser.add_argument('--all-cells', action='store_true',
+                        help='유효 그리드 필터링 없이 범위 내 모든 셀 유지')
+    return parser
+
+def registry_from_args(args):
+    """Returns the registry selected by --grid-file/--all-cells, or None to keep every cell."""
+    if getattr(args, 'all_cells', False):
+        return None
+    registry = load_registry(getattr(args, 'grid_file', None))
+    if registry is None and getattr(args, 'grid_file', None):
+        raise FileNotFoundError(f"Grid file not found: {args.grid_file}")
+    return registry
@@ -0,0 +1,229 @@
+"""
+Stage-level metrics for the preprocessing scripts.
+
+Scripts wrap their load/transform/write phases with ``stage()`` (or the
+``instrument()`` decorator). When metrics are enabled, every stage appends one
+JSON line to the run log with wall time, CPU time, peak RSS, rows in/out and
+bytes read/written. A cProfile dump of the whole run can be written as well.
+When metrics are disabled (the default), ``stage()`` yields a shared no-op
+record and does no timing or I/O.
+
+Enable from a script's argparse options (``add_metrics_arguments`` /
+``configure_from_args``) or with environment variables:
+
+- PREPROCESS_METRICS_LOG: JSON-lines run log path
+- PREPROCESS_PROFILE: cProfile output path (.prof, readable by pstats/snakeviz)
+"""
+
+import atexit
+import cProfile
+import functools
+import json
+import os
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+ENV_METRICS_LOG = 'PREPROCESS_METRICS_LOG'
+ENV_PROFILE = 'PREPROCESS_PROFILE'
+
+_config = None
+
+class StageRecord:
+    """Counters for one stage. Scripts fill rows/bytes while the stage runs."""
+
+    __slots__ = ('rows_in', 'rows_out', 'bytes_read', 'bytes_written', 'extra')
+
+    def __init__(self, rows_in=None):
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.extra = {}
+
+    def add_input_file(self, path):
+        """Adds the size of a file read by the stage to bytes_read."""
+        self.bytes_read += _file_size(path)
+
+    def add_output_file(self, path):
+        """Adds the size of a file written by the stage to bytes_written."""
+        self.bytes_written += _file_size(path)
+
+class _NullStageRecord:
+    """No-op record used when metrics are disabled."""
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        pass
+
+    def __getattr__(self, name):
+        return None
+
+    def add_input_file(self, path):
+        pass
+
+    def add_output_file(self, path):
+        pass
+
+    @property
+    def extra(self):
+        return {}
+
+_NULL_RECORD = _NullStageRecord()
+
+class _MetricsConfig:
+    def __init__(self, log_path, profile_path, script):
+        self.log_path = log_path
+        self.profile_path = profile_path
+        self.script = script
+        self.run_id = uuid.uuid4().hex[:12]
+        self.profiler = None
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def _peak_rss_mb():
+    """Peak resident set size of this process in MB (high-water mark so far)."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS reports bytes
+        return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 1024 ** 2
+
+def configure(log_path=None, profile_path=None, script=None):
+    """
+    Enables metrics collection. With neither path set, metrics stay disabled.
+
+    :param log_path: JSON-lines run log; records are appended
+    :param profile_path: cProfile stats file written when the process exits
+    :param script: name recorded with every stage (defaults to the script file name)
+    """
+    global _config
+
+    if not log_path and not profile_path:
+        _config = None
+        return
+
+    _config = _MetricsConfig(
+        log_path,
+        profile_path,
+        script or os.path.splitext(os.path.basename(sys.argv[0]))[0],
+    )
+
+    if log_path:
+        log_dir = os.path.dirname(log_path)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+
+    if profile_path:
+        _config.profiler = cProfile.Profile()
+        _config.profiler.enable()
+        atexit.register(_dump_profile, _config)
+
+def _dump_profile(config):
+    config.profiler.disable()
+    profile_dir = os.path.dirname(config.profile_path)
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+    config.profiler.dump_stats(config.profile_path)
+
+def enabled():
+    """Returns True when stage records are written to a run log."""
+    return _config is not None and bool(_config.log_path)
+
+def add_metrics_arguments(parser):
+    """Adds --metrics-log and --profile options to an argparse parser."""
+    parser.add_argument('--metrics-log', type=str, default=os.environ.get(ENV_METRICS_LOG),
+                        help='단계별 실행 지표를 JSON lines로 기록할 파일 경로')
+    parser.add_argument('--profile', type=str, default=os.environ.get(ENV_PROFILE),
+                        help='전체 실행의 cProfile 결과(.prof)를 저장할 파일 경로')
+    return parser
+
+def configure_from_args(args, script=None):
+    """Configures metrics from parsed --metrics-log/--profile options."""
+    configure(getattr(args, 'metrics_log', None), getattr(args, 'profile', None), script)
+
+def configure_from_env(script=None):
+    """Configures metrics from PREPROCESS_METRICS_LOG / PREPROCESS_PROFILE."""
+    configure(os.environ.get(ENV_METRICS_LOG), os.environ.get(ENV_PROFILE), script)
+
+@contextmanager
+def stage(name, rows_in=None, **fields):
+    """
+    Measures one pipeline stage.
+
+    Usage::
+
+        with metrics.stage('load') as st:
+            df = pd.read_csv(path)
+            st.add_input_file(path)
+            st.rows_out = len(df)
+
+    Extra keyword fields are written to the record as-is.
+    """
+    if not enabled():
+        yield _NULL_RECORD
+        return
+
+    record = StageRecord(rows_in)
+    started = datetime.now().isoformat(timespec='milliseconds')
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    status = 'ok'
+    try:
+        yield record
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        entry = {
+            'run_id': _config.run_id,
+            'script': _config.script,
+            'stage': name,
+            'status': status,
+            'start': started,
+            'wall_s': round(time.perf_counter() - wall_start, 6),
+            'cpu_s': round(time.process_time() - cpu_start, 6),
+            'peak_rss_mb': _peak_rss_mb(),
+            'rows_in': record.rows_in,
+            'rows_out': record.rows_out,
+            'bytes_read': record.bytes_read,
+            'bytes_written': record.bytes_written,
+        }
+        entry.update(fields)
+        entry.update(record.extra)
+        with open(_config.log_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, default=str) + '\n')
+
+def instrument(name=None):
+    """
+    Decorator form of ``stage()``. If the wrapped function returns an object
+    with a length (e.g. a DataFrame), it is recorded as rows_out.
+    """
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled():
+                return func(*args, **kwargs)
+            with stage(stage_name) as record:
+                result = func(*args, **kwargs)
+                if record.rows_out is None and hasattr(result, '__len__'):
+                    record.rows_out = len(result)
+                return result
+        return wrapper
+    return decorator
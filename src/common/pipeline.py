@@ -0,0 +1,398 @@
+"""
+Incremental DAG runner for the preprocessing pipeline.
+
+A pipeline is a list of stages, each declaring the artifacts (files or
+directories) it reads and writes. A stage runs either an importable function
+(``func = "src/fuel/nc_to_csv.py:convert_nc_directory"`` called with
+``params``) or a script's command line (``script`` + ``args``) in a
+subprocess.
+
+Dependencies are inferred from artifacts: a stage depends on every stage that
+writes one of its inputs (or a parent/child path of one), plus any stage listed
+in ``after``. Before a stage runs, its fingerprint is computed from:
+
+- the stage definition (function/script, params/args, declared artifacts)
+- the source file of the function/script
+- the shared modules in src/common that stages import (not this runner)
+- the content hash of every input artifact
+
+A stage whose fingerprint matches the last successful run and whose outputs
+all exist is skipped. File content hashes are cached in the state file keyed by
+(size, mtime), so unchanged inputs are not re-read. Independent stages run in
+parallel in a process pool.
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+STATE_VERSION = 1
+HASH_BLOCK_SIZE = 8 * 1024 * 1024
+SHARED_SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class Stage:
+    """
+    One pipeline stage.
+
+    :param name: unique stage name
+    :param func: 'path/to/module.py:function' (relative to the pipeline root)
+    :param params: keyword arguments for func
+    :param script: 'path/to/script.py' run as ``python script *args``
+    :param args: command-line arguments for script
+    :param inputs: artifact paths read by the stage
+    :param outputs: artifact paths written by the stage
+    :param after: names of stages that must run first (in addition to artifact dependencies)
+    :param group: label used for selection (download, convert, grid, aggregate, join, ...)
+    :param manual: only run when selected explicitly (e.g. network downloads)
+    """
+
+    def __init__(self, name, func=None, params=None, script=None, args=None, inputs=(), outputs=(),
+                 after=(), group=None, manual=False):
+        if (func is None) == (script is None):
+            raise ValueError(f"Stage '{name}' must define exactly one of func or script")
+        self.name = name
+        self.func = func
+        self.params = dict(params or {})
+        self.script = script
+        self.args = [str(a) for a in (args or [])]
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.after = list(after)
+        self.group = group
+        self.manual = manual
+
+    def definition(self):
+        return {
+            'func': self.func,
+            'params': self.params,
+            'script': self.script,
+            'args': self.args,
+            'inputs': self.inputs,
+            'outputs': self.outputs,
+        }
+
+    def source_file(self):
+        return self.func.split(':', 1)[0] if self.func else self.script
+
+def _is_within(path, other):
+    """True when path equals other or one contains the other."""
+    try:
+        common = os.path.commonpath([path, other])
+    except ValueError:
+        return False
+    return common == path or common == other
+
+def _run_stage(root, func, params, script, args):
+    """Runs one stage; executed in a worker process."""
+    if func:
+        module_path, func_name = func.split(':', 1)
+        module_path = os.path.join(root, module_path)
+        module_dir = os.path.dirname(module_path)
+        if module_dir not in sys.path:
+            sys.path.insert(0, module_dir)
+        module_name = '_pipeline_' + os.path.splitext(os.path.basename(module_path))[0]
+        spec = importlib.util.spec_from_file_location(module_name, module_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        getattr(module, func_name)(**params)
+    else:
+        subprocess.run([sys.executable, os.path.join(root, script)] + list(args), check=True, cwd=root)
+
+class Pipeline:
+    """
+    Stage graph with persistent fingerprints.
+
+    :param stages: list of Stage
+    :param root: directory that relative artifact/source paths are resolved against
+    :param state_file: JSON file holding stage fingerprints and the file hash cache
+    :param log: callable receiving progress messages
+    """
+
+    def __init__(self, stages, root, state_file, log=print):
+        self.stages = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage name: {stage.name}")
+            self.stages[stage.name] = stage
+        self.root = os.path.abspath(root)
+        self.state_file = state_file
+        self.log = log
+        self.state = self._load_state()
+        self.deps = self._build_dependencies()
+
+    def _abs(self, path):
+        return os.path.normpath(os.path.join(self.root, path))
+
+    def _build_dependencies(self):
+        producers = [(self._abs(out), stage.name) for stage in self.stages.values() for out in stage.outputs]
+        deps = {}
+        for stage in self.stages.values():
+            upstream = set(stage.after)
+            for inp in stage.inputs:
+                inp = self._abs(inp)
+                upstream.update(name for out, name in producers if name != stage.name and _is_within(inp, out))
+            unknown = upstream - set(self.stages)
+            if unknown:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stages {sorted(unknown)}")
+            deps[stage.name] = upstream
+        self._check_acyclic(deps)
+        return deps
+
+    def _check_acyclic(self, deps):
+        visiting, done = set(), set()
+
+        def visit(name, path):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline has a cycle: {' -> '.join(path + [name])}")
+            visiting.add(name)
+            for dep in deps[name]:
+                visit(dep, path + [name])
+            visiting.discard(name)
+            done.add(name)
+
+        for name in deps:
+            visit(name, [])
+
+    def select(self, targets=None):
+        """
+        Returns the stage names to consider: the selected stages/groups and
+        everything upstream of them. Manual stages are included only when selected
+        by name or group.
+        """
+        if not targets:
+            selected = {name for name, stage in self.stages.items() if not stage.manual}
+        else:
+            selected = set()
+            for target in targets:
+                matched = {name for name, stage in self.stages.items() if target in (name, stage.group)}
+                if not matched:
+                    raise ValueError(f"Unknown stage or group: {target}")
+                selected |= matched
+
+        explicit = set(selected)
+        stack = list(selected)
+        while stack:
+            for dep in self.deps[stack.pop()]:
+                if dep not in selected and (not self.stages[dep].manual or dep in explicit):
+                    selected.add(dep)
+                    stack.append(dep)
+        return selected
+
+    def _load_state(self):
+        if os.path.exists(self.state_file):
+            with open(self.state_file, encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') == STATE_VERSION:
+                return state
+        return {'version': STATE_VERSION, 'stages': {}, 'files': {}}
+
+    def _save_state(self):
+        state_dir = os.path.dirname(self.state_file)
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+        tmp = self.state_file + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.state_file)
+
+    def _file_hash(self, path):
+        st = os.stat(path)
+        key = f"{st.st_size}:{st.st_mtime_ns}"
+        cached = self.state['files'].get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+        value = digest.hexdigest()
+        self.state['files'][path] = [key, value]
+        return value
+
+    def artifact_hash(self, path, exclude=()):
+        """
+        Content hash of a file or of every file under a directory; None if missing.
+        Files under any path in exclude (e.g. the stage's own outputs written inside
+        its input directory) are ignored.
+        """
+        path = self._abs(path)
+        if os.path.isfile(path):
+            return self._file_hash(path)
+        if not os.path.isdir(path):
+            return None
+
+        digest = hashlib.sha256()
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                file_path = os.path.join(dirpath, filename)
+                if any(_is_within(file_path, other) for other in exclude):
+                    continue
+                digest.update(os.path.relpath(file_path, path).encode('utf-8'))
+                digest.update(self._file_hash(file_path).encode('ascii'))
+        return digest.hexdigest()
+
+    def shared_source_hash(self):
+        """Content hash of the shared src/common modules, so a change there reruns dependent stages."""
+        digest = hashlib.sha256()
+        runner = os.path.abspath(__file__)
+        for filename in sorted(os.listdir(SHARED_SOURCE_DIR)):
+            path = os.path.join(SHARED_SOURCE_DIR, filename)
+            if filename.endswith('.py') and path != runner:
+                digest.update(filename.encode('utf-8'))
+                digest.update(self._file_hash(path).encode('ascii'))
+        return digest.hexdigest()
+
+    def fingerprint(self, stage):
+        """Hash of the stage definition, its source files and its input contents."""
+        digest = hashlib.sha256()
+        digest.update(json.dumps(stage.definition(), sort_keys=True, default=str).encode('utf-8'))
+        source = self._abs(stage.source_file())
+        digest.update((self._file_hash(source) if os.path.isfile(source) else 'missing-source').encode('ascii'))
+        digest.update(self.shared_source_hash().encode('ascii'))
+        outputs = [self._abs(out) for out in stage.outputs]
+        for inp in stage.inputs:
+            digest.update(inp.encode('utf-8'))
+            digest.update(str(self.artifact_hash(inp, exclude=outputs)).encode('ascii'))
+        return digest.hexdigest()
+
+    def is_up_to_date(self, stage, fingerprint):
+        record = self.state['stages'].get(stage.name)
+        if not record or record.get('fingerprint') != fingerprint:
+            return False
+        return all(os.path.exists(self._abs(out)) for out in stage.outputs)
+
+    def run(self, targets=None, force=False, jobs=1, dry_run=False):
+        """
+        Runs the selected stages in dependency order, skipping up-to-date ones.
+
+        :param targets: stage names or groups (default: every non-manual stage)
+        :param force: rerun selected stages even when up to date
+        :param jobs: maximum number of stages running at once
+        :param dry_run: only report which stages would run
+        :return: dict of stage name -> 'skipped' | 'ran' | 'would-run' | 'failed' | 'blocked'
+        """
+        selected = self.select(targets)
+        pending = {name: self.deps[name] & selected for name in selected}
+        status = {}
+        changed = set()
+        running = {}
+
+        executor = ProcessPoolExecutor(max_workers=max(1, jobs)) if not dry_run else None
+        try:
+            while pending or running:
+                ready = sorted(name for name, deps in pending.items() if all(d in status for d in deps))
+                for name in ready:
+                    deps = pending.pop(name)
+                    stage = self.stages[name]
+
+                    if any(status[d] in ('failed', 'blocked') for d in deps):
+                        status[name] = 'blocked'
+                        self.log(f"[blocked] {name} (upstream failed)")
+                        continue
+
+                    # Downstream stages are judged by the content of upstream outputs, so an
+                    # upstream rerun that rewrites identical files does not cascade.
+                    upstream_changed = dry_run and bool(deps & changed)
+                    fingerprint = None if upstream_changed else self.fingerprint(stage)
+                    if not force and not upstream_changed and self.is_up_to_date(stage, fingerprint):
+                        status[name] = 'skipped'
+                        self.log(f"[up-to-date] {name}")
+                        continue
+
+                    if dry_run:
+                        status[name] = 'would-run'
+                        changed.add(name)
+                        self.log(f"[would run] {name}")
+                        continue
+
+                    self.log(f"[run] {name}")
+                    future = executor.submit(_run_stage, self.root, stage.func, stage.params, stage.script, stage.args)
+                    running[future] = (name, fingerprint, time.perf_counter())
+
+                # Stages resolved without running may have unblocked others; schedule them first
+                if ready and any(name in status for name in ready):
+                    continue
+                if not running:
+                    if pending:
+                        raise RuntimeError(f"Unresolvable stages: {sorted(pending)}")
+                    continue
+
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name, fingerprint, started = running.pop(future)
+                    elapsed = time.perf_counter() - started
+                    try:
+                        future.result()
+                    except Exception as e:
+                        status[name] = 'failed'
+                        self.log(f"[failed] {name} after {elapsed:.1f}s: {e}")
+                        continue
+
+                    missing = [out for out in self.stages[name].outputs if not os.path.exists(self._abs(out))]
+                    if missing:
+                        status[name] = 'failed'
+                        self.log(f"[failed] {name}: outputs not created {missing}")
+                        continue
+
+                    status[name] = 'ran'
+                    changed.add(name)
+                    self.state['stages'][name] = {
+                        'fingerprint': fingerprint,
+                        'finished': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                        'elapsed_s': round(elapsed, 3),
+                    }
+                    self._save_state()
+                    self.log(f"[done] {name} in {elapsed:.1f}s")
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+            if not dry_run:
+                self._save_state()
+        return status
+
+def load_pipeline_config(config_file, variables=None, state_file=None, log=print):
+    """
+    Builds a Pipeline from a JSON config.
+
+    ``${name}`` in any string is replaced by entries of the config's "vars",
+    the ``variables`` overrides, environment variables, or ``${root}`` (the
+    pipeline root, by default the config file's parent directory).
+    """
+    from string import Template
+
+    with open(config_file, encoding='utf-8') as f:
+        config = json.load(f)
+
+    config_dir = os.path.dirname(os.path.abspath(config_file))
+    root = os.path.abspath(os.path.join(config_dir, config.get('root', '..')))
+    values = dict(os.environ)
+    values['root'] = root
+    overrides = dict(variables or {})
+    for key, value in config.get('vars', {}).items():
+        if key not in overrides:
+            values[key] = Template(str(value)).substitute(values)
+        else:
+            values[key] = overrides.pop(key)
+    values.update(overrides)
+
+    def expand(obj):
+        if isinstance(obj, str):
+            return Template(obj).substitute(values)
+        if isinstance(obj, list):
+            return [expand(v) for v in obj]
+        if isinstance(obj, dict):
+            return {k: expand(v) for k, v in obj.items()}
+        return obj
+
+    stages = [Stage(**expand(entry)) for entry in config['stages']]
+    state_file = state_file or os.path.join(root, '.pipeline_state.json')
+    return Pipeline(stages, root, state_file, log=log)
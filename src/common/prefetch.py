@@ -0,0 +1,101 @@
+"""
+Prefetching reader for stages that process many files one after another.
+
+Multi-file stages (FIRMS CSV loading, weather combining, CSV -> Parquet,
+VOD daily -> monthly, NetCDF -> CSV) alternate read -> process -> read, so the
+CPU idles during disk I/O and the disk idles while a file is processed.
+``prefetch`` decodes the next ``depth`` files on background threads while the
+caller works on the current one:
+
+    for path, fetch in prefetch(paths, pd.read_csv, depth=2):
+        try:
+            df = fetch()
+        except Exception as e:
+            ...
+
+Items are yielded in input order. ``fetch()`` returns the loaded value or
+re-raises the loader's exception, so per-file error handling stays in the
+caller. At most ``depth`` loaded results are held ahead of the current one,
+which caps memory. ``depth=0`` loads each item in the calling thread when
+``fetch()`` is called (the old sequential behaviour).
+
+Loaders run on threads, so they should release the GIL (pandas/pyarrow CSV and
+Parquet readers do). netCDF4/HDF5 is not thread-safe; for NetCDF inputs use
+``read_ahead`` as the loader, which only pulls the file into the OS page cache.
+
+Configure from argparse with ``add_prefetch_arguments`` or the
+PREPROCESS_PREFETCH environment variable.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+ENV_PREFETCH = 'PREPROCESS_PREFETCH'
+DEFAULT_DEPTH = 2
+READ_AHEAD_BLOCK_SIZE = 8 * 1024 * 1024
+
+_END = object()
+
+def default_depth():
+    """Prefetch depth from PREPROCESS_PREFETCH, or DEFAULT_DEPTH."""
+    try:
+        return max(0, int(os.environ.get(ENV_PREFETCH, DEFAULT_DEPTH)))
+    except ValueError:
+        return DEFAULT_DEPTH
+
+def prefetch(items, load, depth=None, workers=None):
+    """
+    Yields (item, fetch) pairs in order while later items load in the background.
+
+    :param items: iterable of inputs (e.g. file paths)
+    :param load: callable taking one item and returning its loaded value
+    :param depth: number of items loaded ahead of the current one (None: default_depth(), 0: no threads)
+    :param workers: loader threads (default: depth)
+    """
+    if depth is None:
+        depth = default_depth()
+    if depth <= 0:
+        for item in items:
+            yield item, (lambda item=item: load(item))
+        return
+
+    executor = ThreadPoolExecutor(max_workers=workers or depth, thread_name_prefix='prefetch')
+    pending = deque()
+    try:
+        item_iter = iter(items)
+        # 현재 항목 + 앞서 읽을 depth개
+        for item in islice(item_iter, depth + 1):
+            pending.append((item, executor.submit(load, item)))
+
+        while pending:
+            item, future = pending.popleft()
+            yield item, future.result
+            # 호출자가 현재 항목 처리를 마친 뒤에 다음 항목을 추가하여 대기 중인 결과를 depth개로 제한
+            next_item = next(item_iter, _END)
+            if next_item is not _END:
+                pending.append((next_item, executor.submit(load, next_item)))
+    finally:
+        # 중간에 반복을 멈추면 아직 시작하지 않은 읽기는 취소
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+def read_ahead(path, block_size=READ_AHEAD_BLOCK_SIZE):
+    """
+    Reads a file once and discards the bytes so the next open hits the page cache.
+
+    :return: path, so the result can be passed straight to the real reader
+    """
+    with open(path, 'rb', buffering=0) as f:
+        while f.read(block_size):
+            pass
+    return path
+
+def add_prefetch_arguments(parser):
+    """Adds the --prefetch option to an argparse parser."""
+    parser.add_argument('--prefetch', type=int, default=default_depth(),
+                        help=f'현재 파일을 처리하는 동안 백그라운드 스레드로 미리 읽을 파일 수, 0이면 순차 읽기'
+                             f'(기본값: 환경 변수 {ENV_PREFETCH} 또는 {DEFAULT_DEPTH})')
+    return parser
@@ -0,0 +1,275 @@
+"""
+Compact column types for pipeline outputs.
+
+pandas defaults (int64 grid IDs, float64 values, int64 flags, dates as CSV
+strings) roughly double the size of the joined training tables. Every column
+is mapped to one canonical kind by name, then by type:
+
+    kind         Parquet (Arrow)            pandas
+    grid         int32                      int32
+    date         date32                     datetime64 (midnight)
+    flag         uint8                      uint8 (float32 with NaN for nulls)
+    measure      float32                    float32
+    integer      int32 (64-bit ints only)   int32 when the values fit
+    category     dictionary<int32, string>  category
+    coordinate   unchanged                  unchanged
+
+Name rules come first: ``grid_id``; ``date``/``acq_date``/``*_date``;
+``af_flag``/``af_flag2``/``af_flag_<T>``/``*_flag``, the future-horizon
+labels ``fire_next_<N>d`` and ``confidence_max`` are flags;
+``latitude``/``longitude``/``lat``/``lon``/``x``/``y`` keep their type
+(not rounded to float32). Remaining floats become measures, 64-bit
+integers become int32, strings become categories and booleans become flags.
+Other columns (e.g. uint16 fire counts) are kept.
+
+Writers call ``write_frame`` (CSV or Parquet by extension), or ``cast_table``
+for streamed ``pyarrow.parquet.ParquetWriter`` output. Readers call
+``read_frame``, which converts files written before the policy and validates
+values (grid IDs inside the global grid, flags fitting uint8);
+``schema_issues`` lists the columns of a file that are not in canonical form.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from .grid import LAT_OFFSET, LON_CELLS
+
+# 전체 0.1° 격자의 grid_id 범위 [0, 1800 * 3600)
+GRID_ID_LIMIT = 2 * LAT_OFFSET * LON_CELLS
+
+ARROW_TYPES = {
+    'grid': pa.int32(),
+    'date': pa.date32(),
+    'flag': pa.uint8(),
+    'measure': pa.float32(),
+    'integer': pa.int32(),
+    'category': pa.dictionary(pa.int32(), pa.string()),
+}
+
+# af_flag, af_flag2, 신뢰도 임계값별 af_flag_<T>, 미래 기간 라벨 fire_next_<N>d, *_flag
+# (af_flag_box3_mean 같은 파생 피처는 제외)
+FLAG_PATTERN = re.compile(r'^af_flag(\d*|_\d+)$|^fire_next_\d+d$|_flag$')
+
+# 이름만으로 형식이 정해지는 열
+COLUMN_KINDS = {
+    'grid_id': 'grid',
+    'date': 'date',
+    'acq_date': 'date',
+    'confidence_max': 'flag',
+    'latitude': 'coordinate',
+    'longitude': 'coordinate',
+    'lat': 'coordinate',
+    'lon': 'coordinate',
+    'x': 'coordinate',
+    'y': 'coordinate',
+}
+
+def _kind_from_name(name):
+    kind = COLUMN_KINDS.get(name)
+    if kind is not None:
+        return kind
+    if name.endswith('_date'):
+        return 'date'
+    if FLAG_PATTERN.search(name):
+        return 'flag'
+    return None
+
+def arrow_kind(field):
+    """Canonical kind of a pyarrow field, or None to keep its type."""
+    kind = _kind_from_name(field.name)
+    if kind is not None:
+        return kind if kind != 'coordinate' else None
+    t = field.type
+    if pa.types.is_boolean(t):
+        return 'flag'
+    if pa.types.is_floating(t) and t != pa.float16():
+        return 'measure'
+    if t in (pa.int64(), pa.uint64()):
+        return 'integer'
+    if pa.types.is_dictionary(t):
+        t = t.value_type
+    if pa.types.is_string(t) or pa.types.is_large_string(t):
+        return 'category'
+    return None
+
+def frame_kind(name, series):
+    """Canonical kind of a pandas column, or None to keep its dtype."""
+    kind = _kind_from_name(name)
+    if kind is not None:
+        return kind if kind != 'coordinate' else None
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'flag'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'measure'
+    if pd.api.types.is_integer_dtype(dtype) and dtype.itemsize == 8:
+        return 'integer'
+    if pd.api.types.is_string_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+        return 'category'
+    return None
+
+def compact_schema(schema):
+    """Maps every field of a pyarrow schema to its canonical type."""
+    fields = []
+    for field in schema:
+        kind = arrow_kind(field)
+        fields.append(field.with_type(ARROW_TYPES[kind]) if kind else field)
+    return pa.schema(fields, metadata=schema.metadata)
+
+def schema_issues(schema):
+    """
+    Lists the columns of a pyarrow schema that are not in canonical form.
+    int64 integer columns are accepted, since cast_table keeps them when the
+    values do not fit int32.
+
+    :return: list of (column, actual type, expected type) tuples
+    """
+    issues = []
+    for field in schema:
+        kind = arrow_kind(field)
+        # cast_table은 int32에 맞지 않는 정수 열을 int64로 유지하므로 허용
+        if kind == 'integer' and field.type == pa.int64():
+            continue
+        if kind and field.type != ARROW_TYPES[kind]:
+            issues.append((field.name, str(field.type), str(ARROW_TYPES[kind])))
+    return issues
+
+def _to_integer(name, series, kind):
+    """
+    Casts a column to int32/uint8; 'integer' columns that do not fit are kept as is.
+
+    Flags with nulls (e.g. af_flag after a left join) stay float32 with NaN in
+    pandas so numpy code can keep using NaN checks; they are stored as uint8.
+    """
+    target = np.uint8 if kind == 'flag' else np.int32
+    nulls = series.isna()
+    values = series[~nulls].to_numpy()
+    if values.dtype == bool:
+        values = values.astype(np.uint8)
+    info = np.iinfo(target)
+    if len(values):
+        if not np.issubdtype(values.dtype, np.number):
+            raise ValueError(f"Column '{name}' must be numeric, got {series.dtype}")
+        if np.issubdtype(values.dtype, np.floating) and not np.array_equal(values, np.round(values)):
+            raise ValueError(f"Column '{name}' has non-integer values")
+        if values.min() < info.min or values.max() > info.max:
+            if kind == 'integer':
+                return series
+            raise ValueError(f"Column '{name}' has values outside the {np.dtype(target).name} range "
+                             f"[{values.min()}, {values.max()}]")
+    if nulls.any():
+        return series.astype(np.float32) if kind == 'flag' else series.astype('Int32')
+    return series.astype(target)
+
+def compact_series(name, series, kind=None):
+    """Converts one pandas column to its canonical dtype (kind: see module docstring)."""
+    kind = kind or frame_kind(name, series)
+    if kind is None:
+        return series
+    if kind == 'grid':
+        if series.isna().any():
+            raise ValueError(f"Column '{name}' has {int(series.isna().sum())} null grid IDs")
+        values = series.to_numpy()
+        if len(values) and (values.min() < 0 or values.max() >= GRID_ID_LIMIT):
+            raise ValueError(f"Column '{name}' has grid IDs outside [0, {GRID_ID_LIMIT})")
+        return _to_integer(name, series, kind)
+    if kind in ('flag', 'integer'):
+        return _to_integer(name, series, kind)
+    if kind == 'date':
+        return pd.to_datetime(series).dt.normalize()
+    if kind == 'measure':
+        return series.astype(np.float32)
+    if kind == 'category':
+        return series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype('category')
+    raise ValueError(f"Unknown column kind: {kind}")
+
+def compact_frame(df):
+    """Returns a copy of df with every column converted to its canonical dtype."""
+    return pd.DataFrame({name: compact_series(name, df[name]) for name in df.columns}, index=df.index)
+
+def to_table(df):
+    """Converts a DataFrame to a pyarrow Table in canonical types (dates as date32)."""
+    df = compact_frame(df)
+    arrays = []
+    for name in df.columns:
+        series = df[name]
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            arrays.append(pa.array(series.to_numpy().astype('datetime64[D]'), type=pa.date32(),
+                                   mask=series.isna().to_numpy()))
+        else:
+            arrays.append(pa.Array.from_pandas(series))
+    return cast_table(pa.Table.from_arrays(arrays, names=list(df.columns)))
+
+def cast_table(table, schema=None):
+    """
+    Casts a pyarrow Table to schema.
+
+    Without schema the table's canonical schema is used, keeping 64-bit integer
+    columns whose values do not fit int32. Streamed writers take the schema of
+    their first cast chunk and cast every later chunk to it, so all row groups
+    share one schema.
+    """
+    if schema is None:
+        schema = compact_schema(table.schema)
+        for i, field in enumerate(table.schema):
+            if arrow_kind(field) == 'integer' and table.num_rows:
+                bounds = pc.min_max(table.column(i))
+                lo, hi = bounds['min'].as_py(), bounds['max'].as_py()
+                if lo is not None and (lo < -2 ** 31 or hi >= 2 ** 31):
+                    schema = schema.set(i, field)
+    columns = []
+    for field in schema:
+        column = table.column(field.name)
+        if column.type == field.type:
+            columns.append(column)
+        elif pa.types.is_dictionary(field.type) and not pa.types.is_dictionary(column.type):
+            column = column.cast(field.type.value_type)
+            columns.append(pc.dictionary_encode(column).cast(field.type))
+        else:
+            try:
+                columns.append(column.cast(field.type))
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                raise ValueError(f"Column '{field.name}' cannot be stored as {field.type}: {e}") from e
+    return pa.Table.from_arrays(columns, schema=schema)
+
+def write_frame(df, path, compression='zstd'):
+    """
+    Writes df in canonical types as Parquet or CSV (by file extension).
+
+    CSV has no types, but values are still rounded to float32 and dates are
+    written as YYYY-MM-DD.
+    """
+    if path.lower().endswith('.parquet'):
+        pq.write_table(to_table(df), path, compression=compression)
+    else:
+        compact_frame(df).to_csv(path, index=False, date_format='%Y-%m-%d')
+
+def read_frame(path, columns=None, strict=False):
+    """
+    Reads a CSV or Parquet file and returns it in canonical dtypes.
+
+    :param columns: columns to read (default: all)
+    :param strict: raise ValueError when a Parquet file is not in canonical
+                   types instead of converting it
+    """
+    if path.lower().endswith('.parquet'):
+        if strict:
+            issues = schema_issues(pq.read_schema(path))
+            issues = [issue for issue in issues if columns is None or issue[0] in columns]
+            if issues:
+                raise ValueError(f"{path} does not follow the dtype policy: " +
+                                 ', '.join(f"{name} {actual} (expected {expected})"
+                                           for name, actual, expected in issues))
+        df = pd.read_parquet(path, columns=columns)
+    else:
+        df = pd.read_csv(path, usecols=columns)
+    return compact_frame(df)
+
+def frame_nbytes(df):
+    """Memory used by df in bytes, including string/category payloads."""
+    return int(df.memory_usage(index=False, deep=True).sum())
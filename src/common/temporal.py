@@ -0,0 +1,141 @@
+"""
+As-of temporal join keyed by grid_id.
+
+Monthly (LAI), yearly (land cover) and 5-yearly (population) covariates are
+dated at the start of their period, so an exact-date merge against daily rows
+matches almost nothing. ``asof_join`` attaches, for every (grid_id, date) row,
+the latest covariate value dated at or before that date.
+
+The right-hand table is sorted once by (grid_id, date) and encoded as a single
+int64 key ``grid_rank * span + day``, i.e. the per-grid date arrays laid end to
+end. Each left row is then resolved with one ``np.searchsorted`` call, and left
+rows are processed in chunks so memory stays bounded for tens of millions of
+daily rows.
+"""
+
+import numpy as np
+import pandas as pd
+
+def _to_days(dates):
+    """Converts dates (strings, datetime64, pandas Series) to int64 days since 1970-01-01."""
+    if isinstance(dates, pd.Series):
+        dates = dates.values
+    dates = np.asarray(dates)
+    if not np.issubdtype(dates.dtype, np.datetime64):
+        dates = pd.to_datetime(dates).values
+    return dates.astype('datetime64[D]').astype(np.int64)
+
+class AsOfIndex:
+    """
+    Sorted per-grid date index over a covariate table.
+
+    :param grid_ids: grid_id of every covariate row
+    :param dates: date of every covariate row
+    :param values: dict of column name -> array aligned with grid_ids/dates
+    """
+
+    def __init__(self, grid_ids, dates, values):
+        grid_ids = np.asarray(grid_ids, dtype=np.int64)
+        days = _to_days(dates)
+
+        order = np.lexsort((days, grid_ids))
+        grid_ids = grid_ids[order]
+        days = days[order]
+
+        self.grid_keys, self.grid_rank = np.unique(grid_ids, return_inverse=True)
+        self.min_day = int(days.min()) if len(days) else 0
+        self.span = (int(days.max()) - self.min_day + 1) if len(days) else 1
+        self.days = days
+        self.keys = self.grid_rank.astype(np.int64) * self.span + (days - self.min_day)
+        self.values = {col: np.asarray(arr)[order] for col, arr in values.items()}
+
+    @classmethod
+    def from_frame(cls, df, date_col, value_cols=None, grid_col='grid_id'):
+        """Builds an index from a DataFrame; value_cols defaults to every other column."""
+        if value_cols is None:
+            value_cols = [c for c in df.columns if c not in (grid_col, date_col)]
+        return cls(df[grid_col].values, df[date_col], {c: df[c].values for c in value_cols})
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, grid_ids, dates, max_lag_days=None):
+        """
+        Finds the covariate row for each (grid_id, date).
+
+        :param max_lag_days: ignore covariate rows older than this many days
+        :return: int64 row positions into the index, -1 where there is no match
+        """
+        grid_ids = np.asarray(grid_ids, dtype=np.int64)
+        days = _to_days(dates)
+
+        if len(self.keys) == 0:
+            return np.full(len(grid_ids), -1, dtype=np.int64)
+
+        rank = np.searchsorted(self.grid_keys, grid_ids)
+        rank = np.minimum(rank, len(self.grid_keys) - 1)
+        known = self.grid_keys[rank] == grid_ids
+
+        # 같은 그리드 구간을 벗어나지 않도록 날짜 오프셋을 [-1, span-1]로 제한
+        offset = np.clip(days - self.min_day, -1, self.span - 1)
+        pos = np.searchsorted(self.keys, rank * self.span + offset, side='right') - 1
+
+        safe = np.maximum(pos, 0)
+        found = known & (pos >= 0) & (self.grid_rank[safe] == rank)
+        if max_lag_days is not None:
+            found &= (days - self.days[safe]) <= max_lag_days
+        return np.where(found, pos, -1)
+
+    def take(self, positions, columns=None, fill_value=np.nan):
+        """
+        Gathers covariate values at lookup() positions.
+
+        Integer/bool columns are promoted to float when fill_value is NaN and
+        some positions are missing.
+        """
+        positions = np.asarray(positions)
+        missing = positions < 0
+        safe = np.maximum(positions, 0)
+        out = {}
+        for col in (columns or self.values.keys()):
+            src = self.values[col]
+            vals = src[safe] if len(src) else np.empty(len(positions), dtype=src.dtype)
+            if missing.any():
+                if not np.issubdtype(vals.dtype, np.floating) and pd.isna(fill_value):
+                    vals = vals.astype(np.float64)
+                vals[missing] = fill_value
+            out[col] = vals
+        return out
+
+def asof_join(left, right, date_col, right_date_col=None, value_cols=None, grid_col='grid_id',
+              max_lag_days=None, fill_value=np.nan, chunk_size=5_000_000):
+    """
+    Left as-of join: every left row gets the latest right row for the same
+    grid_id dated at or before the left row's date.
+
+    :param left: DataFrame with grid_col and date_col (e.g. daily weather/af_flag rows)
+    :param right: covariate DataFrame with grid_col and right_date_col
+    :param date_col: date column in left
+    :param right_date_col: date column in right (defaults to date_col)
+    :param value_cols: right columns to attach (defaults to every non-key column)
+    :param max_lag_days: leave values missing when the latest right row is older than this
+    :param fill_value: value for rows without a match
+    :param chunk_size: number of left rows resolved per searchsorted call
+    :return: copy of left with the value columns appended, row order preserved
+    """
+    right_date_col = right_date_col or date_col
+    index = right if isinstance(right, AsOfIndex) else AsOfIndex.from_frame(right, right_date_col, value_cols, grid_col)
+    columns = list(value_cols or index.values.keys())
+
+    n = len(left)
+    positions = np.empty(n, dtype=np.int64)
+    grid_values = left[grid_col].values
+    date_values = left[date_col]
+    for start in range(0, n, chunk_size):
+        end = min(start + chunk_size, n)
+        positions[start:end] = index.lookup(grid_values[start:end], date_values.iloc[start:end], max_lag_days)
+
+    result = left.copy()
+    for col, vals in index.take(positions, columns, fill_value).items():
+        result[col] = vals
+    return result
@@ -1,10 +1,21 @@
 import argparse
+import os
+import sys
 from pathlib import Path
 import pandas as pd
 import pyarrow.csv as pv
 import pyarrow.parquet as pq
 import pyarrow as pa
 
+# 공용 모듈(src/common) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common import metrics
+from common.prefetch import prefetch
+from common.schema import compact_schema, cast_table
+
+# 스키마 추론 시 파일마다 읽을 앞부분 크기(pyarrow 기본 블록 1 MiB 대신)
+SCHEMA_SAMPLE_BYTES = 16 * 1024 * 1024
+
 def convert_csv_to_parquet(csv_dir_path: Path):
     """
     Scans a directory for CSV files, sorts them by name,
@@ -82,11 +93,12 @@ def combine_csvs_to_single_parquet(csv_dir_path: Path):
     except Exception as e:
         print(f"오류: 병합된 DataFrame을 Parquet 파일로 저장 중 오류 발생: {e}")
 
-def combine_csvs_to_parquet_pyarrow(csv_dir_path: Path):
+def combine_csvs_to_parquet_pyarrow(csv_dir_path: Path, prefetch_depth: int = None):
     """
     Scans a directory for CSV files, sorts them by name, combines them
     into a single Parquet file using PyArrow for memory efficiency.
-    The schema is determined by the first valid CSV file.
+    The schema is determined by the first valid CSV file, in the compact dtypes of common.schema.
+    The next prefetch_depth files are parsed on background threads while the current one is written.
     """
     csv_files = sorted(list(csv_dir_path.glob('*.csv')))
 
@@ -105,12 +117,13 @@ def combine_csvs_to_parquet_pyarrow(csv_dir_path: Path):
     successful_writes = 0
 
     try:
-        for csv_file in csv_files:
+        for csv_file, fetch in prefetch(csv_files, pv.read_csv, depth=prefetch_depth):
             print(f"'{csv_file.name}' 파일 처리 중...")
             try:
                 # CSV 파일을 Arrow Table로 읽기
                 # read_options과 parse_options을 통해 더 세밀한 제어 가능
-                table = pv.read_csv(csv_file)
+                # 공용 dtype 정책(int32 grid_id, float32 값 등)으로 변환
+                table = cast_table(fetch())
 
                 if table.num_rows == 0:
                     print(f"정보: '{csv_file.name}' 파일이 비어있어 건너뜁니다.")
@@ -170,18 +183,233 @@ def combine_csvs_to_parquet_pyarrow(csv_dir_path: Path):
         print(f"성공: 총 {successful_writes}개의 CSV 파일의 데이터가 '{output_parquet_path}' 파일로 병합되었습니다.")
         print(f"총 {files_processed_count}개의 CSV 파일이 스키마 처리되었습니다.")
 
+def parse_schema_spec(schema_spec: str) -> pa.Schema:
+    """
+    Parses an explicit schema given as 'name:type,name:type,...'
+    (e.g. 'time:timestamp[s],grid_id:int32,LFMC:float32') into a pyarrow schema.
+    Type names follow pyarrow aliases (int32, float32, string, date32, timestamp[s], ...).
+    """
+    fields = []
+    for item in schema_spec.split(','):
+        name, _, type_name = item.strip().partition(':')
+        if not name or not type_name:
+            raise ValueError(f"잘못된 스키마 항목입니다: '{item}' (형식: 이름:타입)")
+        fields.append(pa.field(name.strip(), pa.type_for_alias(type_name.strip())))
+    return pa.schema(fields)
+
+def infer_unified_schema(csv_files: list, sample_files: int = 0,
+                         sample_bytes: int = SCHEMA_SAMPLE_BYTES) -> pa.Schema:
+    """
+    Infers the schema of each sampled CSV file from its first sample_bytes and
+    unifies them into one schema. Conflicting numeric types are promoted
+    (e.g. int64 + double -> double) and columns that are empty in every sample
+    (null type) fall back to float64 so they are kept instead of dropped.
+    sample_files=0 samples every file.
+    """
+    if sample_files and len(csv_files) > sample_files:
+        # 파일 목록 전체에 고르게 분포된 샘플 선택
+        step = len(csv_files) / sample_files
+        sampled = [csv_files[int(i * step)] for i in range(sample_files)]
+    else:
+        sampled = csv_files
+
+    schemas = []
+    read_options = pv.ReadOptions(block_size=sample_bytes)
+    for csv_file in sampled:
+        try:
+            with pv.open_csv(csv_file, read_options=read_options) as reader:
+                schemas.append(reader.schema)
+        except pa.ArrowInvalid as e:
+            print(f"경고: '{csv_file.name}' 파일의 스키마를 추론할 수 없어 샘플에서 제외합니다: {e}")
+
+    if not schemas:
+        raise ValueError("스키마를 추론할 수 있는 CSV 파일이 없습니다.")
+
+    unified = pa.unify_schemas(schemas, promote_options='permissive')
+    fields = [
+        pa.field(field.name, pa.float64()) if pa.types.is_null(field.type) else field
+        for field in unified
+    ]
+    return pa.schema(fields)
+
+def _read_csv_with_schema(csv_file: Path, schema: pa.Schema, sort_keys: list) -> pa.Table:
+    """
+    Reads one CSV file with pyarrow's multithreaded reader, converting columns
+    directly to the target schema. Columns missing from the file are filled with
+    nulls, and the table is sorted by sort_keys when given.
+    """
+    convert_options = pv.ConvertOptions(
+        column_types=schema,
+        include_columns=schema.names,
+        include_missing_columns=True,
+        strings_can_be_null=True,
+    )
+    table = pv.read_csv(
+        csv_file,
+        read_options=pv.ReadOptions(use_threads=True),
+        convert_options=convert_options,
+    )
+    if sort_keys and table.num_rows > 0:
+        table = table.sort_by([(key, 'ascending') for key in sort_keys])
+    return table
+
+def combine_csvs_to_parquet_parallel(
+    csv_dir_path: Path,
+    schema: pa.Schema = None,
+    sample_files: int = 0,
+    max_workers: int = 4,
+    row_group_size: int = 512 * 1024,
+    compression: str = 'zstd',
+    sort_by: tuple = ('time', 'grid_id'),
+):
+    """
+    Combines all CSV files in a directory into a single Parquet file.
+    The parse schema is fixed up front (explicit, or sampled from the files and
+    unified), files are parsed in parallel threads, and each sorted table is
+    streamed into one ParquetWriter in file name order. With an inferred schema,
+    tables are cast to the shared compact dtype policy in common.schema after
+    parsing; the first table fixes the output schema (int64 is kept for integer
+    columns that do not fit int32) and a later table that does not fit it stops
+    the run. With time-partitioned inputs (one file per month), the output is
+    globally sorted by (time, grid_id).
+    """
+    csv_files = sorted(list(csv_dir_path.glob('*.csv')))
+
+    if not csv_files:
+        print(f"'{csv_dir_path}' 디렉토리에서 CSV 파일을 찾을 수 없습니다.")
+        return
+
+    print(f"총 {len(csv_files)}개의 CSV 파일을 찾았습니다. {max_workers}개의 스레드로 병렬 병합을 시작합니다...")
+
+    # 추론한 스키마는 64비트 그대로 파싱하고 파일별로 공용 dtype 정책을 적용(int32 범위를 넘는 값이 파싱 오류가 되지 않도록)
+    compact = schema is None
+    if schema is None:
+        schema = infer_unified_schema(csv_files, sample_files)
+        print(f"샘플 파일에서 통합한 스키마:\n{schema}")
+    else:
+        print(f"지정된 스키마를 사용합니다:\n{schema}")
+
+    sort_keys = [key for key in sort_by if key in schema.names]
+    missing_keys = [key for key in sort_by if key not in schema.names]
+    if missing_keys:
+        print(f"정보: 스키마에 정렬 열 {missing_keys}이(가) 없어 {sort_keys} 기준으로만 정렬합니다.")
+
+    output_filename = f"{csv_dir_path.name}_combined.parquet"
+    output_parquet_path = csv_dir_path / output_filename
+    output_parquet_path.parent.mkdir(parents=True, exist_ok=True)
+
+    writer_kwargs = {'compression': compression}
+    if sort_keys and hasattr(pq, 'SortingColumn'):
+        writer_kwargs['sorting_columns'] = [pq.SortingColumn(schema.get_field_index(key)) for key in sort_keys]
+
+    successful_writes = 0
+    total_rows = 0
+    empty_files = []
+    failed_files = []
+
+    writer = None
+    try:
+        # 메모리 사용량을 제한하기 위해 동시에 읽는 파일 수를 max_workers * 2로 제한
+        tables = prefetch(csv_files, lambda csv_file: _read_csv_with_schema(csv_file, schema, sort_keys),
+                          depth=max_workers * 2, workers=max_workers)
+        for csv_file, fetch in tables:
+            try:
+                table = fetch()
+            except (pa.ArrowInvalid, OSError) as e:
+                print(f"오류: '{csv_file.name}' 파일을 대상 스키마로 읽지 못했습니다: {e}")
+                failed_files.append(csv_file.name)
+                continue
+
+            if table.num_rows == 0:
+                print(f"정보: '{csv_file.name}' 파일이 비어있어 건너뜁니다.")
+                empty_files.append(csv_file.name)
+                continue
+
+            if compact:
+                try:
+                    table = cast_table(table, writer.schema if writer is not None else None)
+                except ValueError as e:
+                    # 일부만 병합된 출력은 남기지 않음
+                    if writer is not None:
+                        writer.close()
+                        writer = None
+                    output_parquet_path.unlink(missing_ok=True)
+                    raise ValueError(f"'{csv_file.name}' 파일이 출력 스키마에 맞지 않습니다 "
+                                     f"(--schema로 열 형식을 지정하세요): {e}") from e
+            if writer is None:
+                writer = pq.ParquetWriter(str(output_parquet_path), table.schema, **writer_kwargs)
+            writer.write_table(table, row_group_size=row_group_size)
+            successful_writes += 1
+            total_rows += table.num_rows
+            print(f"'{csv_file.name}' 파일 쓰기 완료 ({table.num_rows}행)")
+
+        if writer is None:
+            # 쓸 행이 없어도 스키마만 있는 파일을 남김
+            writer = pq.ParquetWriter(str(output_parquet_path), compact_schema(schema) if compact else schema,
+                                      **writer_kwargs)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if failed_files:
+        print(f"경고: {len(csv_files)}개 중 {successful_writes}개의 CSV 파일, {total_rows}행만 "
+              f"'{output_parquet_path}' 파일로 병합되었습니다.")
+        print(f"경고: 읽기에 실패한 파일 {len(failed_files)}개: {failed_files}")
+    else:
+        print(f"성공: 총 {successful_writes}개의 CSV 파일, {total_rows}행이 '{output_parquet_path}' 파일로 병합되었습니다.")
+    if empty_files:
+        print(f"비어있는 파일 {len(empty_files)}개: {empty_files}")
+
 def main():
     parser = argparse.ArgumentParser(
         # description="디렉토리 내 CSV 파일들을 파일 이름 순으로 정렬하여 Parquet 형식으로 변환합니다."
         # description="디렉토리 내 CSV 파일들을 파일 이름 순으로 읽어 하나의 Parquet 파일로 통합합니다."
-        description="디렉토리 내 CSV 파일들을 파일 이름 순으로 읽어 하나의 Parquet 파일로 통합합니다 (PyArrow 사용)."
+        # description="디렉토리 내 CSV 파일들을 파일 이름 순으로 읽어 하나의 Parquet 파일로 통합합니다 (PyArrow 사용)."
+        description="디렉토리 내 CSV 파일들을 통합 스키마로 병렬 파싱하여 하나의 Parquet 파일로 통합합니다 (PyArrow 사용)."
     )
     parser.add_argument(
         "csv_directory", 
         type=str, 
         help="CSV 파일들이 포함된 디렉토리 경로"
     )
+    parser.add_argument(
+        "--schema",
+        type=str,
+        help="명시적 스키마 (예: 'time:timestamp[s],grid_id:int32,LFMC:float32'). 지정하지 않으면 샘플 파일에서 추론"
+    )
+    parser.add_argument(
+        "--sample-files",
+        type=int,
+        default=0,
+        help="스키마 추론에 사용할 샘플 파일 수 (기본값: 0, 모든 파일)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="CSV 파싱에 사용할 스레드 수 (기본값: 4)"
+    )
+    parser.add_argument(
+        "--row-group-size",
+        type=int,
+        default=512 * 1024,
+        help="Parquet row group 크기 (기본값: 524288)"
+    )
+    parser.add_argument(
+        "--compression",
+        type=str,
+        default="zstd",
+        help="Parquet 압축 코덱 (기본값: zstd)"
+    )
+    parser.add_argument(
+        "--sort-by",
+        type=str,
+        default="time,grid_id",
+        help="파일별 정렬 열 목록 (기본값: time,grid_id)"
+    )
+    metrics.add_metrics_arguments(parser)
     args = parser.parse_args()
+    metrics.configure_from_args(args)
 
     csv_dir = Path(args.csv_directory)
 
@@ -191,7 +419,20 @@ def main():
 
     # convert_csv_to_parquet(csv_dir)
     # combine_csvs_to_single_parquet(csv_dir)
-    combine_csvs_to_parquet_pyarrow(csv_dir)
+    # combine_csvs_to_parquet_pyarrow(csv_dir)
+    with metrics.stage('combine') as st:
+        combine_csvs_to_parquet_parallel(
+            csv_dir,
+            schema=parse_schema_spec(args.schema) if args.schema else None,
+            sample_files=args.sample_files,
+            max_workers=args.workers,
+            row_group_size=args.row_group_size,
+            compression=args.compression,
+            sort_by=tuple(key.strip() for key in args.sort_by.split(',') if key.strip()),
+        )
+        for csv_file in csv_dir.glob('*.csv'):
+            st.add_input_file(csv_file)
+        st.add_output_file(csv_dir / f"{csv_dir.name}_combined.parquet")
 
 if __name__ == "__main__":
     main()
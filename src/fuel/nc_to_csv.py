@@ -1,15 +1,28 @@
 import os
+import sys
 import csv
+import argparse
 import numpy as np
 import netCDF4 as nc
 
-def convert_nc_to_csv(nc_dataset, output_csv_path, data_variable_names):
+# 공용 모듈(src/common) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common import metrics
+from common.grid import add_grid_arguments, registry_from_args
+from common.cache import add_cache_arguments, cache_from_args
+from common.prefetch import prefetch, read_ahead, add_prefetch_arguments
+
+# 변환 결과(CSV 형식)가 바뀌도록 코드를 수정하면 값을 올려 기존 캐시를 무효화
+CACHE_VERSION = 1
+
+def convert_nc_to_csv(nc_dataset, output_csv_path, data_variable_names, registry=None):
     """
     NetCDF 데이터셋을 CSV 파일로 변환합니다. latitude와 longitude 대신 grid_id를 저장합니다.
 
     :param nc_dataset: netCDF4.Dataset 객체
     :param output_csv_path: 출력 CSV 파일 경로
     :param data_variable_names: CSV에 포함할 데이터 변수 이름 목록
+    :param registry: common.grid.GridRegistry (지정 시 유효 그리드에 속한 셀만 기록)
     """
     print(f"변환 시작: {nc_dataset.filepath()} -> {output_csv_path}")
 
@@ -35,6 +48,15 @@ def convert_nc_to_csv(nc_dataset, output_csv_path, data_variable_names):
 
     lats = nc_dataset.variables[lat_var_name][:]
     lons = nc_dataset.variables[lon_var_name][:]
+
+    # 유효 그리드(육지) 셀 마스크를 미리 계산하여 바다/범위 밖 셀은 값을 읽지 않음
+    keep_cell = None
+    if registry is not None:
+        lat_bins = np.floor(np.asarray(lats, dtype=np.float64) / 0.1).astype(np.int64)
+        lon_bins = np.floor(np.asarray(lons, dtype=np.float64) / 0.1).astype(np.int64)
+        cell_grid_ids = (lat_bins[:, None] + 900) * 3600 + (lon_bins[None, :] + 1800)
+        keep_cell = registry.contains(cell_grid_ids)
+        print(f"유효 그리드 필터: {keep_cell.sum()}/{keep_cell.size}개 셀 유지")
     
     # 시간 변수 처리: 숫자형 시간 데이터를 datetime 객체로 변환 후 문자열로 포맷팅
     times_raw = time_var[:]
@@ -63,6 +85,8 @@ def convert_nc_to_csv(nc_dataset, output_csv_path, data_variable_names):
             for lat_idx, lat_val in enumerate(lats):
                 current_lat = float(lat_val.item() if isinstance(lat_val, np.generic) else lat_val)
                 for lon_idx, lon_val in enumerate(lons):
+                    if keep_cell is not None and not keep_cell[lat_idx, lon_idx]:
+                        continue
                     current_lon = float(lon_val.item() if isinstance(lon_val, np.generic) else lon_val)
                     
                     # grid_id 계산
@@ -106,75 +130,138 @@ def convert_nc_to_csv(nc_dataset, output_csv_path, data_variable_names):
     
     print(f"성공적으로 변환 완료: {output_csv_path}")
 
-# CSV 파일을 저장할 기본 출력 디렉토리 설정
-# 기존 base_dir의 경로 구조를 참고하여 CSV 저장 경로를 설정합니다.
-base_dir = r'F:\Study\santa-close-ai\data-preprocess-hub\data\fuel'
-origin_dir = os.path.join(base_dir, 'raw')
-
-# 기본 CSV 출력 디렉토리가 없으면 생성
-csv_output_base_dir = os.path.join(base_dir, 'csv')
-os.makedirs(csv_output_base_dir, exist_ok=True)
-
-dfmc_dir = 'DFMC'
-fuel_dir = 'FUEL'
-lfmc_dir = 'LFMC'
-
-# --- 처리할 데이터셋 정보 정의 ---
-datasets_info = [
+DATASETS_INFO = [
     {
-        "subdir_name": dfmc_dir,
+        "subdir_name": 'DFMC',
         "variables_to_extract": ['DFMC_Foliage', 'DFMC_Wood']
     },
     {
-        "subdir_name": fuel_dir,
+        "subdir_name": 'FUEL',
         "variables_to_extract": ['Live_Leaf', 'Live_Wood', 'Dead_Foliage', 'Dead_Wood']
     },
     {
-        "subdir_name": lfmc_dir,
+        "subdir_name": 'LFMC',
         "variables_to_extract": ['LFMC', 'LFMC_low', 'LFMC_high']
     }
 ]
 
-# --- 각 데이터셋을 순회하며 CSV로 변환 ---
-for info in datasets_info:   
-    # 출력 CSV 경로 구성
-    # 예: F:\Study\santa-close-ai\data-preprocess-hub\data\fuel\csv\DFMC
-    subdir_name = info["subdir_name"]
-    csv_specific_subdir = os.path.join(csv_output_base_dir, subdir_name)
+def convert_nc_directory(nc_dir, csv_dir, data_variable_names, registry=None, cache=None, prefetch_depth=None):
+    """
+    디렉토리의 모든 NetCDF 파일을 같은 이름의 CSV 파일로 변환합니다.
 
+    :param nc_dir: NetCDF 파일 디렉토리 (예: data/fuel/raw/DFMC)
+    :param csv_dir: CSV 파일을 저장할 디렉토리 (예: data/fuel/csv/DFMC)
+    :param data_variable_names: CSV에 포함할 데이터 변수 이름 목록
+    :param registry: common.grid.GridRegistry (지정 시 유효 그리드에 속한 셀만 기록)
+    :param cache: common.cache.ConversionCache (지정 시 변환 결과를 캐시에서 재사용)
+    :param prefetch_depth: 변환 중 페이지 캐시로 미리 읽어 둘 다음 파일 수 (None이면 기본값, 0이면 순차)
+    """
     # CSV 파일을 저장할 특정 하위 디렉토리 생성 (이미 있으면 무시)
-    os.makedirs(csv_specific_subdir, exist_ok=True)
+    os.makedirs(csv_dir, exist_ok=True)
 
     # 원본 파일명에서 확장자 변경하여 CSV 파일명 생성
-    file_path = os.path.join(origin_dir, subdir_name)
-    file_list = os.listdir(file_path)
+    file_list = os.listdir(nc_dir)
     file_list_nc = [file for file in file_list if file.endswith(".nc")]
     # file_list_nc = [file for file in file_list if '2021_12' in file and file.endswith(".nc")] # .nc 확장자 명시적 확인 추가
     file_list_nc.reverse()
     # print(*file_list_nc, sep='\n')
 
-    for file_name in file_list_nc:
+    # netCDF4는 스레드 안전하지 않으므로 백그라운드에서는 파일 내용을 페이지 캐시에 올리기만 함
+    read_ahead_files = prefetch(file_list_nc, lambda file_name: read_ahead(os.path.join(nc_dir, file_name)),
+                                depth=prefetch_depth)
+    for file_name, fetch in read_ahead_files:
         csv_filename = os.path.splitext(file_name)[0] + '.csv'
         # print(csv_filename)
-        
+    
         # 최종 CSV 파일 전체 경로
-        output_csv_full_path = os.path.join(csv_specific_subdir, csv_filename)
+        output_csv_full_path = os.path.join(csv_dir, csv_filename)
         # print(output_csv_full_path)
-        
-        origin_filename = os.path.join(origin_dir, subdir_name, file_name)
+    
+        origin_filename = os.path.join(nc_dir, file_name)
         # print(origin_filename)
-        
-        try: # nc.Dataset 로딩 중 발생할 수 있는 오류 처리
+    
+        def convert():
             with nc.Dataset(origin_filename) as nc_ds: # with 문을 사용하여 자동 close 보장
                 convert_nc_to_csv(
                     nc_dataset=nc_ds,
                     output_csv_path=output_csv_full_path,
-                    data_variable_names=info["variables_to_extract"]
+                    data_variable_names=data_variable_names,
+                    registry=registry
                 )
+            return output_csv_full_path
+
+        try: # nc.Dataset 로딩 중 발생할 수 있는 오류 처리
+            fetch()  # 미리 읽기가 끝날 때까지 대기(파일이 없으면 FileNotFoundError)
+            with metrics.stage('convert', file=file_name) as st:
+                if cache is None:
+                    convert()
+                else:
+                    # 같은 원본/변수/그리드 목록으로 변환한 결과가 캐시에 있으면 변환 없이 복원
+                    params = {
+                        'variables': list(data_variable_names),
+                        'grid': registry.fingerprint if registry is not None else None
+                    }
+                    _, hit = cache.cached_csv('nc_to_csv', CACHE_VERSION, [origin_filename], params,
+                                              output_csv_full_path, convert)
+                    st.extra['cache'] = cache.last_status
+                    if hit:
+                        print(f"캐시에서 복원: {output_csv_full_path}")
+                st.add_input_file(origin_filename)
+                st.add_output_file(output_csv_full_path)
         except FileNotFoundError:
             print(f"오류: NetCDF 파일을 찾을 수 없습니다 - {origin_filename}")
         except Exception as e:
             print(f"오류: {origin_filename} 처리 중 예외 발생 - {e}")
 
+def main():
+    parser = argparse.ArgumentParser(description="연료(DFMC/FUEL/LFMC) NetCDF 파일을 grid_id 기준 CSV로 변환합니다.")
+    # 기존 base_dir의 경로 구조를 참고하여 CSV 저장 경로를 설정합니다. (raw/<데이터셋> -> csv/<데이터셋>)
+    parser.add_argument("--base-dir", type=str, default=os.path.join('.', 'data', 'fuel'),
+                        help="연료 데이터 기본 디렉토리 (raw/<데이터셋> -> csv/<데이터셋>, 기본값: ./data/fuel)")
+    parser.add_argument("--datasets", type=str, nargs='+', default=[info["subdir_name"] for info in DATASETS_INFO],
+                        help="변환할 데이터셋 하위 디렉토리 (기본값: DFMC FUEL LFMC)")
+    add_grid_arguments(parser)
+    add_cache_arguments(parser)
+    add_prefetch_arguments(parser)
+    args = parser.parse_args()
+
+    # PREPROCESS_METRICS_LOG / PREPROCESS_PROFILE 환경 변수로 지표 기록 활성화
+    metrics.configure_from_env()
+
+    # 유효 그리드 목록(KOREA_GRID_FILE 또는 sara/grid_address)이 있으면 해당 셀만 변환
+    registry = registry_from_args(args)
+    if registry is None:
+        print("경고: 유효 그리드 필터 없이 모든 셀을 변환합니다.")
+    cache = cache_from_args(args)
+
+    origin_dir = os.path.join(args.base_dir, 'raw')
+
+    # 기본 CSV 출력 디렉토리가 없으면 생성
+    csv_output_base_dir = os.path.join(args.base_dir, 'csv')
+    os.makedirs(csv_output_base_dir, exist_ok=True)
+
+    # --- 각 데이터셋을 순회하며 CSV로 변환 ---
+    for info in DATASETS_INFO:
+        subdir_name = info["subdir_name"]
+        if subdir_name not in args.datasets:
+            continue
+
+        # 출력 CSV 경로 구성
+        # 예: ./data/fuel/csv/DFMC
+        convert_nc_directory(
+            os.path.join(origin_dir, subdir_name),
+            os.path.join(csv_output_base_dir, subdir_name),
+            info["variables_to_extract"],
+            registry=registry,
+            cache=cache,
+            prefetch_depth=args.prefetch
+        )
+
+    if cache is not None:
+        for line in cache.report():
+            print(line)
+
+    print("\n모든 NetCDF 파일의 CSV 변환 작업이 완료되었습니다.")
 
-print("\n모든 NetCDF 파일의 CSV 변환 작업이 완료되었습니다.")
+if __name__ == '__main__':
+    main()
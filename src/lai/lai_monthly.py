@@ -0,0 +1,181 @@
+import os
+import sys
+import argparse
+import numpy as np
+import netCDF4 as nc
+import pandas as pd
+import pyarrow.parquet as pq
+
+# 공용 모듈(src/common) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common import metrics
+from common.grid import GridRaster, KOREA_EXTENT, latlon_to_grid_id, add_grid_arguments, registry_from_args
+from common.schema import compact_frame, to_table, cast_table
+
+# 원본 변수 → 출력 열 이름
+DEFAULT_VARIABLES = {
+    'lai_lv': 'lai_low',
+    'lai_hv': 'lai_high',
+}
+# 좌표값의 부동소수점 오차(예: 38.9 → 38.8999999)로 다른 셀에 배정되지 않도록 반올림할 자릿수
+COORD_DECIMALS = 6
+
+def find_variable(nc_dataset, candidates, kind):
+    """데이터셋에서 후보 이름 중 처음 존재하는 변수 이름을 반환합니다."""
+    for name in candidates:
+        if name in nc_dataset.variables:
+            return name
+    raise ValueError(f"{kind} 변수({', '.join(candidates)})를 찾을 수 없습니다: {nc_dataset.filepath()}")
+
+def read_dates(time_var):
+    """
+    시간 변수를 datetime64[D] 배열로 변환합니다.
+
+    :param time_var: netCDF4 시간 변수 (units 속성 필요)
+    """
+    calendar = time_var.calendar if 'calendar' in time_var.ncattrs() else 'standard'
+    datetimes = nc.num2date(time_var[:], units=time_var.units, calendar=calendar,
+                            only_use_cftime_datetimes=False, only_use_python_datetimes=True)
+    return np.array(datetimes, dtype='datetime64[D]')
+
+def build_pixel_index(lats, lons, raster, registry=None):
+    """
+    (위도, 경도) 픽셀 → 그리드 셀 대응표를 한 번 계산합니다.
+
+    :param lats: 위도 좌표 배열
+    :param lons: 경도 좌표 배열
+    :param raster: common.grid.GridRaster
+    :param registry: common.grid.GridRegistry (지정 시 유효 그리드 밖 픽셀 제외)
+    :return: (유지할 픽셀의 평탄화 위치, 픽셀별 셀 번호, 셀별 픽셀 수, 셀 grid_id)
+    """
+    lats = np.round(np.asarray(lats, dtype=np.float64), COORD_DECIMALS)
+    lons = np.round(np.asarray(lons, dtype=np.float64), COORD_DECIMALS)
+    grid_ids = latlon_to_grid_id(lats[:, None], lons[None, :]).ravel()
+
+    keep = raster.flat_index(grid_ids) >= 0
+    if registry is not None:
+        keep &= registry.contains(grid_ids)
+    pixels = np.flatnonzero(keep)
+
+    # 픽셀이 하나라도 있는 셀만 0..n_cells-1 번호를 부여 (grid_id 오름차순)
+    cell_grid_ids, pixel_cell = np.unique(grid_ids[pixels], return_inverse=True)
+    pixel_counts = np.bincount(pixel_cell, minlength=len(cell_grid_ids))
+    return pixels, pixel_cell, pixel_counts, cell_grid_ids
+
+def chunk_means(blocks, pixels, pixel_cell, pixel_counts):
+    """
+    시간 구간 하나의 여러 변수에 대해 셀별 픽셀 평균을 np.bincount 한 번으로 계산합니다.
+
+    :param blocks: 변수별 (시간, 위도, 경도) 배열 목록
+    :return: (시간, 변수, 셀) 평균 배열
+    """
+    n_time = blocks[0].shape[0]
+    n_cells = len(pixel_counts)
+    # (시간, 변수, 픽셀) 순서로 쌓은 뒤 (시간·변수) 조합마다 셀 번호를 이어 붙인 키로 합산
+    values = np.stack([block.reshape(n_time, -1)[:, pixels] for block in blocks], axis=1)
+    n_series = n_time * len(blocks)
+    keys = (np.arange(n_series, dtype=np.int64)[:, None] * n_cells + pixel_cell[None, :]).ravel()
+    sums = np.bincount(keys, weights=values.ravel(), minlength=n_series * n_cells)
+    return sums.reshape(n_time, len(blocks), n_cells) / pixel_counts
+
+def read_block(variable, start, stop):
+    """변수의 [start, stop) 시간 구간을 float32로 읽고 NaN·결측값을 0으로 대체합니다."""
+    block = np.ma.filled(variable[start:stop].astype(np.float32), 0.0)
+    return np.nan_to_num(block, nan=0.0, copy=False)
+
+def iter_monthly_frames(nc_path, variables=DEFAULT_VARIABLES, extent=KOREA_EXTENT, registry=None, chunk_size=12):
+    """
+    LAI NetCDF를 시간 축 chunk_size개 단위로 읽어 (date, grid_id)별 평균 DataFrame을 생성합니다.
+
+    메모리 사용량은 시간 구간 하나(chunk_size × 위도 × 경도 × 변수 수)에만 비례합니다.
+
+    :param variables: 원본 변수 → 출력 열 이름 딕셔너리
+    :param chunk_size: 한 번에 읽을 시간 단계 수
+    :return: 시간 구간마다 date, grid_id, 출력 열의 DataFrame을 생성
+    """
+    raster = GridRaster(registry.raster.extent if registry is not None else extent)
+    with nc.Dataset(nc_path) as ds:
+        time_name = find_variable(ds, ['valid_time', 'time'], '시간')
+        lat_name = find_variable(ds, ['latitude', 'lat'], '위도')
+        lon_name = find_variable(ds, ['longitude', 'lon'], '경도')
+        missing = [name for name in variables if name not in ds.variables]
+        if missing:
+            raise ValueError(f"데이터 변수가 없습니다: {missing} ({nc_path})")
+
+        dates = read_dates(ds.variables[time_name])
+        pixels, pixel_cell, pixel_counts, cell_grid_ids = build_pixel_index(
+            ds.variables[lat_name][:], ds.variables[lon_name][:], raster, registry)
+        print(f"픽셀 {len(pixels)}개 → 그리드 {len(cell_grid_ids)}개, 시간 단계 {len(dates)}개")
+
+        n_cells = len(cell_grid_ids)
+        for start in range(0, len(dates), chunk_size):
+            stop = min(start + chunk_size, len(dates))
+            blocks = [read_block(ds.variables[name], start, stop) for name in variables]
+            means = chunk_means(blocks, pixels, pixel_cell, pixel_counts)
+
+            data = {
+                'date': np.repeat(dates[start:stop], n_cells),
+                'grid_id': np.tile(cell_grid_ids, stop - start).astype(np.int64),
+            }
+            for i, column in enumerate(variables.values()):
+                data[column] = means[:, i, :].ravel().astype(np.float32)
+            yield pd.DataFrame(data)
+
+def write_monthly(frames, output_path):
+    """
+    DataFrame들을 CSV 또는 Parquet(확장자 기준, 공용 dtype 정책 적용) 파일 하나에 순서대로 추가합니다.
+
+    :return: 기록한 행 수
+    """
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    is_parquet = output_path.lower().endswith('.parquet')
+    writer = None
+    rows = 0
+    try:
+        for i, df in enumerate(frames):
+            rows += len(df)
+            if is_parquet:
+                table = to_table(df)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema, compression='zstd')
+                else:
+                    table = cast_table(table, writer.schema)
+                writer.write_table(table)
+            else:
+                compact_frame(df).to_csv(output_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False,
+                                         date_format='%Y-%m-%d')
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Copernicus LAI NetCDF를 grid_id·월별 lai_low/lai_high 평균으로 변환합니다.")
+    parser.add_argument("--input-file", type=str, required=True,
+                        help="LAI 원본 NetCDF 파일 (예: sara/lai_low_high/ed48f79bc88a221192613d5f105743ed.nc)")
+    parser.add_argument("--output-file", type=str, required=True,
+                        help="출력 파일 (.parquet 또는 .csv, 예: lai_low_high_monthly.parquet)")
+    parser.add_argument("--chunk-size", type=int, default=12,
+                        help="한 번에 읽을 시간 단계 수 (기본값: 12)")
+    add_grid_arguments(parser)
+    metrics.add_metrics_arguments(parser)
+    args = parser.parse_args()
+    metrics.configure_from_args(args)
+
+    registry = registry_from_args(args)
+    if registry is None:
+        print(f"경고: 유효 그리드 필터 없이 범위 {KOREA_EXTENT} 안의 모든 셀을 집계합니다.")
+
+    with metrics.stage('lai_monthly') as st:
+        frames = iter_monthly_frames(args.input_file, registry=registry, chunk_size=args.chunk_size)
+        rows = write_monthly(frames, args.output_file)
+        st.add_input_file(args.input_file)
+        st.rows_out = rows
+        st.add_output_file(args.output_file)
+    print(f"저장 완료: {args.output_file} ({rows}행)")
+
+if __name__ == '__main__':
+    main()
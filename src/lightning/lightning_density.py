@@ -0,0 +1,260 @@
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# 공용 모듈(src/common) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common import metrics
+from common.grid import (GridRaster, KOREA_EXTENT, APPROX_CELL_AREA_KM2, latlon_to_grid_id,
+                         add_grid_arguments, registry_from_args)
+from common.schema import compact_frame, to_table, cast_table, write_frame
+
+# 기상청 낙뢰관측 원본(lightning_KOR.parquet) 열 이름
+DEFAULT_COLUMNS = {
+    'time': '일시',
+    'lat': '위도',
+    'lon': '경도',
+    'intensity': '낙뢰강도',
+    'kind': '낙뢰종류',
+}
+# 대지방전=1, 구름방전=0
+CLOUD_TO_GROUND = 1
+# 강도구간 경계(kA, 절댓값): 전체 분포의 25/50/75% 분위수 (sara/lightning_density/README.md 참고)
+DEFAULT_INTENSITY_BINS = [7.5, 12.8, 21.6]
+DAYS_PER_YEAR = 366
+
+def iter_strike_batches(parquet_path, columns, batch_size=1_000_000):
+    """
+    낙뢰 원본 Parquet 파일을 row group 단위 배치로 읽습니다.
+
+    :param parquet_path: 원본 Parquet 파일 경로
+    :param columns: 역할 → 열 이름 딕셔너리 (time, lat, lon, intensity, kind)
+    :param batch_size: 배치당 최대 행 수
+    :return: 역할 → numpy 배열 딕셔너리를 배치마다 생성
+    """
+    parquet_file = pq.ParquetFile(parquet_path)
+    available = set(parquet_file.schema_arrow.names)
+    read_columns = [name for name in columns.values() if name in available]
+    missing = [name for role, name in columns.items() if name not in available and role != 'kind']
+    if missing:
+        raise ValueError(f"필수 열이 없습니다: {missing} (파일 열: {sorted(available)})")
+
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=read_columns):
+        arrays = {}
+        for role, name in columns.items():
+            if name not in available:
+                continue
+            column = batch.column(batch.schema.get_field_index(name))
+            if role == 'time':
+                if pa.types.is_timestamp(column.type) or pa.types.is_date(column.type):
+                    arrays[role] = column.to_numpy(zero_copy_only=False).astype('datetime64[D]')
+                else:
+                    arrays[role] = pd.to_datetime(column.to_numpy(zero_copy_only=False)).values.astype('datetime64[D]')
+            else:
+                arrays[role] = column.to_numpy(zero_copy_only=False)
+        yield arrays
+
+def intensity_levels(intensity, bins=DEFAULT_INTENSITY_BINS):
+    """
+    낙뢰강도(kA)를 강도구간(0 ~ len(bins))으로 변환합니다. 극성 구분 없이 절댓값을 사용합니다.
+    """
+    return np.searchsorted(np.asarray(bins, dtype=np.float64), np.abs(np.asarray(intensity, dtype=np.float64)),
+                           side='right')
+
+def estimate_intensity_bins(parquet_path, columns, quantiles=(0.25, 0.5, 0.75), max_ka=1000.0,
+                            resolution=0.1, batch_size=1_000_000):
+    """
+    대지방전 낙뢰강도(절댓값)의 분위수를 고정 폭 히스토그램으로 한 번 스트리밍하여 추정합니다.
+
+    :param resolution: 히스토그램 칸 폭(kA), 추정 오차의 상한
+    :return: 분위수 경계 목록(kA)
+    """
+    edges = np.arange(0.0, max_ka + resolution, resolution)
+    hist = np.zeros(len(edges) - 1, dtype=np.int64)
+    for arrays in iter_strike_batches(parquet_path, columns, batch_size):
+        intensity = np.abs(arrays['intensity'].astype(np.float64))
+        if 'kind' in arrays:
+            intensity = intensity[arrays['kind'] == CLOUD_TO_GROUND]
+        # max_ka 이상은 마지막 칸에 포함
+        idx = np.minimum((intensity / resolution).astype(np.int64), len(hist) - 1)
+        hist += np.bincount(idx[idx >= 0], minlength=len(hist))
+
+    cumulative = np.cumsum(hist)
+    if cumulative[-1] == 0:
+        raise ValueError("분위수를 추정할 대지방전 데이터가 없습니다")
+    positions = np.searchsorted(cumulative, np.asarray(quantiles) * cumulative[-1], side='left')
+    return [round(float(edges[p + 1]), 3) for p in positions]
+
+def accumulate_strike_counts(parquet_path, columns, intensity_bins=DEFAULT_INTENSITY_BINS, min_level=1,
+                             extent=KOREA_EXTENT, registry=None, batch_size=1_000_000):
+    """
+    낙뢰 원본을 배치 단위로 읽어 (날짜, 그리드)별 낙뢰 횟수를 집계합니다.
+
+    연도마다 (366 × 범위 내 셀 수) int32 배열 하나에 np.bincount로 누적하므로,
+    메모리는 전체 레코드 수와 관계없이 관측 연도 수에만 비례합니다.
+
+    :param min_level: 집계에 포함할 최소 강도구간 (기본값: 1, 하위 25% 제외)
+    :param registry: common.grid.GridRegistry (지정 시 유효 그리드 밖 낙뢰 제외)
+    :return: (연도 → (366, 셀 수) 횟수 배열 딕셔너리, GridRaster, 통계 딕셔너리)
+    """
+    raster = GridRaster(registry.raster.extent if registry is not None else extent)
+    counts = {}
+    stats = {'rows_in': 0, 'rows_kept': 0}
+
+    for arrays in iter_strike_batches(parquet_path, columns, batch_size):
+        n = len(arrays['time'])
+        stats['rows_in'] += n
+
+        keep = np.ones(n, dtype=bool)
+        if 'kind' in arrays:
+            keep &= arrays['kind'] == CLOUD_TO_GROUND
+        keep &= intensity_levels(arrays['intensity'], intensity_bins) >= min_level
+        keep &= ~np.isnat(arrays['time'])
+
+        grid_ids = latlon_to_grid_id(arrays['lat'][keep].astype(np.float64), arrays['lon'][keep].astype(np.float64))
+        flat = raster.flat_index(grid_ids)
+        days = arrays['time'][keep]
+        inside = flat >= 0
+        if registry is not None:
+            inside &= registry.contains(grid_ids)
+        flat, days = flat[inside], days[inside]
+        stats['rows_kept'] += len(flat)
+        if len(flat) == 0:
+            continue
+
+        years = days.astype('datetime64[Y]')
+        day_of_year = (days - years).astype(np.int64)
+        year_values = years.astype(np.int64) + 1970
+        for year in np.unique(year_values):
+            sel = year_values == year
+            if year not in counts:
+                counts[year] = np.zeros((DAYS_PER_YEAR, raster.size), dtype=np.int32)
+            keys = day_of_year[sel] * raster.size + flat[sel]
+            counts[year] += np.bincount(keys, minlength=DAYS_PER_YEAR * raster.size).astype(np.int32).reshape(
+                DAYS_PER_YEAR, raster.size)
+
+    return counts, raster, stats
+
+def counts_to_frame(year, year_counts, raster, cell_area='fixed'):
+    """
+    한 해의 (날짜, 셀) 횟수 배열에서 낙뢰가 있었던 행만 밀도 테이블로 변환합니다.
+
+    :param cell_area: 'fixed'(123.21 km²) 또는 'latitude'(위도별 실제 셀 면적)
+    :return: grid_id, date, count, lightning_density 열의 DataFrame
+    """
+    day_idx, cell_idx = np.nonzero(year_counts)
+    grid_ids = raster.grid_ids().ravel()[cell_idx]
+    count = year_counts[day_idx, cell_idx]
+    if cell_area == 'latitude':
+        # 범위별로 한 번 계산해 둔 셀 면적 표에서 조회
+        area = raster.cell_areas().ravel()[cell_idx]
+    else:
+        area = APPROX_CELL_AREA_KM2
+
+    dates = np.datetime64(f'{year:04d}-01-01', 'D') + day_idx.astype('timedelta64[D]')
+    df = pd.DataFrame({
+        'grid_id': grid_ids.astype(np.int64),
+        'date': dates,
+        'count': count.astype(np.int64),
+        'lightning_density': count / area,
+    })
+    # np.nonzero는 행(날짜) 우선 순서이고 셀 위치는 grid_id와 같은 순서이므로 이미 (date, grid_id) 정렬 상태
+    return df
+
+def write_density(counts, raster, output_path, cell_area='fixed'):
+    """
+    연도별 집계 결과를 CSV 또는 Parquet(확장자 기준) 파일 하나로 연도 순서대로 기록합니다.
+    열 형식은 공용 dtype 정책(common.schema)을 따릅니다(grid_id int32, date date32, count int32, 밀도 float32).
+
+    :return: 기록한 행 수
+    """
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    is_parquet = output_path.lower().endswith('.parquet')
+    writer = None
+    rows = 0
+    try:
+        for i, year in enumerate(sorted(counts)):
+            df = counts_to_frame(year, counts[year], raster, cell_area)
+            rows += len(df)
+            if is_parquet:
+                table = to_table(df)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema, compression='zstd')
+                else:
+                    table = cast_table(table, writer.schema)
+                writer.write_table(table)
+            else:
+                compact_frame(df).to_csv(output_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False,
+                                         date_format='%Y-%m-%d')
+        if not counts:
+            empty = pd.DataFrame({
+                'grid_id': np.empty(0, dtype=np.int64),
+                'date': np.empty(0, dtype='datetime64[D]'),
+                'count': np.empty(0, dtype=np.int64),
+                'lightning_density': np.empty(0, dtype=np.float64),
+            })
+            write_frame(empty, output_path)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="기상청 낙뢰관측 원본을 grid_id·일자별 낙뢰 밀도(회/km²/day)로 집계합니다.")
+    parser.add_argument("--input-file", type=str, required=True,
+                        help="낙뢰 원본 Parquet 파일 (예: lightning_KOR.parquet)")
+    parser.add_argument("--output-file", type=str, required=True,
+                        help="출력 파일 (.csv 또는 .parquet, 예: lightning_density_KOR.csv)")
+    parser.add_argument("--intensity-bins", type=float, nargs='+', default=DEFAULT_INTENSITY_BINS,
+                        help="강도구간 경계(kA, 기본값: 7.5 12.8 21.6)")
+    parser.add_argument("--estimate-bins", action='store_true',
+                        help="강도구간 경계를 원본 데이터의 25/50/75%% 분위수로 추정 (원본을 한 번 더 읽음)")
+    parser.add_argument("--min-level", type=int, default=1,
+                        help="포함할 최소 강도구간 (기본값: 1, 하위 25%% 제외)")
+    parser.add_argument("--cell-area", type=str, choices=['fixed', 'latitude'], default='fixed',
+                        help="셀 면적: fixed(123.21 km²) 또는 latitude(위도별 실제 면적) (기본값: fixed)")
+    parser.add_argument("--batch-size", type=int, default=1_000_000,
+                        help="한 번에 읽을 행 수 (기본값: 1000000)")
+    for role, name in DEFAULT_COLUMNS.items():
+        parser.add_argument(f"--{role}-col", type=str, default=name,
+                            help=f"{role} 열 이름 (기본값: {name})")
+    add_grid_arguments(parser)
+    metrics.add_metrics_arguments(parser)
+    args = parser.parse_args()
+    metrics.configure_from_args(args)
+
+    columns = {role: getattr(args, f"{role}_col") for role in DEFAULT_COLUMNS}
+    registry = registry_from_args(args)
+    if registry is None:
+        print(f"경고: 유효 그리드 필터 없이 범위 {KOREA_EXTENT} 안의 모든 셀을 집계합니다.")
+
+    intensity_bins = args.intensity_bins
+    if args.estimate_bins:
+        with metrics.stage('estimate_bins') as st:
+            intensity_bins = estimate_intensity_bins(args.input_file, columns, batch_size=args.batch_size)
+            st.add_input_file(args.input_file)
+        print(f"추정한 강도구간 경계(kA): {intensity_bins}")
+
+    with metrics.stage('accumulate') as st:
+        counts, raster, stats = accumulate_strike_counts(
+            args.input_file, columns, intensity_bins, args.min_level, registry=registry, batch_size=args.batch_size)
+        st.add_input_file(args.input_file)
+        st.rows_in = stats['rows_in']
+        st.rows_out = stats['rows_kept']
+    print(f"낙뢰 {stats['rows_in']}건 중 {stats['rows_kept']}건 집계 (대지방전, 강도구간 {args.min_level} 이상)")
+
+    with metrics.stage('write') as st:
+        rows = write_density(counts, raster, args.output_file, args.cell_area)
+        st.rows_out = rows
+        st.add_output_file(args.output_file)
+    print(f"저장 완료: {args.output_file} ({rows}행)")
+
+if __name__ == '__main__':
+    main()
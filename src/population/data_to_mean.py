@@ -1,15 +1,27 @@
 # import glob
-# import os
+import os
+import sys
 import argparse
 from pathlib import Path
 import pandas as pd
 
-def process_csv_files_in_directory(input_directory_path: Path, output_directory_path: Path):
+# 공용 모듈(src/common) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.grid import area_weighted_aggregate, lookup_cell_area
+
+def process_csv_files_in_directory(input_directory_path: Path, output_directory_path: Path, area_total: bool = False,
+                                   area_summary_file: Path = None):
     """
     지정된 입력 디렉터리의 모든 CSV 파일을 처리합니다.
     각 파일에 대해 'grid_id'를 기준으로 데이터를 그룹화하고, 'value'의 평균을 계산하며,
     각 그룹의 첫 번째 'date' 값을 유지합니다.
     처리된 데이터는 지정된 출력 디렉터리에 원본 파일명과 동일하게 저장됩니다.
+
+    area_total이 True이면 평균 밀도(명/km²)에 위도별 실제 셀 면적(km²)을 곱한
+    셀 전체 값(예: 인구 수)을 'value_total' 열로 추가합니다.
+
+    area_summary_file을 지정하면 날짜별로 모든 셀의 면적 가중 평균 밀도(value_area_mean)와
+    면적 가중 합(value_area_total, 예: 전체 인구 수)을 계산해 해당 CSV 파일로 저장합니다.
     """
     # OS에 독립적인 경로 생성을 위해 os.path.join 사용
     # 사용자가 'data\population\grid'와 같이 입력해도 올바르게 처리
@@ -32,6 +44,7 @@ def process_csv_files_in_directory(input_directory_path: Path, output_directory_
         return
 
     print(f"총 {len(csv_files)}개의 CSV 파일을 처리합니다.")
+    summaries = []
 
     for file_path in csv_files:
         print(f"처리 중인 입력 파일: {file_path}")
@@ -59,18 +72,37 @@ def process_csv_files_in_directory(input_directory_path: Path, output_directory_
             # 출력 열 순서 지정: grid_id, value, date
             processed_df = processed_df[['grid_id', 'value', 'date']]
 
+            # 면적 가중 합: 밀도 × 셀 면적 (셀 면적은 위도에 따라 줄어듦)
+            if area_total:
+                processed_df['value_total'] = processed_df['value'].values * lookup_cell_area(processed_df['grid_id'].values)
+
             # 처리된 데이터프레임을 출력 디렉터리에 저장
             output_file_path = output_directory_path / file_path.name
             # index=False 옵션으로 pandas 인덱스는 저장하지 않음
             processed_df.to_csv(output_file_path, index=False, encoding='utf-8')
             print(f"성공: '{output_file_path}' 파일로 저장했습니다.")
 
+            # 날짜별 면적 가중 평균/합 (셀마다 면적이 다르므로 단순 평균 대신 면적으로 가중)
+            if area_summary_file is not None:
+                keys = processed_df['date'].astype(str).values
+                grid_ids = processed_df['grid_id'].values
+                dates, area_mean = area_weighted_aggregate(keys, processed_df['value'].values, grid_ids, how='mean')
+                _, area_total_values = area_weighted_aggregate(keys, processed_df['value'].values, grid_ids, how='sum')
+                summaries.append(pd.DataFrame({'date': dates, 'value_area_mean': area_mean,
+                                               'value_area_total': area_total_values}))
+
 
         except pd.errors.EmptyDataError:
             print(f"알림: '{file_path}' 파일이 비어 있거나 CSV 형식이 아니어서 건너뜁니다.")
         except Exception as e:
             print(f"오류: '{file_path}' 파일 처리 중 오류가 발생했습니다: {e}")
 
+    if area_summary_file is not None and summaries:
+        summary_df = pd.concat(summaries, ignore_index=True)
+        area_summary_file.parent.mkdir(parents=True, exist_ok=True)
+        summary_df.to_csv(area_summary_file, index=False, encoding='utf-8')
+        print(f"성공: 날짜별 면적 가중 요약 {len(summary_df)}행을 '{area_summary_file}' 파일로 저장했습니다.")
+
 def main():
     parser = argparse.ArgumentParser(
         description="입력 디렉토리 내 CSV 파일들을 처리하여 grid_id 기준으로 value 평균을 계산하고, 결과를 자동으로 생성된 출력 디렉토리에 저장합니다. 출력 디렉토리는 입력 디렉토리의 부모에 'aggregated' 이름으로 생성됩니다."
@@ -80,6 +112,16 @@ def main():
         type=str, 
         help="CSV 파일들이 포함된 입력 디렉토리 경로 (예: data/population/grid)"
     )
+    parser.add_argument(
+        "--area-total",
+        action="store_true",
+        help="평균 밀도에 위도별 셀 면적(km²)을 곱한 셀 전체 값(value_total) 열 추가"
+    )
+    parser.add_argument(
+        "--area-summary-file",
+        type=str,
+        help="날짜별 면적 가중 평균 밀도와 면적 가중 합(전체 값)을 저장할 CSV 경로 (출력 디렉토리 밖에 지정)"
+    )
     args = parser.parse_args()
 
     input_dir = Path(args.input_directory)
@@ -95,7 +137,12 @@ def main():
     print(f"입력 디렉터리: '{input_dir}'")
     print(f"자동 생성된 출력 디렉터리: '{output_dir}'")
 
-    process_csv_files_in_directory(input_dir, output_dir)
+    process_csv_files_in_directory(
+        input_dir,
+        output_dir,
+        area_total=args.area_total,
+        area_summary_file=Path(args.area_summary_file) if args.area_summary_file else None,
+    )
 
     print("모든 파일 처리가 완료되었습니다.")
 
@@ -1,5 +1,6 @@
 import os
 import csv
+import argparse
 
 def extract_and_save_large_csv(input_csv_path, output_csv_path, x_min, x_max, y_min, y_max):
     """
@@ -71,20 +72,40 @@ def extract_and_save_large_csv(input_csv_path, output_csv_path, x_min, x_max, y_
     except Exception as e:
         print(f"처리 중 오류가 발생했습니다: {e}")
 
-base_dir = os.path.join('.', 'data', 'population')
-input_dir = os.path.join(base_dir, 'csv')
-file_list = os.listdir(input_dir)
-file_list_csv = [file for file in file_list if file.endswith(".csv")]
+def filter_directory(input_dir, output_dir, x_min=124, x_max=132, y_min=33, y_max=39):
+    """
+    입력 디렉토리의 모든 CSV 파일에서 좌표 범위 안의 행만 추출하여 출력 디렉토리에 저장합니다.
+
+    :param input_dir: tif_to_csv.py가 생성한 CSV 파일(x, y, value) 디렉토리
+    :param output_dir: 필터링된 CSV를 저장할 디렉토리
+    :param x_min, x_max, y_min, y_max: 경도/위도 범위 (기본값: 한국 범위)
+    """
+    file_list = os.listdir(input_dir)
+    file_list_csv = [file for file in file_list if file.endswith(".csv")]
+
+    # print ("file_list_csv:\n{}".format(file_list_csv))
+
+    os.makedirs(output_dir, exist_ok=True) # Create output directory if it doesn't exist
+
+    for input_file_name in file_list_csv:
+        org_file = os.path.join(input_dir, input_file_name)
+        out_file = os.path.join(output_dir, input_file_name)
+        # print("Filter {} => {}".format(org_file, out_file))
 
-# print ("file_list_csv:\n{}".format(file_list_csv))
+        extract_and_save_large_csv(org_file, out_file, x_min, x_max, y_min, y_max)
 
-output_dir = os.path.join(base_dir, 'filtered') # Define output directory
-os.makedirs(output_dir, exist_ok=True) # Create output directory if it doesn't exist
+def main():
+    parser = argparse.ArgumentParser(description="인구 CSV 파일에서 좌표 범위 안의 행만 추출합니다.")
+    parser.add_argument("--base-dir", type=str, default=os.path.join('.', 'data', 'population'),
+                        help="인구 데이터 기본 디렉토리 (기본값: ./data/population, csv -> filtered)")
+    parser.add_argument("--bounds", type=float, nargs=4, default=[124, 132, 33, 39],
+                        metavar=('X_MIN', 'X_MAX', 'Y_MIN', 'Y_MAX'),
+                        help="추출할 경도/위도 범위 (기본값: 124 132 33 39)")
+    args = parser.parse_args()
 
-# Example usage:
-for input_file_name in file_list_csv:
-    org_file = os.path.join(input_dir, input_file_name)
-    out_file = os.path.join(output_dir, input_file_name)
-    # print("Filter {} => {}".format(org_file, out_file))
+    input_dir = os.path.join(args.base_dir, 'csv')
+    output_dir = os.path.join(args.base_dir, 'filtered') # Define output directory
+    filter_directory(input_dir, output_dir, *args.bounds)
 
-    extract_and_save_large_csv(org_file, out_file, 124, 132, 33, 39)
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 import os
 import csv
+import argparse
 import numpy as np
 import re # 정규 표현식 모듈 추가
 
@@ -84,27 +85,41 @@ def transform_geocode_to_grid_id(input_csv_path, output_csv_path):
     except Exception as e:
         print(f"An unexpected error occurred while processing {input_csv_path}: {e}")
 
-base_dir = os.path.join('.', 'data', 'population')
-input_dir = os.path.join(base_dir, 'filtered') # Define input directory
-if not os.path.isdir(input_dir):
-    print(f"Error: Input directory not found at {input_dir}")
-    file_list_csv = [] # 빈 리스트로 초기화하여 이후 로직에서 오류 방지
-else:
+def transform_directory(input_dir, output_dir):
+    """
+    Transforms every CSV file in input_dir (x, y, value) to grid IDs in output_dir.
+    """
+    if not os.path.isdir(input_dir):
+        print(f"Error: Input directory not found at {input_dir}")
+        return
+
     file_list = os.listdir(input_dir)
     file_list_csv = [file for file in file_list if file.endswith(".csv")]
 
-# print ("file_list_csv:\n{}".format(file_list_csv))
+    # print ("file_list_csv:\n{}".format(file_list_csv))
+
+    os.makedirs(output_dir, exist_ok=True) # Create output directory if it doesn't exist
 
-output_dir = os.path.join(base_dir, 'grid') # Define output directory
-os.makedirs(output_dir, exist_ok=True) # Create output directory if it doesn't exist
+    if not file_list_csv:
+        print(f"No CSV files found in {input_dir} to process.")
+        return
 
-# Example usage:
-if not file_list_csv:
-    print(f"No CSV files found in {input_dir} to process.")
-else:
     for input_file_name in file_list_csv:
         org_file = os.path.join(input_dir, input_file_name)
         out_file = os.path.join(output_dir, input_file_name)
         print("Transform {} => {}".format(org_file, out_file))
 
         transform_geocode_to_grid_id(org_file, out_file)
+
+def main():
+    parser = argparse.ArgumentParser(description="Transforms population geocodes (x, y) to grid IDs.")
+    parser.add_argument("--base-dir", type=str, default=os.path.join('.', 'data', 'population'),
+                        help="Population data directory (default: ./data/population, filtered -> grid)")
+    args = parser.parse_args()
+
+    input_dir = os.path.join(args.base_dir, 'filtered') # Define input directory
+    output_dir = os.path.join(args.base_dir, 'grid') # Define output directory
+    transform_directory(input_dir, output_dir)
+
+if __name__ == '__main__':
+    main()
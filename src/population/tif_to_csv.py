@@ -1,9 +1,20 @@
 import os
+import sys
+import argparse
 import rasterio
+from rasterio.windows import bounds as window_bounds
 import numpy as np
 import pandas as pd
 import csv # Import the csv module for writing
 
+# Add the shared module path (src/common)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.grid import load_registry
+from common.cache import add_cache_arguments, cache_from_args
+
+# Bump when the CSV output of tif_to_csv_memory_efficient changes, to invalidate cached results
+CACHE_VERSION = 1
+
 def tif_to_csv(tif_filepath, csv_filepath):
     """
     Converts a TIF image to a CSV file.
@@ -29,12 +40,14 @@ def tif_to_csv(tif_filepath, csv_filepath):
     
     df.to_csv(csv_filepath, index=False)
 
-def tif_to_csv_memory_efficient(tif_filepath, csv_filepath):
+def tif_to_csv_memory_efficient(tif_filepath, csv_filepath, registry=None):
     """
     Converts a TIF image to a CSV file.
 
         tif_filepath (str): The file path to the input TIF image.
         csv_filepath (str): The file path to the output CSV file.
+        registry (GridRegistry): If given, only pixels inside valid grid cells are written,
+            and blocks outside the registry bounds are skipped without being read.
     """
     print(f"Converting {tif_filepath} to {csv_filepath}")
     with rasterio.open(tif_filepath) as src:
@@ -49,6 +62,13 @@ def tif_to_csv_memory_efficient(tif_filepath, csv_filepath):
 
             # Iterate over blocks (windows)
             for ji, window in src.block_windows():
+                # Skip blocks that do not overlap the valid grid cells
+                if registry is not None:
+                    left, bottom, right, top = window_bounds(window, src.transform)
+                    west, east, south, north = registry.bounds
+                    if right < west or left > east or top < south or bottom > north:
+                        continue
+
                 # Read data for the current window, handle nodata with masked=True
                 data = src.read(1, window=window, masked=True)
 
@@ -65,7 +85,9 @@ def tif_to_csv_memory_efficient(tif_filepath, csv_filepath):
                 x, y = window_transform * (cols, rows)
 
                 # Find valid data points (where data is not masked)
-                valid_mask = ~data.mask
+                valid_mask = ~np.ma.getmaskarray(data)
+                if registry is not None:
+                    valid_mask &= registry.contains_latlon(y, x)
 
                 # Prepare and write rows for valid data points in this block
                 rows_to_write = zip(x[valid_mask], y[valid_mask], data[valid_mask].data)
@@ -73,26 +95,73 @@ def tif_to_csv_memory_efficient(tif_filepath, csv_filepath):
 
     print(f"Conversion complete for {os.path.basename(tif_filepath)}")
 
-base_dir = os.path.join('.', 'data', 'population')
-input_dir = os.path.join(base_dir, 'raw') # Define input directory
-file_list = os.listdir(input_dir)
-file_list_tif = [file for file in file_list if file.endswith(".tif")]
-
-# print ("file_list_tif:\n{}".format(file_list_tif))
-
-output_dir = os.path.join(base_dir, 'csv') # Define output directory
-os.makedirs(output_dir, exist_ok=True) # Create output directory if it doesn't exist
-
-# Example usage:
-for input_file_name in file_list_tif:
-    tif_file = os.path.join(input_dir, input_file_name)
-    output_file_name = os.path.splitext(input_file_name)[0] + '.csv'
-    csv_file = os.path.join(output_dir, output_file_name)
-    # print("Convert {} => {}".format(tif_file, csv_file))
-    # print("Convert {} => {}".format(input_file_name, output_file_name))
-
-    # Use the original function
-    # tif_to_csv(tif_file, csv_file)
+def convert_tif_directory(input_dir, output_dir, registry=None, cache=None):
+    """
+    Converts every TIF file in input_dir to a CSV file in output_dir.
 
-    # Use the memory-efficient function
-    tif_to_csv_memory_efficient(tif_file, csv_file)
+    Args:
+        input_dir (str): Directory with the input TIF images.
+        output_dir (str): Directory for the output CSV files.
+        registry (GridRegistry): Passed to tif_to_csv_memory_efficient.
+        cache (ConversionCache): If given, unchanged TIF files are restored from the cache
+            instead of being converted again.
+    """
+    file_list = os.listdir(input_dir)
+    file_list_tif = [file for file in file_list if file.endswith(".tif")]
+
+    # print ("file_list_tif:\n{}".format(file_list_tif))
+
+    os.makedirs(output_dir, exist_ok=True) # Create output directory if it doesn't exist
+
+    for input_file_name in file_list_tif:
+        tif_file = os.path.join(input_dir, input_file_name)
+        output_file_name = os.path.splitext(input_file_name)[0] + '.csv'
+        csv_file = os.path.join(output_dir, output_file_name)
+        # print("Convert {} => {}".format(tif_file, csv_file))
+        # print("Convert {} => {}".format(input_file_name, output_file_name))
+
+        # Use the original function
+        # tif_to_csv(tif_file, csv_file)
+
+        # Use the memory-efficient function
+        if cache is None:
+            tif_to_csv_memory_efficient(tif_file, csv_file, registry=registry)
+            continue
+
+        def convert():
+            tif_to_csv_memory_efficient(tif_file, csv_file, registry=registry)
+            return csv_file
+
+        params = {'grid': registry.fingerprint if registry is not None else None}
+        _, hit = cache.cached_csv('tif_to_csv', CACHE_VERSION, [tif_file], params, csv_file, convert)
+        if hit:
+            print(f"Restored {csv_file} from cache")
+
+def main():
+    parser = argparse.ArgumentParser(description="Converts population TIF files to CSV (x, y, value).")
+    parser.add_argument("--base-dir", type=str, default=os.path.join('.', 'data', 'population'),
+                        help="Population data directory (default: ./data/population, raw -> csv)")
+    parser.add_argument("--grid-file", type=str, default=None,
+                        help="Valid grid list (default: KOREA_GRID_FILE or sara/grid_address)")
+    parser.add_argument("--all-cells", action="store_true",
+                        help="Convert every pixel without grid filtering")
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+
+    input_dir = os.path.join(args.base_dir, 'raw') # Define input directory
+    output_dir = os.path.join(args.base_dir, 'csv') # Define output directory
+
+    # Keep only valid Korean land grids (KOREA_GRID_FILE or sara/grid_address) if available
+    registry = None if args.all_cells else load_registry(args.grid_file)
+    if registry is None:
+        print("Grid registry not used; converting every pixel.")
+
+    cache = cache_from_args(args)
+    convert_tif_directory(input_dir, output_dir, registry=registry, cache=cache)
+
+    if cache is not None:
+        for line in cache.report():
+            print(line)
+
+if __name__ == '__main__':
+    main()
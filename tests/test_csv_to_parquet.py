@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+"""csv_to_parquet 스키마 추론/병합 테스트."""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(REPO_ROOT, 'src', 'fuel'))
+
+import csv_to_parquet
+
+def write_csvs(directory, contents):
+    """파일 이름 → CSV 내용 딕셔너리를 디렉토리에 씁니다."""
+    directory.mkdir(exist_ok=True)
+    for name, text in contents.items():
+        (directory / name).write_text(text)
+    return directory
+
+def test_int64_values_outside_int32_are_kept(tmp_path):
+    csv_dir = write_csvs(tmp_path / 'counts', {
+        '1.csv': 'time,grid_id,count\n2020-01-01,5,3000000000\n',
+        '2.csv': 'time,grid_id,count\n2020-01-02,5,7\n',
+    })
+    csv_to_parquet.combine_csvs_to_parquet_parallel(csv_dir)
+    result = pd.read_parquet(csv_dir / 'counts_combined.parquet')
+    assert result['count'].tolist() == [3000000000, 7]
+
+def test_overflow_after_the_first_file_is_fatal(tmp_path):
+    csv_dir = write_csvs(tmp_path / 'counts', {
+        '1.csv': 'time,grid_id,count\n2020-01-01,5,7\n',
+        '2.csv': 'time,grid_id,count\n2020-01-02,5,3000000000\n',
+    })
+    with pytest.raises(ValueError):
+        csv_to_parquet.combine_csvs_to_parquet_parallel(csv_dir)
+    assert not (csv_dir / 'counts_combined.parquet').exists()
+
+def test_nullable_int_columns_stay_integer(tmp_path):
+    csv_dir = write_csvs(tmp_path / 'ids', {
+        '1.csv': 'time,grid_id,count\n2020-01-01,5,16777217\n',
+        '2.csv': 'time,grid_id,count\n2020-01-02,5,\n',
+    })
+    schema = csv_to_parquet.infer_unified_schema(sorted(csv_dir.glob('*.csv')))
+    assert str(schema.field('count').type) == 'int64'
+
+    csv_to_parquet.combine_csvs_to_parquet_parallel(csv_dir)
+    result = pd.read_parquet(csv_dir / 'ids_combined.parquet')
+    assert result['count'].iloc[0] == 16777217
+    assert pd.isna(result['count'].iloc[1])
+
+def test_int_and_float_samples_promote_to_float(tmp_path):
+    csv_dir = write_csvs(tmp_path / 'mixed', {
+        '1.csv': 'time,grid_id,LFMC\n2020-01-01,5,3\n',
+        '2.csv': 'time,grid_id,LFMC\n2020-01-02,5,3.5\n',
+    })
+    schema = csv_to_parquet.infer_unified_schema(sorted(csv_dir.glob('*.csv')))
+    assert str(schema.field('LFMC').type) == 'double'
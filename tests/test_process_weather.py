@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+"""process_weather 샤드 병합 테스트(파일별 스키마가 다른 입력)."""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(REPO_ROOT, 'yong-weather-target', 'weather'))
+
+import process_weather
+
+def merge_csvs(tmp_path, frames):
+    """데이터프레임들을 파일별 CSV로 쓰고 샤드 기록 후 병합한 결과를 반환합니다."""
+    shard_dir = tmp_path / 'shards'
+    shard_dir.mkdir()
+    infos = []
+    for index, df in enumerate(frames):
+        csv_path = tmp_path / f'{index}.csv'
+        df.to_csv(csv_path, index=False)
+        infos.append(process_weather.process_file_to_shard((index, str(csv_path)), str(shard_dir)))
+    merged = list(process_weather.iter_merge_windows(infos))
+    return pd.concat(merged, ignore_index=True)
+
+def test_merge_promotes_int_and_float_columns(tmp_path):
+    result = merge_csvs(tmp_path, [
+        pd.DataFrame({'date': ['2020-01-01', '2020-01-02'], 'grid_id': [1, 2], 'temperature': [3, 4]}),
+        pd.DataFrame({'date': ['2020-01-03'], 'grid_id': [1], 'temperature': [5.5]}),
+    ])
+    assert result['temperature'].tolist() == [3.0, 4.0, 5.5]
+
+def test_merge_keeps_columns_missing_from_first_file(tmp_path):
+    result = merge_csvs(tmp_path, [
+        pd.DataFrame({'date': ['2020-01-01'], 'grid_id': [1], 'temperature': [3.0]}),
+        pd.DataFrame({'date': ['2020-01-02'], 'grid_id': [1], 'temperature': [5.5], 'relative_humidity': [40.0]}),
+    ])
+    assert 'relative_humidity' in result.columns
+    assert pd.isna(result['relative_humidity'].iloc[0])
+    assert result['relative_humidity'].iloc[1] == pytest.approx(40.0)
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+"""공용 dtype 정책(common.schema) 읽기/쓰기 테스트."""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(REPO_ROOT, 'src'))
+
+from common.schema import read_frame, write_frame
+
+def test_strict_read_accepts_written_frames(tmp_path):
+    path = str(tmp_path / 'af_flag.parquet')
+    write_frame(pd.DataFrame({'acq_date': ['2020-01-01'], 'grid_id': [4000000], 'af_flag': [1],
+                              'count': [3000000000]}), path)
+    df = read_frame(path, strict=True)
+    assert df['grid_id'].dtype == 'int32'
+    assert df['count'].tolist() == [3000000000]
+
+def test_strict_read_rejects_uncompacted_parquet(tmp_path):
+    path = str(tmp_path / 'raw.parquet')
+    pd.DataFrame({'acq_date': ['2020-01-01'], 'grid_id': [1], 'af_flag': [1]}).to_parquet(path)
+    with pytest.raises(ValueError):
+        read_frame(path, strict=True)
+    assert read_frame(path)['af_flag'].dtype == 'uint8'
@@ -0,0 +1,369 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+그리드 기반 데이터셋(날씨, af_flag, 연료, 인구, LAI, 토지피복, 낙뢰, 도로 밀도 등)을
+하나의 일별 × 그리드 학습 테이블로 결합합니다.
+
+각 소스는 시간 해상도(static, yearly, monthly, daily)와 함께 등록되며,
+(행 × 그리드) 밀집 배열로 변환된 뒤 날짜별 행 인덱스 하나로 정렬됩니다.
+daily 소스는 같은 날짜의 행을, yearly/monthly 소스는 해당 날짜 이전의 가장 최근 행(as-of)을,
+static 소스는 항상 같은 행을 가리키므로 소스 하나를 추가하는 비용은 벡터화된 gather 한 번입니다.
+"""
+
+import os
+import sys
+import json
+import argparse
+import logging
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# 공용 모듈(src/common) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+from common import metrics
+from common.grid import add_grid_arguments, registry_from_args
+from common.schema import read_frame, cast_table
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('build_feature_store')
+
+RESOLUTIONS = ('static', 'yearly', 'monthly', 'daily')
+
+def setup_arg_parser():
+    """인자 파서를 설정하고 반환합니다."""
+    parser = argparse.ArgumentParser(description='그리드 기반 데이터셋을 일별 × 그리드 학습 테이블로 결합')
+
+    parser.add_argument('--config', type=str, required=True,
+                        help='소스 정의 JSON 파일 경로(feature_sources.example.json 참고)')
+    parser.add_argument('--output-file', type=str, required=True,
+                        help='결합된 학습 테이블 출력 경로(Parquet 형식)')
+    parser.add_argument('--start-date', type=str,
+                        help='시작 날짜(YYYY-MM-DD 형식, 기본값: daily 소스의 최소 날짜)')
+    parser.add_argument('--end-date', type=str,
+                        help='종료 날짜(YYYY-MM-DD 형식, 기본값: daily 소스의 최대 날짜)')
+    add_grid_arguments(parser)
+    parser.add_argument('--chunk-days', type=int, default=366,
+                        help='한 번에 기록할 날짜 수(기본값: 366)')
+    metrics.add_metrics_arguments(parser)
+
+    return parser
+
+def register_source(sources, name, path, resolution, date_col=None, columns=None,
+                    fill_value=None, agg=None, prefix=''):
+    """
+    소스 목록에 데이터셋을 등록합니다.
+
+    매개변수:
+    -----------
+    sources : list
+        소스 정의 목록(제자리에서 추가됨)
+    name : str
+        소스 이름
+    path : str
+        CSV 또는 Parquet 파일 경로
+    resolution : str
+        시간 해상도('static', 'yearly', 'monthly', 'daily')
+    date_col : str 또는 None
+        날짜 열 이름(기본값: 'date' 또는 'time'이 포함된 첫 번째 열, static은 불필요)
+    columns : list 또는 None
+        사용할 값 열 목록(기본값: 날짜/grid_id를 제외한 모든 숫자 열)
+    fill_value : float 또는 None
+        값이 없는 날짜-그리드에 채울 값(기본값: NaN)
+    agg : str 또는 None
+        같은 (날짜, grid_id)에 여러 행이 있을 때의 집계 방법('mean', 'max', 'min', 'first', 'last')
+    prefix : str
+        출력 열 이름 접두사
+
+    반환:
+    --------
+    list : 소스 정의 목록
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution '{resolution}' for source '{name}' (expected one of {RESOLUTIONS})")
+
+    sources.append({
+        'name': name,
+        'path': path,
+        'resolution': resolution,
+        'date_col': date_col,
+        'columns': columns,
+        'fill_value': fill_value,
+        'agg': agg,
+        'prefix': prefix,
+    })
+    return sources
+
+def load_source_config(config_file):
+    """
+    JSON 설정 파일에서 소스 목록을 읽습니다. 상대 경로는 설정 파일 위치 기준입니다.
+
+    반환:
+    --------
+    list : 소스 정의 목록
+    """
+    with open(config_file, encoding='utf-8') as f:
+        config = json.load(f)
+
+    base_dir = os.path.dirname(os.path.abspath(config_file))
+    sources = []
+    for entry in config['sources']:
+        entry = dict(entry)
+        entry['path'] = os.path.join(base_dir, entry['path'])
+        register_source(sources, **entry)
+    return sources
+
+def _source_columns(path):
+    """파일을 모두 읽지 않고 열 이름 목록만 가져옵니다."""
+    if path.lower().endswith('.parquet'):
+        return pq.read_schema(path).names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+def read_source_table(source):
+    """
+    소스 파일에서 grid_id, 날짜, 값 열만 읽습니다.
+
+    반환:
+    --------
+    tuple : (데이터프레임, 날짜 열 이름 또는 None, 값 열 목록)
+    """
+    path = source['path']
+    all_columns = _source_columns(path)
+
+    date_col = source['date_col']
+    if source['resolution'] != 'static' and date_col is None:
+        candidates = [c for c in all_columns if 'date' in c.lower() or c.lower() == 'time']
+        if not candidates:
+            raise ValueError(f"No date column found in {path}")
+        date_col = candidates[0]
+    if source['resolution'] == 'static':
+        date_col = None
+
+    value_cols = source['columns']
+    if value_cols is None:
+        value_cols = [c for c in all_columns if c not in ('grid_id', date_col, 'lat', 'lon', 'latitude', 'longitude')]
+
+    read_cols = ['grid_id'] + ([date_col] if date_col else []) + list(value_cols)
+    df = read_frame(path, columns=read_cols)
+
+    # 숫자가 아닌 열은 제외(예: 지번 주소)
+    value_cols = [c for c in value_cols if pd.api.types.is_numeric_dtype(df[c]) or pd.api.types.is_bool_dtype(df[c])]
+    if date_col:
+        df[date_col] = pd.to_datetime(df[date_col]).dt.normalize()
+
+    if source['agg']:
+        keys = ['grid_id'] + ([date_col] if date_col else [])
+        if df.duplicated(keys).any():
+            df = df.groupby(keys, as_index=False)[value_cols].agg(source['agg'])
+
+    logger.info(f"Loaded source '{source['name']}' ({source['resolution']}): {len(df)} rows, columns {value_cols}")
+    return df, date_col, value_cols
+
+def build_grid_index(grid_ids):
+    """정렬된 고유 grid_id 배열(밀집 그리드 인덱스)을 만듭니다."""
+    return np.unique(np.asarray(grid_ids, dtype=np.int64))
+
+def lookup_grid_positions(grid_index, grid_ids):
+    """
+    grid_id를 밀집 그리드 인덱스의 위치로 변환합니다.
+
+    반환:
+    --------
+    tuple : (위치 배열, 인덱스에 존재 여부 마스크)
+    """
+    grid_ids = np.asarray(grid_ids, dtype=np.int64)
+    pos = np.searchsorted(grid_index, grid_ids)
+    pos = np.minimum(pos, len(grid_index) - 1)
+    return pos, grid_index[pos] == grid_ids
+
+def _forward_fill_rows(values, present):
+    """(행 × 그리드) 배열에서 값이 없는 칸을 같은 그리드의 이전 행 값으로 채웁니다."""
+    n_rows = values.shape[0]
+    last = np.where(present, np.arange(n_rows)[:, None], -1)
+    np.maximum.accumulate(last, axis=0, out=last)
+    filled = values[np.maximum(last, 0), np.arange(values.shape[1])[None, :]]
+    return filled, last >= 0
+
+def align_source(df, date_col, value_cols, source, days, grid_index):
+    """
+    소스 데이터를 (행 × 그리드) 밀집 배열과 날짜별 행 인덱스로 변환합니다.
+
+    마지막 행은 채움 값 행이며, 행 인덱스 -1(값 없음)은 이 행을 가리킵니다.
+
+    반환:
+    --------
+    tuple : ({열 이름: (행 수 + 1, 그리드 수) 배열}, (날짜 수,) 행 인덱스 배열)
+    """
+    resolution = source['resolution']
+    n_grids = len(grid_index)
+    grid_pos, valid = lookup_grid_positions(grid_index, df['grid_id'].values)
+
+    if resolution == 'static':
+        n_rows = 1
+        row_idx = np.zeros(len(df), dtype=np.int64)
+        row_for_day = np.zeros(len(days), dtype=np.int64)
+    elif resolution == 'daily':
+        n_rows = len(days)
+        row_idx = (df[date_col].values.astype('datetime64[D]') - days[0]).astype(np.int64)
+        valid &= (row_idx >= 0) & (row_idx < n_rows)
+        row_for_day = np.arange(len(days), dtype=np.int64)
+    else:
+        # yearly/monthly: 소스 날짜별 행을 만들고 각 날짜는 그 이전 가장 최근 행을 가리킴(as-of)
+        periods, row_idx = np.unique(df[date_col].values.astype('datetime64[D]'), return_inverse=True)
+        n_rows = len(periods)
+        row_for_day = np.searchsorted(periods, days, side='right') - 1
+
+    rows, grids = row_idx[valid], grid_pos[valid]
+    present = np.zeros((n_rows, n_grids), dtype=bool)
+    present[rows, grids] = True
+
+    tables = {}
+    fill_value = source['fill_value']
+    for col in value_cols:
+        src = df[col].values[valid]
+        if np.issubdtype(src.dtype, np.floating) or fill_value is None:
+            dtype = np.float32
+            fill = np.nan if fill_value is None else fill_value
+        else:
+            dtype = src.dtype
+            fill = fill_value
+
+        values = np.full((n_rows, n_grids), fill, dtype=dtype)
+        values[rows, grids] = src
+
+        if resolution in ('yearly', 'monthly'):
+            # 특정 기간에 빠진 그리드는 이전 기간 값을 그대로 사용
+            values, filled = _forward_fill_rows(values, present)
+            values[~filled] = fill
+
+        # 채움 값 행 추가(행 인덱스 -1)
+        tables[source['prefix'] + col] = np.vstack([values, np.full((1, n_grids), fill, dtype=dtype)])
+
+    if resolution == 'daily':
+        missing = ~present.any(axis=1)
+        row_for_day = np.where(missing, -1, row_for_day)
+
+    logger.info(f"Aligned '{source['name']}': {n_rows} rows x {n_grids} grids, "
+                f"{int(present.sum())} cells with data")
+    return tables, row_for_day
+
+def build_feature_store(sources, output_file, start_date=None, end_date=None, grid_ids=None, chunk_days=366):
+    """
+    등록된 소스를 일별 × 그리드 학습 테이블 하나로 결합하여 Parquet으로 저장합니다.
+
+    매개변수:
+    -----------
+    sources : list
+        register_source로 만든 소스 정의 목록
+    output_file : str
+        출력 Parquet 파일 경로
+    start_date, end_date : str 또는 None
+        날짜 범위(기본값: daily 소스의 날짜 범위)
+    grid_ids : array-like 또는 None
+        사용할 grid_id(기본값: 모든 소스의 grid_id 합집합)
+    chunk_days : int
+        한 번에 기록할 날짜 수
+
+    반환:
+    --------
+    int : 기록한 행 수
+    """
+    loaded = []
+    with metrics.stage('load') as st:
+        for source in sources:
+            df, date_col, value_cols = read_source_table(source)
+            st.add_input_file(source['path'])
+            loaded.append((source, df, date_col, value_cols))
+        st.rows_out = sum(len(item[1]) for item in loaded)
+
+    # 날짜 범위 결정
+    daily_dates = [df[date_col] for source, df, date_col, _ in loaded if source['resolution'] == 'daily']
+    if start_date is None or end_date is None:
+        if not daily_dates:
+            raise ValueError("start_date/end_date are required when no daily source is registered")
+        all_daily = pd.concat(daily_dates)
+    start = pd.to_datetime(start_date) if start_date else all_daily.min()
+    end = pd.to_datetime(end_date) if end_date else all_daily.max()
+    days = np.arange(np.datetime64(start.date(), 'D'), np.datetime64(end.date(), 'D') + 1)
+
+    # 그리드 인덱스 결정
+    if grid_ids is None:
+        grid_ids = np.concatenate([df['grid_id'].values for _, df, _, _ in loaded])
+    grid_index = build_grid_index(grid_ids)
+    n_grids = len(grid_index)
+    logger.info(f"Feature store index: {len(days)} days x {n_grids} grids = {len(days) * n_grids} rows")
+
+    aligned = []
+    with metrics.stage('align', rows_in=sum(len(item[1]) for item in loaded)) as st:
+        for source, df, date_col, value_cols in loaded:
+            aligned.append(align_source(df, date_col, value_cols, source, days, grid_index))
+        del loaded
+
+    output_dir = os.path.dirname(output_file)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    writer = None
+    total_rows = 0
+    grid_column = grid_index.astype(np.int32)
+    with metrics.stage('write') as st:
+        for d0 in range(0, len(days), chunk_days):
+            d1 = min(d0 + chunk_days, len(days))
+            n_chunk = d1 - d0
+
+            arrays = {
+                'date': pa.array(np.repeat(days[d0:d1], n_grids), type=pa.date32()),
+                'grid_id': pa.array(np.tile(grid_column, n_chunk)),
+            }
+            # 소스마다 날짜별 행 인덱스로 한 번의 gather
+            for tables, row_for_day in aligned:
+                rows = row_for_day[d0:d1]
+                for col, table in tables.items():
+                    arrays[col] = pa.array(table[rows].ravel(), from_pandas=True)
+
+            if writer is None:
+                chunk = cast_table(pa.table(arrays))
+                writer = pq.ParquetWriter(output_file, chunk.schema, compression='zstd')
+            else:
+                chunk = cast_table(pa.table(arrays), writer.schema)
+            writer.write_table(chunk)
+            total_rows += chunk.num_rows
+            logger.info(f"Wrote {str(days[d0])} ~ {str(days[d1 - 1])}: {chunk.num_rows} rows")
+
+        if writer is not None:
+            writer.close()
+        st.rows_out = total_rows
+        st.add_output_file(output_file)
+
+    logger.info(f"Saved feature store with {total_rows} rows to {output_file}")
+    return total_rows
+
+def main():
+    """학습 테이블을 생성하는 메인 함수."""
+    parser = setup_arg_parser()
+    args = parser.parse_args()
+    metrics.configure_from_args(args)
+
+    sources = load_source_config(args.config)
+    logger.info(f"Registered {len(sources)} sources: {[s['name'] for s in sources]}")
+
+    registry = registry_from_args(args)
+    grid_ids = registry.grid_ids if registry is not None else None
+
+    build_feature_store(
+        sources,
+        args.output_file,
+        start_date=args.start_date,
+        end_date=args.end_date,
+        grid_ids=grid_ids,
+        chunk_days=args.chunk_days
+    )
+
+if __name__ == '__main__':
+    main()
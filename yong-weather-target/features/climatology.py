@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+날씨 큐브(weather/build_weather_cube.py)에서 그리드별 일(day-of-year) 기후값을 만들고,
+긴 테이블에 기후값 대비 편차(anomaly)와 표준화 편차(z-score) 열을 추가합니다.
+
+기후값은 src/common/climatology.py의 Climatology로 계산합니다. 날씨 큐브를 날짜 청크 단위로
+한 번만 읽으면서 (변수 × 366 × 그리드) Welford 누적값(개수, 평균, M2)을 갱신하고,
+누적값을 .npz로 저장합니다. 같은 기준 기간 시작일로 다시 실행하면 저장된 마지막 날짜 이후의
+날짜만 더합니다.
+"""
+
+import os
+import sys
+import argparse
+import logging
+import numpy as np
+
+# 공용 모듈(src/common) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+from common import metrics
+from common.climatology import Climatology
+from common.cube import GridCube
+from common.schema import read_frame, write_frame
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('climatology')
+
+DEFAULT_VARIABLES = ['temperature', 'relative_humidity', 'precipitation', 'wind_speed']
+
+def setup_arg_parser():
+    """인자 파서를 설정하고 반환합니다."""
+    parser = argparse.ArgumentParser(description='그리드별 일 기후값 생성 및 기후 편차/z-score 변환')
+
+    parser.add_argument('--weather-cube', type=str, required=True,
+                        help='입력 날씨 큐브 디렉토리')
+    parser.add_argument('--output-file', type=str, required=True,
+                        help='기후값 누적 파일 경로(.npz, 있으면 새 날짜만 추가)')
+    parser.add_argument('--variables', type=str, nargs='+', default=DEFAULT_VARIABLES,
+                        help=f'기후값을 만들 변수 목록(기본값: {" ".join(DEFAULT_VARIABLES)})')
+    parser.add_argument('--start-date', type=str,
+                        help='기준 기간 시작 날짜(YYYY-MM-DD, 기본값: 큐브 첫 날짜)')
+    parser.add_argument('--end-date', type=str,
+                        help='기준 기간 종료 날짜(YYYY-MM-DD, 기본값: 큐브 마지막 날짜)')
+    parser.add_argument('--window', type=int, default=1,
+                        help='평균/표준편차를 합칠 날짜 창(일, 홀수, 기본값: 1 = 평활 없음)')
+    parser.add_argument('--min-count', type=int, default=2,
+                        help='기후값을 쓸 최소 표본 수, 부족하면 NaN(기본값: 2)')
+    parser.add_argument('--chunk-days', type=int, default=365,
+                        help='한 번에 읽을 날짜 수(기본값: 365)')
+    parser.add_argument('--apply-file', type=str,
+                        help='편차 열을 추가할 테이블(CSV 또는 Parquet, date와 grid_id 열 필요)')
+    parser.add_argument('--apply-output', type=str,
+                        help='편차 열을 추가한 출력 파일 경로(.csv 또는 .parquet)')
+    parser.add_argument('--date-col', type=str, default='date',
+                        help='--apply-file의 날짜 열 이름(기본값: date)')
+    parser.add_argument('--transform', type=str, choices=['anomaly', 'zscore', 'both'], default='both',
+                        help='추가할 열: anomaly(<변수>_anom), zscore(<변수>_z), both (기본값: both)')
+    metrics.add_metrics_arguments(parser)
+
+    return parser
+
+def update_climatology(weather_cube, output_file, variables, start_date=None, end_date=None, window=1,
+                       chunk_days=365):
+    """
+    기준 기간의 날씨 큐브 값을 기후값 누적 파일에 더합니다.
+
+    저장된 파일의 변수, 그리드, 시작 날짜가 같으면 저장된 마지막 날짜 이후만 더하고,
+    다르거나 기준 기간이 줄어들었으면 처음부터 다시 계산합니다.
+
+    매개변수:
+    -----------
+    weather_cube : str
+        입력 날씨 큐브 디렉토리
+    output_file : str
+        기후값 누적 파일 경로(.npz)
+    variables : list of str
+        기후값을 만들 변수
+    start_date, end_date : str
+        기준 기간(기본값: 큐브 전체)
+    window : int
+        저장할 기본 평활 창(일)
+    chunk_days : int
+        한 번에 읽을 날짜 수
+
+    반환:
+    --------
+    Climatology
+    """
+    weather = GridCube(weather_cube)
+    missing = [var for var in variables if var not in weather.variables]
+    if missing:
+        raise ValueError(f"{weather_cube} has no variables {missing}")
+
+    start = np.datetime64(start_date, 'D') if start_date else weather.start_date
+    end = min(np.datetime64(end_date, 'D'), weather.end_date) if end_date else weather.end_date
+    d0 = int(weather.day_offsets([start])[0])
+    d1 = int(weather.day_offsets([end])[0]) + 1
+    if d0 < 0:
+        raise ValueError(f"Start date {start} is before the cube ({weather.start_date})")
+
+    clim = None
+    if os.path.exists(output_file):
+        saved = Climatology.load(output_file)
+        if (saved.variables == list(variables) and np.array_equal(saved.grid_ids, weather.grid_ids)
+                and saved.start_date == start and saved.end_date is not None and saved.end_date <= end):
+            clim = saved
+            d0 = int(weather.day_offsets([saved.end_date])[0]) + 1
+        else:
+            logger.info(f"{output_file} was built for different variables, grids or period, rebuilding")
+    if clim is None:
+        clim = Climatology(variables, weather.grid_ids)
+        clim.start_date = start
+    clim.window = window
+
+    if d1 <= d0:
+        logger.info(f"Climatology is up to date ({clim.start_date} ~ {clim.end_date})")
+        clim.save(output_file)
+        return clim
+
+    logger.info(f"Adding {d1 - d0} days ({weather.dates[d0]} ~ {weather.dates[d1 - 1]}) "
+                f"of {len(variables)} variables over {weather.n_grids} grids")
+    with metrics.stage('climatology', rows_in=(d1 - d0) * weather.n_grids) as st:
+        for c0 in range(d0, d1, chunk_days):
+            c1 = min(c0 + chunk_days, d1)
+            for var in variables:
+                clim.update(var, weather.dates[c0:c1], weather.array(var)[c0:c1])
+        clim.end_date = weather.dates[d1 - 1]
+        clim.save(output_file)
+        st.rows_out = (d1 - d0) * weather.n_grids
+        st.add_output_file(output_file)
+
+    logger.info(f"Saved climatology {clim.start_date} ~ {clim.end_date} to {output_file}")
+    return clim
+
+def add_anomaly_columns(df, clim, date_col='date', transform='both', window=None, min_count=2):
+    """
+    긴 테이블에 기후값 대비 편차 열을 추가합니다.
+
+    매개변수:
+    -----------
+    df : pandas.DataFrame
+        날짜, grid_id와 기후값 변수 열이 있는 데이터프레임
+    clim : Climatology
+        기후값
+    date_col : str
+        날짜 열 이름
+    transform : str
+        'anomaly'(<변수>_anom), 'zscore'(<변수>_z) 또는 'both'
+    window : int
+        평활 창(기본값: 기후값에 저장된 창)
+
+    반환:
+    --------
+    pandas.DataFrame
+        편차 열이 추가된 데이터프레임
+    """
+    variables = [var for var in clim.variables if var in df.columns]
+    if not variables:
+        raise ValueError(f"Table has none of the climatology variables {clim.variables}")
+
+    result = df.copy()
+    dates = df[date_col]
+    grid_ids = df['grid_id'].to_numpy()
+    for var in variables:
+        values = df[var].to_numpy(dtype=np.float64, na_value=np.nan)
+        if transform in ('anomaly', 'both'):
+            result[f'{var}_anom'] = clim.anomaly(var, dates, grid_ids, values, window=window, min_count=min_count)
+        if transform in ('zscore', 'both'):
+            result[f'{var}_z'] = clim.anomaly(var, dates, grid_ids, values, zscore=True, window=window,
+                                              min_count=min_count)
+    return result
+
+def main():
+    """기후값을 만들고 편차 열을 추가하는 메인 함수."""
+    parser = setup_arg_parser()
+    args = parser.parse_args()
+    metrics.configure_from_args(args)
+
+    if bool(args.apply_file) != bool(args.apply_output):
+        parser.error('--apply-file and --apply-output must be given together')
+
+    output_dir = os.path.dirname(args.output_file)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    clim = update_climatology(
+        args.weather_cube,
+        args.output_file,
+        args.variables,
+        start_date=args.start_date,
+        end_date=args.end_date,
+        window=args.window,
+        chunk_days=args.chunk_days
+    )
+
+    if not args.apply_file:
+        return
+
+    with metrics.stage('load') as st:
+        df = read_frame(args.apply_file)
+        st.add_input_file(args.apply_file)
+        st.rows_out = len(df)
+
+    with metrics.stage('transform', rows_in=len(df)) as st:
+        result = add_anomaly_columns(df, clim, date_col=args.date_col, transform=args.transform,
+                                     min_count=args.min_count)
+        st.rows_out = len(result)
+
+    apply_dir = os.path.dirname(args.apply_output)
+    if apply_dir and not os.path.exists(apply_dir):
+        os.makedirs(apply_dir)
+
+    with metrics.stage('write', rows_in=len(result)) as st:
+        write_frame(result, args.apply_output)
+        st.add_output_file(args.apply_output)
+    logger.info(f"Saved anomalies for {len(result)} rows to {args.apply_output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,362 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+날씨 큐브(weather/build_weather_cube.py)에서 캐나다 산불 기상 지수(FWI) 체계를 계산합니다.
+
+- 수분 코드: FFMC(미세 연료), DMC(부식층), DC(가뭄) — 전날 값에서 오늘 값을 구하는 점화식
+- 행동 지수: ISI(초기 확산), BUI(연소 가능 연료량), FWI(화재 강도)
+
+식은 Van Wagner(1987)와 cffdrs(Wang et al., 2015)를 따릅니다. 점화식 상태는 그리드별
+(그리드 수,) 배열 세 개(FFMC, DMC, DC)이며, 날짜 축으로만 반복하고 모든 그리드를 한 번에 계산합니다.
+전날 상태와 무관한 항(평형 함수율, 건조/습윤 속도, DMC/DC 증가량, 유효 강수량)은
+날짜 청크 전체에 대해 미리 계산하고, ISI/BUI/FWI는 반복이 끝난 뒤 (날짜 × 그리드) 배열로 계산합니다.
+계산은 큐브와 같은 float32로 합니다(표준 검증값과 소수 첫째 자리까지 일치).
+
+마지막 날짜의 상태는 출력 큐브의 state.npz에 저장되어, 다시 실행하면 날씨 큐브에 새로 추가된
+날짜만 이어서 계산합니다.
+"""
+
+import os
+import sys
+import math
+import argparse
+import logging
+import numpy as np
+
+# 공용 모듈(src/common) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+from common import metrics
+from common.cube import GridCube, INDEX_FILE
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('fire_weather_index')
+
+FWI_CODES = ['ffmc', 'dmc', 'dc', 'isi', 'bui', 'fwi']
+STATE_FILE = 'state.npz'
+
+# 표준 시작값(눈이 녹은 뒤 사흘째 또는 관측 시작일)
+STARTUP_FFMC = 85.0
+STARTUP_DMC = 6.0
+STARTUP_DC = 15.0
+
+# 월별 일장 계수(1~12월): 북위 33° 이상에 쓰는 표준 표
+DMC_DAY_LENGTH = np.array([6.5, 7.5, 9.0, 12.8, 13.9, 13.9, 12.4, 10.9, 9.4, 8.0, 7.0, 6.0])
+DC_DAY_LENGTH = np.array([-1.6, -1.6, -1.6, 0.9, 3.8, 5.8, 6.4, 5.0, 2.4, 0.4, -1.6, -1.6])
+
+def setup_arg_parser():
+    """인자 파서를 설정하고 반환합니다."""
+    parser = argparse.ArgumentParser(description='날씨 큐브에서 캐나다 산불 기상 지수(FFMC, DMC, DC, ISI, BUI, FWI) 계산')
+
+    parser.add_argument('--weather-cube', type=str, required=True,
+                        help='입력 날씨 큐브 디렉토리')
+    parser.add_argument('--output-cube', type=str, required=True,
+                        help='FWI 큐브 디렉토리(있으면 저장된 상태에서 새 날짜만 계산하여 추가)')
+    parser.add_argument('--temp-var', type=str, default='temperature',
+                        help='기온 변수 이름(기본값: temperature)')
+    parser.add_argument('--rh-var', type=str, default='relative_humidity',
+                        help='상대습도(%%) 변수 이름(기본값: relative_humidity)')
+    parser.add_argument('--wind-var', type=str, default='wind_speed',
+                        help='풍속 변수 이름(기본값: wind_speed)')
+    parser.add_argument('--precip-var', type=str, default='precipitation',
+                        help='강수량 변수 이름(기본값: precipitation)')
+    parser.add_argument('--temp-unit', type=str, choices=['C', 'K'], default='C',
+                        help='기온 단위(기본값: C, ERA5 t2m은 K)')
+    parser.add_argument('--wind-unit', type=str, choices=['m/s', 'km/h'], default='m/s',
+                        help='풍속 단위(기본값: m/s)')
+    parser.add_argument('--precip-scale', type=float, default=1.0,
+                        help='강수량을 mm로 바꾸는 배율(기본값: 1.0, ERA5 tp(m)는 1000)')
+    parser.add_argument('--chunk-days', type=int, default=366,
+                        help='한 번에 읽어 계산할 날짜 수(기본값: 366)')
+    metrics.add_metrics_arguments(parser)
+
+    return parser
+
+def initial_state(n_grids):
+    """시작값으로 채운 (FFMC, DMC, DC) 상태를 반환합니다."""
+    return {
+        'ffmc': np.full(n_grids, STARTUP_FFMC, dtype=np.float32),
+        'dmc': np.full(n_grids, STARTUP_DMC, dtype=np.float32),
+        'dc': np.full(n_grids, STARTUP_DC, dtype=np.float32),
+    }
+
+def daily_terms(temp, rh, wind, rain, months):
+    """
+    전날 상태와 무관한 점화식 항을 (날짜 × 그리드) 배열로 한 번에 계산합니다.
+
+    매개변수:
+    -----------
+    temp, rh, wind, rain : numpy.ndarray
+        (날짜 × 그리드) 기온(°C), 상대습도(%), 풍속(km/h), 24시간 강수량(mm)
+    months : numpy.ndarray
+        날짜별 월(1~12)
+
+    반환:
+    --------
+    dict : 항 이름 → (날짜 × 그리드) 배열
+    """
+    rh = np.clip(rh, 0.0, 100.0)
+    wind = np.maximum(wind, 0.0)
+    rain = np.maximum(rain, 0.0)
+    month_idx = (months - 1)[:, None]
+    one = temp.dtype.type(1.0)
+
+    # FFMC: 건조/습윤 평형 함수율(ed >= ew)과 하루 동안 평형값으로 다가가는 비율 1 - 10^-k
+    # 거듭제곱(rh^a, (rh/100)^a)은 log를 한 번만 구해 exp로 계산(배열 전체에 대한 pow가 가장 느린 연산)
+    with np.errstate(divide='ignore'):
+        log_dry = np.log(rh / 100.0)
+        log_wet = np.log1p(-rh / 100.0)
+    near_saturation = np.exp((rh - 100.0) / 10.0)
+    humid = 0.18 * (21.1 - temp) * (one - np.exp(-0.115 * rh))
+    ed = 0.942 * 100.0 ** 0.679 * np.exp(0.679 * log_dry) + 11.0 * near_saturation + humid
+    ew = 0.618 * 100.0 ** 0.753 * np.exp(0.753 * log_dry) + 10.0 * near_saturation + humid
+    temp_factor = 0.581 * np.exp(0.0365 * temp)
+    wind_term = 0.0694 * np.sqrt(wind)
+
+    def approach(log_ratio):
+        k = (0.424 * (one - np.exp(1.7 * log_ratio)) + wind_term * (one - np.exp(8.0 * log_ratio))) * temp_factor
+        return one - np.exp(-math.log(10.0) * k)
+
+    # 강수 조건은 np.where 대신 0/1 곱으로 적용(rf = 0이면 exp(-inf) = 0이라 rain_wetting도 0)
+    rf = np.maximum(rain - 0.5, 0.0)
+    with np.errstate(divide='ignore'):
+        rain_wetting = 42.5 * rf * (one - np.exp(-6.93 / rf))
+
+    # DMC: 하루 건조 증가량과 유효 강수량
+    rk = 1.894e-4 * (np.maximum(temp, -1.1) + 1.1) * (100.0 - rh) * DMC_DAY_LENGTH[month_idx].astype(temp.dtype)
+    re = (0.92 * rain - 1.27) * (rain > 1.5)
+
+    # DC: 하루 증발산 증가량과 유효 강수량
+    pe = np.maximum((0.36 * (np.maximum(temp, -2.8) + 2.8) + DC_DAY_LENGTH[month_idx].astype(temp.dtype)) / 2.0, 0.0)
+    rd = (0.83 * rain - 1.27) * (rain > 2.8)
+
+    return {
+        'ed': ed, 'ew': ew, 'dry_step': approach(log_dry), 'wet_step': approach(log_wet),
+        'rf': rf, 'rain_wetting': rain_wetting, 'rk': rk, 're': re, 'pe': pe, 'rd': rd,
+        'valid': ~(np.isnan(temp) | np.isnan(rh) | np.isnan(wind) | np.isnan(rain)),
+    }
+
+def step_ffmc(ffmc, t):
+    """전날 FFMC와 오늘의 항(daily_terms의 한 행)에서 오늘 FFMC를 계산합니다."""
+    mo = 147.2 * (101.0 - ffmc) / (59.5 + ffmc)
+
+    # 비가 오지 않은 그리드는 rain_wetting = rf = 0이라 mo가 그대로 남음(mo < 250)
+    rf = t['rf']
+    if rf.any():
+        wetted = mo + t['rain_wetting'] * np.exp(-100.0 / (251.0 - mo))
+        wetted += 0.0015 * np.square(np.maximum(mo - 150.0, 0.0)) * np.sqrt(rf)
+        mo = np.minimum(wetted, 250.0)
+
+    # mo > ed이면 ed로 마르고, mo < ew이면 ew로 젖음(ed >= ew이므로 둘 중 하나만 적용)
+    m = mo - np.maximum(mo - t['ed'], 0.0) * t['dry_step'] + np.maximum(t['ew'] - mo, 0.0) * t['wet_step']
+    return np.clip(59.5 * (250.0 - m) / (147.2 + m), 0.0, 101.0)
+
+def step_dmc(dmc, t):
+    """전날 DMC와 오늘의 항에서 오늘 DMC를 계산합니다."""
+    re = t['re']
+    rained = re > 0
+    if rained.any():
+        log_dmc = np.log(np.maximum(dmc, 1e-6))
+        b = np.where(dmc <= 33.0, 100.0 / (0.5 + 0.3 * dmc),
+                     np.where(dmc <= 65.0, 14.0 - 1.3 * log_dmc, 6.2 * log_dmc - 17.2))
+        # 비 온 뒤 함수율 mr에서 20을 뺀 값(항상 양수)
+        wet_excess = np.exp(5.6348 - dmc / 43.43) + 1000.0 * re / (48.77 + b * re)
+        dmc = np.where(rained, np.maximum(244.72 - 43.43 * np.log(wet_excess), 0.0), dmc)
+    return np.maximum(dmc + t['rk'], 0.0)
+
+def step_dc(dc, t):
+    """전날 DC와 오늘의 항에서 오늘 DC를 계산합니다."""
+    rd = t['rd']
+    rained = rd > 0
+    if rained.any():
+        qr = 800.0 * np.exp(-dc / 400.0) + 3.937 * rd
+        dc = np.where(rained, np.maximum(400.0 * np.log(800.0 / qr), 0.0), dc)
+    return np.maximum(dc + t['pe'], 0.0)
+
+def moisture_codes(temp, rh, wind, rain, months, state):
+    """
+    날짜 축으로 반복하며 FFMC, DMC, DC를 모든 그리드에 대해 계산합니다.
+
+    기상값이 결측인 (날짜, 그리드)는 NaN을 출력하고 상태는 전날 값을 유지합니다.
+
+    매개변수:
+    -----------
+    temp, rh, wind, rain : numpy.ndarray
+        (날짜 × 그리드) 기온(°C), 상대습도(%), 풍속(km/h), 강수량(mm)
+    months : numpy.ndarray
+        날짜별 월(1~12)
+    state : dict
+        전날의 'ffmc', 'dmc', 'dc' (그리드 수,) 배열(제자리에서 갱신됨)
+
+    반환:
+    --------
+    dict : 'ffmc', 'dmc', 'dc' → (날짜 × 그리드) float32 배열
+    """
+    terms = daily_terms(temp, rh, wind, rain, months)
+    n_days = temp.shape[0]
+    out = {code: np.empty(temp.shape, dtype=np.float32) for code in ('ffmc', 'dmc', 'dc')}
+    steps = {'ffmc': step_ffmc, 'dmc': step_dmc, 'dc': step_dc}
+
+    for d in range(n_days):
+        today = {name: values[d] for name, values in terms.items()}
+        valid = today['valid']
+        all_valid = valid.all()
+        for code, step in steps.items():
+            new = step(state[code], today)
+            if all_valid:
+                state[code] = new
+                out[code][d] = new
+            else:
+                np.copyto(state[code], new, where=valid)
+                out[code][d] = np.where(valid, new, np.nan)
+    return out
+
+def initial_spread_index(ffmc, wind):
+    """FFMC와 풍속(km/h)에서 ISI를 계산합니다."""
+    m = 147.2 * (101.0 - ffmc) / (59.5 + ffmc)
+    ff = 91.9 * np.exp(-0.1386 * m) * (1.0 + m ** 5.31 / 4.93e7)
+    return 0.208 * np.exp(0.05039 * wind) * ff
+
+def buildup_index(dmc, dc):
+    """DMC와 DC에서 BUI를 계산합니다."""
+    total = dmc + 0.4 * dc
+    with np.errstate(divide='ignore', invalid='ignore'):
+        low = 0.8 * dmc * dc / total
+        high = dmc - (1.0 - 0.8 * dc / total) * (0.92 + (0.0114 * dmc) ** 1.7)
+    bui = np.where(dmc <= 0.4 * dc, low, high)
+    return np.where(total > 0, np.maximum(bui, 0.0), 0.0)
+
+def fire_weather_index(isi, bui):
+    """ISI와 BUI에서 FWI를 계산합니다."""
+    fd = np.where(bui <= 80.0, 0.626 * np.maximum(bui, 0.0) ** 0.809 + 2.0,
+                  1000.0 / (25.0 + 108.64 * np.exp(-0.023 * bui)))
+    fwi = 0.1 * isi * fd
+    scaled = fwi > 1.0
+    fwi[scaled] = np.exp(2.72 * (0.434 * np.log(fwi[scaled])) ** 0.647)
+    return fwi
+
+def compute_fwi(temp, rh, wind, rain, months, state):
+    """
+    (날짜 × 그리드) 기상 배열에서 FWI 체계 6개 지수를 계산합니다.
+
+    반환:
+    --------
+    dict : FWI_CODES → (날짜 × 그리드) float32 배열 (state는 마지막 날짜 상태로 갱신됨)
+    """
+    codes = moisture_codes(temp, rh, wind, rain, months, state)
+    codes['isi'] = initial_spread_index(codes['ffmc'], np.maximum(wind, 0.0))
+    codes['bui'] = buildup_index(codes['dmc'], codes['dc'])
+    codes['fwi'] = fire_weather_index(codes['isi'], codes['bui'])
+    return codes
+
+def load_state(output_cube, grid_ids):
+    """
+    출력 큐브에 저장된 상태를 읽습니다.
+
+    반환:
+    --------
+    tuple : (상태가 가리키는 다음 날짜 오프셋, 상태 딕셔너리) 또는 저장된 상태가 없으면 (0, None)
+    """
+    path = os.path.join(output_cube, STATE_FILE)
+    if not os.path.exists(path):
+        return 0, None
+    with np.load(path) as saved:
+        if not np.array_equal(saved['grid_ids'], grid_ids):
+            raise ValueError(f"{path} was saved for a different grid index")
+        return int(saved['n_days']), {code: saved[code].astype(np.float32) for code in ('ffmc', 'dmc', 'dc')}
+
+def save_state(output_cube, n_days, state, grid_ids):
+    """날짜 오프셋 n_days 직전까지 계산한 상태를 임시 파일에 쓴 뒤 교체하여 저장합니다."""
+    path = os.path.join(output_cube, STATE_FILE)
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(tmp_path, n_days=n_days, grid_ids=grid_ids, **state)
+    os.replace(tmp_path, path)
+
+def update_fwi_cube(weather_cube, output_cube, variables, temp_unit='C', wind_unit='m/s', precip_scale=1.0,
+                    chunk_days=366):
+    """
+    FWI 큐브를 날씨 큐브의 마지막 날짜까지 계산합니다.
+
+    저장된 상태가 있으면 그 날짜부터, 없으면 첫 날짜부터 시작값으로 계산합니다.
+    상태는 날짜 청크마다 저장되므로 중간에 멈춰도 다시 실행하면 이어서 계산합니다.
+
+    매개변수:
+    -----------
+    variables : dict
+        'temp', 'rh', 'wind', 'precip' → 날씨 큐브 변수 이름
+
+    반환:
+    --------
+    int : 새로 계산한 날짜 수
+    """
+    weather = GridCube(weather_cube)
+    missing = [var for var in variables.values() if var not in weather.variables]
+    if missing:
+        raise ValueError(f"{weather_cube} has no variables {missing}")
+
+    if os.path.exists(os.path.join(output_cube, INDEX_FILE)):
+        out = GridCube(output_cube, mode='r+')
+        if out.start_date != weather.start_date or not np.array_equal(out.grid_ids, weather.grid_ids):
+            raise ValueError(f"{output_cube} does not share the date/grid index of {weather_cube}")
+        if out.variables != FWI_CODES:
+            raise ValueError(f"{output_cube} has variables {out.variables}, expected {FWI_CODES}")
+    else:
+        out = GridCube.create(output_cube, FWI_CODES, weather.grid_ids, weather.start_date)
+
+    d0, state = load_state(output_cube, weather.grid_ids)
+    if state is None:
+        state = initial_state(weather.n_grids)
+    d1 = weather.n_days
+    if d1 <= d0:
+        logger.info(f"FWI is up to date ({d0} days)")
+        return 0
+
+    if out.n_days < d1:
+        out.append_days(d1 - out.n_days)
+    logger.info(f"Computing FWI for days {d0}~{d1 - 1} "
+                f"({str(weather.dates[d0])} ~ {str(weather.dates[d1 - 1])}) over {weather.n_grids} grids")
+
+    temp_offset = -273.15 if temp_unit == 'K' else 0.0
+    wind_scale = 3.6 if wind_unit == 'm/s' else 1.0
+    months = weather.dates.astype('datetime64[M]').astype(np.int64) % 12 + 1
+
+    with metrics.stage('fwi', rows_in=(d1 - d0) * weather.n_grids) as st:
+        for c0 in range(d0, d1, chunk_days):
+            c1 = min(c0 + chunk_days, d1)
+
+            def read(var):
+                return np.asarray(weather.array(variables[var])[c0:c1], dtype=np.float32)
+
+            codes = compute_fwi(read('temp') + temp_offset, read('rh'), read('wind') * wind_scale,
+                                read('precip') * precip_scale, months[c0:c1], state)
+            for code, values in codes.items():
+                out.array(code)[c0:c1] = values
+            out.flush()
+            save_state(output_cube, c1, state, weather.grid_ids)
+        st.rows_out = (d1 - d0) * weather.n_grids
+
+    logger.info(f"FWI cube {output_cube} now has {d1} days")
+    return d1 - d0
+
+def main():
+    """산불 기상 지수를 계산하는 메인 함수."""
+    parser = setup_arg_parser()
+    args = parser.parse_args()
+    metrics.configure_from_args(args)
+
+    update_fwi_cube(
+        args.weather_cube,
+        args.output_cube,
+        {'temp': args.temp_var, 'rh': args.rh_var, 'wind': args.wind_var, 'precip': args.precip_var},
+        temp_unit=args.temp_unit,
+        wind_unit=args.wind_unit,
+        precip_scale=args.precip_scale,
+        chunk_days=args.chunk_days
+    )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+그리드 주변 셀의 값을 요약하는 공간 이웃 피처를 생성합니다.
+
+날짜별 그리드 벡터를 한국 범위 위도 × 경도 래스터(src/common/grid.py의 GridRaster)로 바꾼 뒤
+커널(box3, box5, idw3, idw5 등)의 각 오프셋만큼 래스터를 이동시켜 더하는 방식으로
+모든 날짜를 한 번에 합성곱하고, 다시 grid_id 벡터로 되돌립니다.
+값이 없는 셀(바다, 결측)은 가중치에서 제외되므로 해안 셀도 유효한 이웃만으로 평균이 계산됩니다.
+
+예: 어제 인접 셀 화재 여부(af_flag, box3, max, lag 1), 주변 평균 연료 수분(dfmc, idw5, mean)
+"""
+
+import os
+import re
+import sys
+import argparse
+import logging
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# 공용 모듈(src/common) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+from common import metrics
+from common.grid import add_grid_arguments, registry_from_args
+from common.schema import read_frame, cast_table
+from common.cube import GridCube
+from common.grid import GridRaster, KOREA_EXTENT
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('neighborhood')
+
+STATS = ('mean', 'sum', 'max')
+
+def setup_arg_parser():
+    """인자 파서를 설정하고 반환합니다."""
+    parser = argparse.ArgumentParser(description='그리드 래스터 합성곱으로 공간 이웃 피처 생성')
+
+    input_group = parser.add_mutually_exclusive_group(required=True)
+    input_group.add_argument('--input-cube', type=str,
+                             help='입력 그리드 큐브 디렉토리(날씨/피처 큐브)')
+    input_group.add_argument('--input-file', type=str,
+                             help='입력 데이터 파일(날짜, grid_id, 변수 형식의 CSV 또는 Parquet)')
+    parser.add_argument('--output-file', type=str, required=True,
+                        help='이웃 피처 출력 파일 경로(Parquet 형식)')
+    parser.add_argument('--variables', type=str, nargs='+', required=True,
+                        help='이웃 피처를 계산할 변수 목록')
+    parser.add_argument('--date-col', type=str, default='acq_date',
+                        help='입력 파일의 날짜 열 이름(기본값: acq_date)')
+    parser.add_argument('--kernels', type=str, nargs='+', default=['box3'],
+                        help='커널 목록: boxN(N×N 균등), idwN(N×N 거리 역가중) (기본값: box3)')
+    parser.add_argument('--stat', type=str, default='mean', choices=STATS,
+                        help='이웃 요약 방법(기본값: mean)')
+    parser.add_argument('--lags', type=int, nargs='+', default=[0],
+                        help='지연 일수 목록(예: 0 1, 기본값: 0)')
+    parser.add_argument('--include-center', action='store_true',
+                        help='중심 셀을 이웃에 포함')
+    parser.add_argument('--area-weighted', action='store_true',
+                        help='mean/sum에서 이웃 셀을 위도별 실제 셀 면적으로 가중')
+    add_grid_arguments(parser)
+    parser.add_argument('--fill-value', type=float, default=None,
+                        help='입력 파일에서 값이 없는 날짜-그리드에 채울 값(예: af_flag는 0, 기본값: NaN)')
+    parser.add_argument('--extent', type=float, nargs=4, default=KOREA_EXTENT,
+                        metavar=('WEST', 'EAST', 'SOUTH', 'NORTH'),
+                        help='래스터 범위(기본값: 124 132 33 39)')
+    parser.add_argument('--chunk-days', type=int, default=366,
+                        help='한 번에 처리할 날짜 수(기본값: 366)')
+    metrics.add_metrics_arguments(parser)
+
+    return parser
+
+def make_kernel(name, include_center=False):
+    """
+    커널 이름으로 가중치 배열을 만듭니다.
+
+    매개변수:
+    -----------
+    name : str
+        'boxN'(N×N 균등 가중치) 또는 'idwN'(N×N, 중심까지 셀 거리의 역수 가중치), N은 홀수
+    include_center : bool
+        중심 셀 포함 여부(idw 커널의 중심 가중치는 1)
+
+    반환:
+    --------
+    numpy.ndarray : (N, N) 가중치 배열
+    """
+    match = re.fullmatch(r'(box|idw)(\d+)', name)
+    if not match or int(match.group(2)) % 2 == 0:
+        raise ValueError(f"Invalid kernel '{name}' (expected boxN or idwN with odd N)")
+
+    kind, size = match.group(1), int(match.group(2))
+    r = size // 2
+    dy, dx = np.mgrid[-r:r + 1, -r:r + 1]
+    if kind == 'box':
+        kernel = np.ones((size, size))
+    else:
+        dist = np.hypot(dy, dx)
+        kernel = np.divide(1.0, dist, out=np.ones((size, size)), where=dist > 0)
+    if not include_center:
+        kernel[r, r] = 0.0
+    return kernel
+
+def convolve_rasters(rasters, kernel, stat='mean', cell_weights=None):
+    """
+    (날짜 × 행 × 열) 래스터 묶음에 커널을 적용합니다.
+
+    커널의 각 오프셋마다 패딩된 래스터의 이동 창을 누적하므로 날짜와 셀 전체가 한 번에 계산됩니다.
+    NaN 셀은 제외하며, 유효한 이웃이 없으면 NaN입니다.
+
+    매개변수:
+    -----------
+    rasters : numpy.ndarray
+        (날짜 × 행 × 열) 배열, 값이 없는 셀은 NaN
+    kernel : numpy.ndarray
+        (N × N) 가중치
+    stat : str
+        'mean'(가중 평균), 'sum'(가중 합), 'max'(가중치가 0이 아닌 이웃의 최대값)
+    cell_weights : numpy.ndarray, optional
+        (행 × 열) 셀별 가중치(예: GridRaster.cell_areas()의 셀 면적). 지정하면 커널 가중치에 곱하여
+        면적 가중 평균/합을 계산('max'에는 영향 없음)
+
+    반환:
+    --------
+    numpy.ndarray : rasters와 같은 모양의 float32 배열
+    """
+    n, h, w = rasters.shape
+    r = kernel.shape[0] // 2
+    padded = np.pad(rasters, ((0, 0), (r, r), (r, r)), constant_values=np.nan)
+    valid = ~np.isnan(padded)
+    filled = np.where(valid, padded, 0.0)
+    if cell_weights is not None and stat != 'max':
+        cell_weights = np.pad(np.asarray(cell_weights, dtype=np.float64), r, constant_values=0.0)
+        filled = filled * cell_weights
+        valid = valid * cell_weights
+
+    acc = np.zeros((n, h, w), dtype=np.float64) if stat != 'max' else np.full((n, h, w), np.nan)
+    wsum = np.zeros((n, h, w), dtype=np.float64)
+    for dy, dx in zip(*np.nonzero(kernel)):
+        weight = kernel[dy, dx]
+        window = (slice(None), slice(dy, dy + h), slice(dx, dx + w))
+        if stat == 'max':
+            np.fmax(acc, padded[window], out=acc)
+        else:
+            acc += weight * filled[window]
+            wsum += weight * valid[window]
+
+    if stat == 'mean':
+        acc = np.divide(acc, wsum, out=np.full_like(acc, np.nan), where=wsum > 0)
+    elif stat == 'sum':
+        acc[wsum == 0] = np.nan
+    return acc.astype(np.float32)
+
+def load_dense_from_file(input_file, variables, date_col, fill_value=None, grid_ids=None):
+    """
+    긴 테이블을 변수별 (날짜 × 그리드) 밀집 배열로 변환합니다.
+
+    af_flag처럼 양성 행만 있는 테이블은 grid_ids로 전체 그리드 축을 지정하고
+    fill_value(예: 0)로 나머지 칸을 채워야 이웃 셀이 결측으로 처리되지 않습니다.
+
+    반환:
+    --------
+    tuple : (날짜 배열, grid_id 배열, {변수: (날짜 × 그리드) float32 배열})
+    """
+    df = read_frame(input_file, columns=[date_col, 'grid_id'] + list(variables))
+
+    day_values = pd.to_datetime(df[date_col]).values.astype('datetime64[D]')
+    start, end = day_values.min(), day_values.max()
+    dates = np.arange(start, end + 1)
+    if grid_ids is None:
+        grid_ids, grid_pos = np.unique(df['grid_id'].values, return_inverse=True)
+        known = np.ones(len(df), dtype=bool)
+    else:
+        grid_ids = np.unique(np.asarray(grid_ids, dtype=np.int64))
+        grid_pos = np.minimum(np.searchsorted(grid_ids, df['grid_id'].values), len(grid_ids) - 1)
+        known = grid_ids[grid_pos] == df['grid_id'].values
+    day_pos = (day_values - start).astype(np.int64)
+
+    fill = np.nan if fill_value is None else fill_value
+    arrays = {}
+    for var in variables:
+        dense = np.full((len(dates), len(grid_ids)), fill, dtype=np.float32)
+        dense[day_pos[known], grid_pos[known]] = df[var].values[known]
+        arrays[var] = dense
+    logger.info(f"Loaded {len(df)} rows from {input_file}: {len(dates)} days x {len(grid_ids)} grids")
+    return dates, grid_ids, arrays
+
+def neighborhood_features(arrays, dates, grid_ids, kernels, stat='mean', lags=(0,), include_center=False,
+                          extent=KOREA_EXTENT, chunk_days=366, area_weighted=False):
+    """
+    변수별 (날짜 × 그리드) 배열에서 이웃 피처를 날짜 청크 단위로 계산합니다.
+
+    매개변수:
+    -----------
+    arrays : dict
+        {변수: (날짜 × 그리드) 배열}(numpy 배열 또는 memmap)
+    dates : numpy.ndarray
+        날짜 배열
+    grid_ids : numpy.ndarray
+        그리드 축의 grid_id
+    kernels : list
+        커널 이름 목록
+    stat : str
+        이웃 요약 방법
+    lags : list
+        지연 일수 목록(lag일 전 이웃 값을 해당 날짜에 사용)
+    include_center : bool
+        중심 셀 포함 여부
+    extent : list
+        래스터 범위
+    chunk_days : int
+        한 번에 처리할 날짜 수
+    area_weighted : bool
+        이웃 셀을 위도별 셀 면적으로 가중(mean/sum)
+
+    반환:
+    --------
+    iterator : (날짜 청크, {피처 이름: (청크 날짜 × 그리드) float32 배열})
+    """
+    raster = GridRaster(extent)
+    kernel_arrays = {name: make_kernel(name, include_center) for name in kernels}
+    cell_weights = raster.cell_areas() if area_weighted else None
+    max_lag = max(lags)
+
+    outside = ~(raster.flat_index(grid_ids) >= 0)
+    if outside.any():
+        logger.warning(f"{int(outside.sum())} grid_ids are outside the raster extent; their features are NaN")
+
+    for d0 in range(0, len(dates), chunk_days):
+        d1 = min(d0 + chunk_days, len(dates))
+        c0 = max(0, d0 - max_lag)
+        features = {}
+        for var, values in arrays.items():
+            rasters = raster.to_raster(np.asarray(values[c0:d1], dtype=np.float32), grid_ids)
+            for kernel_name, kernel in kernel_arrays.items():
+                convolved = raster.from_raster(convolve_rasters(rasters, kernel, stat, cell_weights), grid_ids)
+                for lag in lags:
+                    name = f"{var}_{kernel_name}_{stat}" + (f"_lag{lag}" if lag else '')
+                    out = np.full((d1 - d0, len(grid_ids)), np.nan, dtype=np.float32)
+                    # 날짜 t의 값은 t - lag의 이웃 요약
+                    src0 = d0 - lag
+                    first = max(0, c0 - src0)
+                    out[first:] = convolved[src0 + first - c0:d1 - lag - c0]
+                    features[name] = out
+        yield dates[d0:d1], features
+
+def main():
+    """공간 이웃 피처를 생성하는 메인 함수."""
+    parser = setup_arg_parser()
+    args = parser.parse_args()
+    metrics.configure_from_args(args)
+
+    with metrics.stage('load') as st:
+        if args.input_cube:
+            cube = GridCube(args.input_cube)
+            dates, grid_ids = cube.dates, cube.grid_ids
+            arrays = {var: cube.array(var) for var in args.variables}
+            for var in args.variables:
+                st.add_input_file(cube.variable_path(var))
+        else:
+            registry = registry_from_args(args)
+            grid_ids = registry.grid_ids if registry is not None else None
+            dates, grid_ids, arrays = load_dense_from_file(
+                args.input_file, args.variables, args.date_col, args.fill_value, grid_ids)
+            st.add_input_file(args.input_file)
+
+    output_dir = os.path.dirname(args.output_file)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    writer = None
+    total_rows = 0
+    with metrics.stage('convolve', rows_in=len(dates) * len(grid_ids)) as st:
+        for chunk_dates, features in neighborhood_features(
+                arrays, dates, grid_ids, args.kernels, stat=args.stat, lags=args.lags,
+                include_center=args.include_center, extent=args.extent, chunk_days=args.chunk_days,
+                area_weighted=args.area_weighted):
+            columns = {
+                'date': pa.array(np.repeat(chunk_dates, len(grid_ids)), type=pa.date32()),
+                'grid_id': pa.array(np.tile(grid_ids, len(chunk_dates)).astype(np.int32)),
+            }
+            for name, values in features.items():
+                columns[name] = pa.array(values.ravel(), from_pandas=True)
+            if writer is None:
+                table = cast_table(pa.table(columns))
+                writer = pq.ParquetWriter(args.output_file, table.schema, compression='zstd')
+            else:
+                table = cast_table(pa.table(columns), writer.schema)
+            writer.write_table(table)
+            total_rows += table.num_rows
+            logger.info(f"Wrote {str(chunk_dates[0])} ~ {str(chunk_dates[-1])}: {table.num_rows} rows")
+
+        if writer is not None:
+            writer.close()
+        st.rows_out = total_rows
+        st.add_output_file(args.output_file)
+
+    logger.info(f"Saved {total_rows} rows of neighborhood features to {args.output_file}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+날씨 큐브(weather/build_weather_cube.py)에서 선행 기상 조건 피처를 생성합니다.
+
+- N일 누적 강수량: 날짜 축 누적합의 차(cs[t] - cs[t-N])
+- 마지막 강우 이후 경과 일수: 강우일 인덱스의 누적 최대값
+- N일 최고 기온 / 최저 습도: 블록 단위 전방/후방 누적 max/min(van Herk/Gil-Werman)
+
+모든 그리드를 (날짜 × 그리드) 배열로 한 번에 계산하며, 출력 큐브가 이미 있으면
+새로 추가된 날짜만 (최대 창 길이 - 1)일의 이전 데이터와 함께 계산하여 이어 붙입니다.
+"""
+
+import os
+import sys
+import argparse
+import logging
+import numpy as np
+
+# 공용 모듈(src/common) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+from common import metrics
+from common.cube import GridCube, INDEX_FILE
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('rolling_weather')
+
+# 강우일이 한 번도 없었음을 나타내는 값
+NO_EVENT = np.iinfo(np.int64).min // 2
+
+def setup_arg_parser():
+    """인자 파서를 설정하고 반환합니다."""
+    parser = argparse.ArgumentParser(description='날씨 큐브에서 누적/지연 기상 피처 생성')
+
+    parser.add_argument('--weather-cube', type=str, required=True,
+                        help='입력 날씨 큐브 디렉토리')
+    parser.add_argument('--output-cube', type=str, required=True,
+                        help='피처 큐브 디렉토리(있으면 새 날짜만 계산하여 추가)')
+    parser.add_argument('--precip-var', type=str, default='precipitation',
+                        help='강수량 변수 이름(기본값: precipitation)')
+    parser.add_argument('--temp-var', type=str, default='temperature',
+                        help='기온 변수 이름(기본값: temperature)')
+    parser.add_argument('--rh-var', type=str, default='relative_humidity',
+                        help='상대습도 변수 이름(기본값: relative_humidity)')
+    parser.add_argument('--precip-windows', type=int, nargs='*', default=[3, 7, 30],
+                        help='누적 강수량 기간(일, 기본값: 3 7 30)')
+    parser.add_argument('--temp-max-windows', type=int, nargs='*', default=[7],
+                        help='최고 기온 기간(일, 기본값: 7)')
+    parser.add_argument('--rh-min-windows', type=int, nargs='*', default=[7],
+                        help='최저 상대습도 기간(일, 기본값: 7)')
+    parser.add_argument('--rain-threshold', type=float, default=1.0,
+                        help='강우일 기준 강수량(강수량 변수 단위, 기본값: 1.0, ERA5 tp(m)는 0.001)')
+    parser.add_argument('--grid-block', type=int, default=1024,
+                        help='한 번에 계산할 그리드 수(기본값: 1024)')
+    metrics.add_metrics_arguments(parser)
+
+    return parser
+
+def build_feature_specs(precip_var, temp_var, rh_var, precip_windows, temp_max_windows, rh_min_windows):
+    """
+    피처 정의 목록을 만듭니다.
+
+    반환:
+    --------
+    list : (피처 이름, 종류('sum', 'max', 'min', 'since'), 입력 변수, 기간) 튜플 목록
+    """
+    specs = [(f'precip_sum_{w}d', 'sum', precip_var, w) for w in precip_windows]
+    specs.append(('days_since_rain', 'since', precip_var, 1))
+    specs += [(f'temp_max_{w}d', 'max', temp_var, w) for w in temp_max_windows]
+    specs += [(f'rh_min_{w}d', 'min', rh_var, w) for w in rh_min_windows]
+    return specs
+
+def rolling_sum(values, window):
+    """
+    (날짜 × 그리드) 배열의 날짜 축 이동 합계를 누적합 차로 계산합니다.
+
+    기간 안에 NaN이 있거나 기간이 다 차지 않은 행은 NaN입니다.
+    """
+    n_days = values.shape[0]
+    valid = ~np.isnan(values)
+    zero_row = np.zeros((1, values.shape[1]))
+    cs = np.concatenate([zero_row, np.cumsum(np.where(valid, values, 0.0), axis=0, dtype=np.float64)])
+    cn = np.concatenate([zero_row, np.cumsum(~valid, axis=0, dtype=np.float64)])
+
+    out = np.full(values.shape, np.nan, dtype=np.float32)
+    if n_days >= window:
+        sums = cs[window:] - cs[:-window]
+        nans = cn[window:] - cn[:-window]
+        out[window - 1:] = np.where(nans > 0, np.nan, sums)
+    return out
+
+def rolling_extreme(values, window, op):
+    """
+    (날짜 × 그리드) 배열의 날짜 축 이동 최대/최소를 계산합니다(van Herk/Gil-Werman).
+
+    길이 window의 블록마다 전방/후방 누적값을 구하면, 각 기간은 두 블록 누적값 하나씩의
+    op로 얻어집니다. op는 NaN을 무시하는 np.fmax 또는 np.fmin입니다.
+    """
+    n_days, n_grids = values.shape
+    out = np.full(values.shape, np.nan, dtype=np.float32)
+    if n_days < window:
+        return out
+
+    pad = (-n_days) % window
+    padded = np.concatenate([values, np.full((pad, n_grids), np.nan, dtype=values.dtype)])
+    blocks = padded.reshape(-1, window, n_grids)
+    prefix = op.accumulate(blocks, axis=1).reshape(-1, n_grids)[:n_days]
+    suffix = op.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(-1, n_grids)[:n_days]
+
+    out[window - 1:] = op(suffix[:n_days - window + 1], prefix[window - 1:])
+    return out
+
+def days_since_event(event, first_day, last_event=None):
+    """
+    각 날짜에서 마지막 이벤트(강우) 이후 경과 일수를 계산합니다.
+
+    매개변수:
+    -----------
+    event : numpy.ndarray
+        (날짜 × 그리드) bool 배열
+    first_day : int
+        event 첫 행의 절대 날짜 오프셋
+    last_event : numpy.ndarray 또는 None
+        이전 구간의 그리드별 마지막 이벤트 절대 오프셋(없으면 NO_EVENT)
+
+    반환:
+    --------
+    tuple : (경과 일수 float32 배열, 그리드별 마지막 이벤트 오프셋)
+    """
+    n_days, n_grids = event.shape
+    days = (first_day + np.arange(n_days, dtype=np.int64))[:, None]
+    last = np.where(event, days, NO_EVENT)
+    if last_event is not None:
+        last[0] = np.maximum(last[0], last_event)
+    np.maximum.accumulate(last, axis=0, out=last)
+
+    since = np.where(last == NO_EVENT, np.nan, days - last).astype(np.float32)
+    return since, last[-1] if n_days else last_event
+
+def compute_block(weather, specs, g0, g1, d0, d1, context_start, rain_threshold, last_rain=None):
+    """
+    그리드 구간 [g0, g1)의 피처를 날짜 [d0, d1)에 대해 계산합니다.
+
+    context_start부터 읽어 기간이 이전 날짜에 걸치는 피처도 계산합니다.
+
+    반환:
+    --------
+    dict : {피처 이름: (d1 - d0, g1 - g0) float32 배열}
+    """
+    inputs = {}
+    for _, _, var, _ in specs:
+        if var not in inputs:
+            inputs[var] = np.asarray(weather.array(var)[context_start:d1, g0:g1], dtype=np.float64)
+
+    skip = d0 - context_start
+    features = {}
+    for name, kind, var, window in specs:
+        values = inputs[var]
+        if kind == 'sum':
+            result = rolling_sum(values, window)
+        elif kind == 'max':
+            result = rolling_extreme(values, window, np.fmax)
+        elif kind == 'min':
+            result = rolling_extreme(values, window, np.fmin)
+        elif kind == 'since':
+            event = np.nan_to_num(values[skip:], nan=-np.inf) >= rain_threshold
+            prev = None if last_rain is None else last_rain[g0:g1]
+            features[name], _ = days_since_event(event, d0, prev)
+            continue
+        else:
+            raise ValueError(f"Unknown feature kind: {kind}")
+        features[name] = result[skip:]
+    return features
+
+def update_rolling_features(weather_cube, output_cube, specs, rain_threshold=1.0, grid_block=1024):
+    """
+    피처 큐브를 날씨 큐브의 마지막 날짜까지 계산합니다.
+
+    출력 큐브가 있으면 이미 계산된 날짜 이후만 계산하여 추가합니다.
+
+    반환:
+    --------
+    int : 새로 계산한 날짜 수
+    """
+    weather = GridCube(weather_cube)
+    feature_names = [spec[0] for spec in specs]
+    max_window = max(spec[3] for spec in specs)
+
+    if os.path.exists(os.path.join(output_cube, INDEX_FILE)):
+        out = GridCube(output_cube, mode='r+')
+        if out.start_date != weather.start_date or not np.array_equal(out.grid_ids, weather.grid_ids):
+            raise ValueError(f"{output_cube} does not share the date/grid index of {weather_cube}")
+        if out.variables != feature_names:
+            raise ValueError(f"{output_cube} has features {out.variables}, expected {feature_names}")
+    else:
+        out = GridCube.create(output_cube, feature_names, weather.grid_ids, weather.start_date)
+
+    d0, d1 = out.n_days, weather.n_days
+    if d1 <= d0:
+        logger.info(f"Features are up to date ({out.n_days} days)")
+        return 0
+
+    # 이전 구간의 마지막 강우일(경과 일수에서 역산)
+    last_rain = None
+    if d0 > 0 and 'days_since_rain' in feature_names:
+        prev = np.asarray(out.array('days_since_rain')[d0 - 1], dtype=np.float64)
+        last_rain = np.where(np.isnan(prev), NO_EVENT, (d0 - 1) - np.nan_to_num(prev)).astype(np.int64)
+
+    context_start = max(0, d0 - (max_window - 1))
+    out.append_days(d1 - d0)
+    logger.info(f"Computing {len(feature_names)} features for days {d0}~{d1 - 1} "
+                f"({str(weather.dates[d0])} ~ {str(weather.dates[d1 - 1])}) over {weather.n_grids} grids")
+
+    with metrics.stage('rolling_features', rows_in=(d1 - context_start) * weather.n_grids) as st:
+        for g0 in range(0, weather.n_grids, grid_block):
+            g1 = min(g0 + grid_block, weather.n_grids)
+            block = compute_block(weather, specs, g0, g1, d0, d1, context_start, rain_threshold, last_rain)
+            for name, values in block.items():
+                out.array(name)[d0:d1, g0:g1] = values
+        out.flush()
+        st.rows_out = (d1 - d0) * weather.n_grids
+
+    logger.info(f"Feature cube {output_cube} now has {out.n_days} days")
+    return d1 - d0
+
+def main():
+    """누적/지연 기상 피처를 생성하는 메인 함수."""
+    parser = setup_arg_parser()
+    args = parser.parse_args()
+    metrics.configure_from_args(args)
+
+    specs = build_feature_specs(
+        args.precip_var, args.temp_var, args.rh_var,
+        args.precip_windows, args.temp_max_windows, args.rh_min_windows
+    )
+    update_rolling_features(
+        args.weather_cube,
+        args.output_cube,
+        specs,
+        rain_threshold=args.rain_threshold,
+        grid_block=args.grid_block
+    )
+
+if __name__ == '__main__':
+    main()
@@ -2,12 +2,20 @@
 # -*- coding: utf-8 -*-
 
 import os
+import sys
 import pandas as pd
 import numpy as np
 import argparse
 import logging
 from datetime import datetime
 
+# 공용 모듈(src/common) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from common import metrics
+from common.temporal import asof_join
+from common.grid import add_grid_arguments, registry_from_args
+from common.schema import read_frame, write_frame, frame_nbytes
+
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
@@ -31,17 +39,28 @@ def setup_arg_parser():
                         help='누락된 날씨 데이터를 보간')
     parser.add_argument('--fill-zeros', action='store_true',
                         help='누락된 af_flag 값을 0으로 채우기')
+    parser.add_argument('--asof-file', type=str, action='append', default=[],
+                        help='as-of 방식으로 결합할 월별/연별 공변량 파일(CSV 또는 Parquet, 여러 번 지정 가능)')
+    parser.add_argument('--asof-max-lag-days', type=int, default=None,
+                        help='공변량 값을 사용할 최대 경과 일수(기본값: 제한 없음)')
+    add_grid_arguments(parser)
+    metrics.add_metrics_arguments(parser)
     
     return parser
 
-def load_data(file_path):
+def load_data(file_path, strict=False):
     """
     CSV 또는 Parquet 파일에서 데이터를 로드합니다.
     
+    열은 공용 dtype 정책(common.schema)의 형식(int32 grid_id, float32 값, uint8 플래그 등)으로
+    변환되며, 범위를 벗어난 grid_id나 플래그 값이 있으면 ValueError가 발생합니다.
+    
     매개변수:
     -----------
     file_path : str
         데이터 파일 경로
+    strict : bool
+        파이프라인이 기록한 Parquet 파일이 dtype 정책을 따르지 않으면 ValueError 발생
         
     반환:
     --------
@@ -50,16 +69,9 @@ def load_data(file_path):
     """
     logger.info(f"Loading data from {file_path}")
     
-    # 확장자에서 파일 형식 결정
-    _, ext = os.path.splitext(file_path)
-    ext = ext.lower()
+    df = read_frame(file_path, strict=strict)
     
-    if ext == '.parquet':
-        df = pd.read_parquet(file_path)
-    else:  # 기본적으로 CSV로 설정
-        df = pd.read_csv(file_path)
-    
-    logger.info(f"Loaded {len(df)} rows from {file_path}")
+    logger.info(f"Loaded {len(df)} rows ({frame_nbytes(df) / 1024 ** 2:.1f} MB) from {file_path}")
     return df
 
 def join_data(weather_df, target_df, date_col='acq_date', fill_zeros=False):
@@ -118,6 +130,53 @@ def join_data(weather_df, target_df, date_col='acq_date', fill_zeros=False):
     
     return merged_df
 
+def join_asof_covariates(df, covariate_files, date_col='acq_date', max_lag_days=None):
+    """
+    월별/연별 공변량(LAI, 토지피복, 인구 등)을 as-of 방식으로 결합합니다.
+    
+    각 행에는 같은 grid_id에서 해당 날짜 이전(같은 날 포함)의 가장 최근 공변량 값이 붙습니다.
+    
+    매개변수:
+    -----------
+    df : pandas.DataFrame
+        날짜와 grid_id가 있는 일별 데이터
+    covariate_files : list
+        공변량 파일 경로 목록(grid_id와 'date' 또는 'time'이 포함된 날짜 열 필요)
+    date_col : str
+        df의 날짜 열 이름
+    max_lag_days : int 또는 None
+        이보다 오래된 공변량 값은 사용하지 않음
+        
+    반환:
+    --------
+    pandas.DataFrame
+        공변량 열이 추가된 데이터
+    """
+    df[date_col] = pd.to_datetime(df[date_col])
+    
+    for covariate_file in covariate_files:
+        cov_df = load_data(covariate_file)
+        date_candidates = [c for c in cov_df.columns if 'date' in c.lower() or c.lower() == 'time']
+        if not date_candidates:
+            raise ValueError(f"No date column found in {covariate_file}")
+        cov_date_col = date_candidates[0]
+        
+        # 숫자형 값 열만 사용하고, 이미 있는 열 이름은 파일 이름을 붙여 구분
+        stem = os.path.splitext(os.path.basename(covariate_file))[0]
+        value_cols = [c for c in cov_df.columns
+                      if c not in ('grid_id', cov_date_col, 'lat', 'lon')
+                      and pd.api.types.is_numeric_dtype(cov_df[c])]
+        cov_df = cov_df.rename(columns={c: f"{c}_{stem}" for c in value_cols if c in df.columns})
+        value_cols = [f"{c}_{stem}" if c in df.columns else c for c in value_cols]
+        
+        df = asof_join(df, cov_df, date_col=date_col, right_date_col=cov_date_col,
+                       value_cols=value_cols, max_lag_days=max_lag_days)
+        
+        matched = df[value_cols[0]].notna().sum() if value_cols else 0
+        logger.info(f"As-of joined {value_cols} from {covariate_file}: {matched}/{len(df)} rows matched")
+    
+    return df
+
 def interpolate_weather_data(df, date_col='acq_date'):
     """
     누락된 날씨 데이터를 보간합니다.
@@ -165,22 +224,51 @@ def main():
     # 명령줄 인수 구문 분석
     parser = setup_arg_parser()
     args = parser.parse_args()
+    metrics.configure_from_args(args)
     
     # 데이터 로드
-    weather_df = load_data(args.weather_file)
-    target_df = load_data(args.target_file)
+    with metrics.stage('load') as st:
+        weather_df = load_data(args.weather_file, strict=True)
+        target_df = load_data(args.target_file, strict=True)
+        st.add_input_file(args.weather_file)
+        st.add_input_file(args.target_file)
+        
+        # 유효 그리드(육지) 밖의 행은 결합 전에 제외
+        registry = registry_from_args(args)
+        if registry is not None:
+            n_weather, n_target = len(weather_df), len(target_df)
+            weather_df = registry.filter_frame(weather_df)
+            target_df = registry.filter_frame(target_df)
+            logger.info(f"Kept {len(weather_df)}/{n_weather} weather rows and "
+                        f"{len(target_df)}/{n_target} target rows inside {len(registry)} registry grids")
+        st.rows_out = len(weather_df) + len(target_df)
     
     # 데이터 결합
-    joined_data = join_data(
-        weather_df,
-        target_df,
-        date_col=args.date_col,
-        fill_zeros=args.fill_zeros
-    )
+    with metrics.stage('join', rows_in=len(weather_df) + len(target_df)) as st:
+        joined_data = join_data(
+            weather_df,
+            target_df,
+            date_col=args.date_col,
+            fill_zeros=args.fill_zeros
+        )
+        st.rows_out = len(joined_data)
     
     # 지정된 경우 누락된 날씨 데이터 보간
     if args.interpolate_missing:
-        joined_data = interpolate_weather_data(joined_data, date_col=args.date_col)
+        with metrics.stage('interpolate', rows_in=len(joined_data)) as st:
+            joined_data = interpolate_weather_data(joined_data, date_col=args.date_col)
+            st.rows_out = len(joined_data)
+    
+    # 월별/연별 공변량 as-of 결합
+    if args.asof_file:
+        with metrics.stage('asof_join', rows_in=len(joined_data)) as st:
+            joined_data = join_asof_covariates(
+                joined_data,
+                args.asof_file,
+                date_col=args.date_col,
+                max_lag_days=args.asof_max_lag_days
+            )
+            st.rows_out = len(joined_data)
     
     # 출력 디렉토리가 없으면 생성
     output_dir = os.path.dirname(args.output_file)
@@ -200,15 +288,10 @@ def main():
         output_file = f"{new_base_name}{ext}"
         logger.info(f"Added date range to output filename: {output_file}")
     
-    # 파일 확장자에서 출력 형식 결정
-    _, ext = os.path.splitext(output_file)
-    ext = ext.lower()
-    
-    # 결합된 데이터 저장
-    if ext == '.parquet':
-        joined_data.to_parquet(output_file, index=False)
-    else:  # 기본적으로 CSV로 설정
-        joined_data.to_csv(output_file, index=False)
+    # 결합된 데이터 저장(파일 확장자에 따라 CSV 또는 Parquet, 공용 dtype 정책 적용)
+    with metrics.stage('write', rows_in=len(joined_data)) as st:
+        write_frame(joined_data, output_file)
+        st.add_output_file(output_file)
     
     logger.info(f"Saved joined data to {output_file}")
     
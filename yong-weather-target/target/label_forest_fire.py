@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import argparse
+import logging
+import numpy as np
+import pandas as pd
+
+# 공용 모듈(src/common) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+from common import metrics
+from common.grid import GridRaster, KOREA_EXTENT, latlon_to_grid_id
+from common.schema import read_frame, write_frame
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('label_forest_fire')
+
+# IGBP Land Cover Type1 산림 코드 (sara/land_cover/README.md 참고)
+DEFAULT_FOREST_CLASSES = [1, 2, 3, 4, 5]
+# 0 = 노데이터, 1~17 = IGBP 코드
+N_CLASSES = 18
+
+def setup_arg_parser():
+    """인자 파서를 설정하고 반환합니다."""
+    parser = argparse.ArgumentParser(description='토지피복 산림 여부로 af_flag2(산림 화재 플래그) 생성')
+
+    parser.add_argument('--af-flag-file', type=str, required=True,
+                        help='af_flag 파일 경로(CSV 또는 Parquet, 예: af_flag_full_combined.parquet)')
+    parser.add_argument('--landcover-file', type=str, required=True,
+                        help='연도별 토지피복 파일 경로(예: landcover_type1_korea_2001_2023.parquet)')
+    parser.add_argument('--output-file', type=str, required=True,
+                        help='af_flag2 열을 추가한 출력 파일 경로(.csv 또는 .parquet)')
+    parser.add_argument('--forest-classes', type=int, nargs='+', default=DEFAULT_FOREST_CLASSES,
+                        help='산림으로 볼 lc_type1 코드 목록(기본값: 1 2 3 4 5)')
+    parser.add_argument('--normalization', type=str, choices=['mode', 'fraction'], default='mode',
+                        help='한 grid_id에 여러 픽셀이 있을 때 정규화 방법: mode(최빈 클래스) 또는 '
+                             'fraction(산림 픽셀 비율) (기본값: mode)')
+    parser.add_argument('--min-forest-fraction', type=float, default=0.5,
+                        help='fraction 정규화에서 산림으로 볼 최소 산림 픽셀 비율(기본값: 0.5)')
+    parser.add_argument('--date-col', type=str, default=None,
+                        help='af_flag 파일의 날짜 열 이름(기본값: date 또는 acq_date 자동 선택)')
+    metrics.add_metrics_arguments(parser)
+
+    return parser
+
+def class_counts(landcover_df, raster):
+    """
+    토지피복 픽셀을 (연도, 셀, 클래스)별 픽셀 수로 집계합니다.
+
+    매개변수:
+    -----------
+    landcover_df : pandas.DataFrame
+        date, grid_id(또는 latitude/longitude), lc_type1 열이 있는 토지피복 데이터
+    raster : GridRaster
+        셀 번호를 정하는 한국 범위 래스터
+
+    반환:
+    --------
+    tuple
+        (연도 배열, (연도 수, 셀 수, 클래스 수) int32 픽셀 수 배열)
+    """
+    if 'grid_id' in landcover_df.columns:
+        grid_ids = landcover_df['grid_id'].to_numpy(dtype=np.int64)
+    else:
+        grid_ids = latlon_to_grid_id(landcover_df['latitude'].to_numpy(), landcover_df['longitude'].to_numpy())
+    cells = raster.flat_index(grid_ids)
+
+    years_of_rows = pd.to_datetime(landcover_df['date']).dt.year.to_numpy()
+    years, year_idx = np.unique(years_of_rows, return_inverse=True)
+    classes = landcover_df['lc_type1'].fillna(0).to_numpy(dtype=np.int64)
+
+    valid = (cells >= 0) & (classes >= 0) & (classes < N_CLASSES)
+    if not valid.all():
+        logger.warning(f"Skipping {(~valid).sum()} land cover rows outside the extent or with unknown classes")
+
+    keys = (year_idx[valid] * raster.size + cells[valid]) * N_CLASSES + classes[valid]
+    counts = np.bincount(keys, minlength=len(years) * raster.size * N_CLASSES)
+    return years, counts.astype(np.int32).reshape(len(years), raster.size, N_CLASSES)
+
+def build_forest_mask(counts, forest_classes=DEFAULT_FOREST_CLASSES, normalization='mode', min_fraction=0.5):
+    """
+    (연도, 셀, 클래스) 픽셀 수에서 (연도 × 셀) uint8 산림 여부 배열을 만듭니다.
+
+    매개변수:
+    -----------
+    counts : numpy.ndarray
+        class_counts가 반환한 픽셀 수 배열
+    forest_classes : list of int
+        산림으로 볼 lc_type1 코드
+    normalization : str
+        'mode'는 셀의 최빈 클래스(노데이터 제외)가 산림이면 1,
+        'fraction'은 산림 픽셀 비율이 min_fraction 이상이면 1
+    min_fraction : float
+        fraction 정규화의 최소 산림 픽셀 비율
+
+    반환:
+    --------
+    numpy.ndarray
+        (연도 수, 셀 수) uint8 배열, 산림이면 1
+    """
+    is_forest = np.zeros(N_CLASSES, dtype=bool)
+    is_forest[[c for c in forest_classes if 0 < c < N_CLASSES]] = True
+
+    if normalization == 'mode':
+        # 노데이터(0)를 뺀 클래스 중 최빈값, 동률이면 작은 코드
+        dominant = counts[:, :, 1:].argmax(axis=2) + 1
+        has_data = counts[:, :, 1:].any(axis=2)
+        return (is_forest[dominant] & has_data).astype(np.uint8)
+
+    if normalization == 'fraction':
+        total = counts[:, :, 1:].sum(axis=2)
+        forest = counts[:, :, is_forest].sum(axis=2)
+        fraction = forest / np.maximum(total, 1)
+        return (fraction >= min_fraction).astype(np.uint8)
+
+    raise ValueError(f"Unknown normalization: {normalization}")
+
+def nearest_year_index(years, query_years):
+    """
+    각 조회 연도에 가장 가까운 토지피복 연도의 위치를 반환합니다(거리가 같으면 이전 연도).
+
+    2001년 이전은 2001년, 2023년 이후는 2023년 토지피복을 사용하게 됩니다.
+    """
+    years = np.asarray(years)
+    query_years = np.asarray(query_years)
+    right = np.clip(np.searchsorted(years, query_years), 0, len(years) - 1)
+    left = np.clip(right - 1, 0, len(years) - 1)
+    use_left = np.abs(query_years - years[left]) <= np.abs(years[right] - query_years)
+    return np.where(use_left, left, right)
+
+def label_forest_fires(af_df, years, forest_mask, raster, date_col='date'):
+    """
+    af_flag 행마다 (연도, 셀) 위치의 산림 여부를 배열 인덱싱 한 번으로 조회하여 af_flag2를 추가합니다.
+
+    매개변수:
+    -----------
+    af_df : pandas.DataFrame
+        날짜, grid_id, af_flag 열이 있는 데이터프레임
+    years : numpy.ndarray
+        forest_mask 행에 대응하는 연도
+    forest_mask : numpy.ndarray
+        (연도 수, 셀 수) uint8 산림 여부 배열
+    raster : GridRaster
+        셀 번호를 정하는 한국 범위 래스터
+    date_col : str
+        날짜 열 이름
+
+    반환:
+    --------
+    pandas.DataFrame
+        af_flag2 열(산림이면 af_flag, 아니면 0)이 추가된 데이터프레임
+    """
+    row_years = pd.to_datetime(af_df[date_col]).dt.year.to_numpy()
+    # 고유 연도만 최근접 연도로 변환한 뒤 행에 펼침
+    unique_years, inverse = np.unique(row_years, return_inverse=True)
+    year_idx = nearest_year_index(years, unique_years)[inverse]
+
+    outside = np.setdiff1d(unique_years, years)
+    if len(outside):
+        logger.info(f"Years without land cover use the nearest year: {outside.tolist()}")
+
+    cells = raster.flat_index(af_df['grid_id'].to_numpy(dtype=np.int64))
+    inside = cells >= 0
+    forest = forest_mask[year_idx, np.maximum(cells, 0)] & inside
+
+    af_flag = af_df['af_flag'].to_numpy()
+    result = af_df.copy()
+    result['af_flag2'] = np.where(forest.astype(bool), af_flag, 0).astype(af_flag.dtype)
+    return result
+
+def main():
+    """af_flag에 산림 화재 플래그 af_flag2를 추가하는 주요 함수."""
+    parser = setup_arg_parser()
+    args = parser.parse_args()
+    metrics.configure_from_args(args)
+
+    raster = GridRaster(KOREA_EXTENT)
+
+    with metrics.stage('load_landcover') as st:
+        landcover_df = read_frame(args.landcover_file)
+        st.add_input_file(args.landcover_file)
+        st.rows_in = len(landcover_df)
+        years, counts = class_counts(landcover_df, raster)
+        del landcover_df
+        forest_mask = build_forest_mask(counts, args.forest_classes, args.normalization, args.min_forest_fraction)
+    logger.info(f"Land cover years {years.min()}-{years.max()}, forest cells per year: "
+                f"{forest_mask.sum(axis=1).min()}-{forest_mask.sum(axis=1).max()} "
+                f"(classes {args.forest_classes}, {args.normalization})")
+
+    with metrics.stage('load') as st:
+        af_df = read_frame(args.af_flag_file, strict=True)
+        st.add_input_file(args.af_flag_file)
+        st.rows_out = len(af_df)
+    date_col = args.date_col or ('date' if 'date' in af_df.columns else 'acq_date')
+
+    with metrics.stage('transform', rows_in=len(af_df)) as st:
+        result = label_forest_fires(af_df, years, forest_mask, raster, date_col=date_col)
+        st.rows_out = len(result)
+    positives = int((result['af_flag'] > 0).sum())
+    forest_positives = int((result['af_flag2'] > 0).sum())
+    logger.info(f"af_flag2 keeps {forest_positives}/{positives} fire rows on forest land cover")
+
+    output_dir = os.path.dirname(args.output_file)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    with metrics.stage('write', rows_in=len(result)) as st:
+        write_frame(result, args.output_file)
+        st.add_output_file(args.output_file)
+    logger.info(f"Saved af_flag2 data to {args.output_file}")
+
+if __name__ == '__main__':
+    main()
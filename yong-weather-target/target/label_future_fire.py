@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import argparse
+import logging
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# 공용 모듈(src/common) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+from common import metrics
+from common.grid import add_grid_arguments, registry_from_args
+from common.schema import cast_table, read_frame, write_frame
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('label_future_fire')
+
+DEFAULT_HORIZONS = [1, 3, 7, 14]
+
+def setup_arg_parser():
+    """인자 파서를 설정하고 반환합니다."""
+    parser = argparse.ArgumentParser(description='af_flag에서 N일 안의 화재 여부(fire_next_<N>d) 예측 라벨 생성')
+
+    parser.add_argument('--af-flag-file', type=str, required=True,
+                        help='af_flag 파일 경로(CSV 또는 Parquet, 예: af_flag_korea.csv)')
+    parser.add_argument('--output-file', type=str, required=True,
+                        help='라벨 출력 파일 경로(.csv 또는 .parquet, --dense는 .parquet만)')
+    parser.add_argument('--horizons', type=int, nargs='+', default=DEFAULT_HORIZONS,
+                        help='라벨 기간 목록(일, 기본값: 1 3 7 14), 기간 N의 라벨은 다음 날부터 N일 안에 화재가 있으면 1')
+    parser.add_argument('--flag-col', type=str, default='af_flag',
+                        help='화재로 볼 플래그 열(기본값: af_flag, 예: af_flag2, af_flag_50)')
+    parser.add_argument('--date-col', type=str, default=None,
+                        help='af_flag 파일의 날짜 열 이름(기본값: date 또는 acq_date 자동 선택)')
+    parser.add_argument('--start-date', type=str,
+                        help='라벨 시작 날짜(YYYY-MM-DD, 기본값: 파일의 첫 날짜)')
+    parser.add_argument('--end-date', type=str,
+                        help='관측 마지막 날짜(YYYY-MM-DD, 기본값: 파일의 마지막 날짜), '
+                             '기간이 이 날짜를 넘는 라벨은 알 수 없음')
+    parser.add_argument('--dense', action='store_true',
+                        help='양성 행만이 아니라 모든 (날짜, 그리드) 행을 저장(Parquet), '
+                             '기간이 관측 마지막 날짜를 넘는 라벨은 null')
+    parser.add_argument('--chunk-days', type=int, default=366,
+                        help='한 번에 계산할 날짜 수(기본값: 366)')
+    add_grid_arguments(parser)
+    metrics.add_metrics_arguments(parser)
+
+    return parser
+
+def horizon_labels(fire, horizons, n_days):
+    """
+    (날짜 × 그리드) 화재 배열에서 기간별 미래 화재 여부를 날짜 축 누적합의 차로 한 번에 계산합니다.
+
+    매개변수:
+    -----------
+    fire : numpy.ndarray
+        (n_days + max(horizons)) × 그리드 bool 배열, 관측 기간 밖의 행은 False
+    horizons : list of int
+        라벨 기간(일)
+    n_days : int
+        라벨을 계산할 앞쪽 날짜 수
+
+    반환:
+    --------
+    dict : 기간 → (n_days × 그리드) bool 배열, 행 t는 fire[t+1 : t+기간+1] 중 화재가 있으면 True
+    """
+    csum = np.zeros((len(fire) + 1, fire.shape[1]), dtype=np.int32)
+    np.cumsum(fire, axis=0, out=csum[1:])
+    return {h: csum[1 + h:1 + h + n_days] > csum[1:1 + n_days] for h in horizons}
+
+def future_fire_labels(fire_days, fire_grids, n_grids, n_days, horizons, chunk_days=366):
+    """
+    양성 (날짜, 그리드) 위치를 날짜 청크별 (날짜 × 그리드) 배열에 흩뿌린 뒤 기간별 라벨을 계산합니다.
+
+    매개변수:
+    -----------
+    fire_days : numpy.ndarray
+        화재가 있는 행의 날짜 오프셋(0 ~ n_days-1, 오름차순 정렬)
+    fire_grids : numpy.ndarray
+        화재가 있는 행의 그리드 위치(0 ~ n_grids-1)
+    n_grids : int
+        그리드 수
+    n_days : int
+        관측 기간 날짜 수
+    horizons : list of int
+        라벨 기간(일)
+    chunk_days : int
+        한 번에 계산할 날짜 수
+
+    반환:
+    --------
+    generator
+        (청크 시작 오프셋, {기간: (청크 날짜 수 × 그리드) bool 배열}, {기간: 라벨을 알 수 있는 앞쪽 날짜 수}) 튜플
+    """
+    max_h = max(horizons)
+    for c0 in range(0, n_days, chunk_days):
+        c1 = min(c0 + chunk_days, n_days)
+        # 청크 날짜와 그 뒤 max_h일의 화재를 배열에 기록
+        lo, hi = np.searchsorted(fire_days, [c0, c1 + max_h])
+        fire = np.zeros((c1 - c0 + max_h, n_grids), dtype=bool)
+        fire[fire_days[lo:hi] - c0, fire_grids[lo:hi]] = True
+
+        labels = horizon_labels(fire, horizons, c1 - c0)
+        # 오프셋 t의 기간 h 라벨은 t + h <= n_days - 1일 때만 확정
+        known = {h: int(np.clip(n_days - h - c0, 0, c1 - c0)) for h in horizons}
+        yield c0, labels, known
+
+def main():
+    """af_flag에서 미래 기간 화재 라벨을 만드는 주요 함수."""
+    parser = setup_arg_parser()
+    args = parser.parse_args()
+    metrics.configure_from_args(args)
+
+    horizons = sorted(set(args.horizons))
+    if min(horizons) < 1:
+        parser.error('--horizons must be positive')
+    if args.dense and not args.output_file.lower().endswith('.parquet'):
+        parser.error('--dense writes Parquet, use a .parquet output file')
+
+    with metrics.stage('load') as st:
+        af_df = read_frame(args.af_flag_file, strict=True)
+        st.add_input_file(args.af_flag_file)
+        st.rows_out = len(af_df)
+    date_col = args.date_col or ('date' if 'date' in af_df.columns else 'acq_date')
+    if args.flag_col not in af_df.columns:
+        raise ValueError(f"{args.af_flag_file} has no column '{args.flag_col}'")
+
+    days = af_df[date_col].to_numpy().astype('datetime64[D]')
+    start = np.datetime64(args.start_date, 'D') if args.start_date else days.min()
+    end = np.datetime64(args.end_date, 'D') if args.end_date else days.max()
+    n_days = int((end - start).astype(np.int64)) + 1
+    if n_days <= 0:
+        raise ValueError(f"End date {end} is before start date {start}")
+
+    # 그리드 축: --dense는 유효 그리드 목록(없으면 파일의 그리드), 양성 행만 저장할 때는 파일의 그리드
+    registry = registry_from_args(args) if args.dense else None
+    grid_values = af_df['grid_id'].to_numpy(dtype=np.int64)
+    grid_ids = np.unique(registry.grid_ids if registry is not None else grid_values)
+
+    offsets = (days - start).astype(np.int64)
+    grid_pos = np.minimum(np.searchsorted(grid_ids, grid_values), len(grid_ids) - 1)
+    positive = (af_df[args.flag_col].fillna(0).to_numpy() > 0) & (offsets >= 0) & (offsets < n_days)
+    outside = positive & (grid_ids[grid_pos] != grid_values)
+    if outside.any():
+        logger.warning(f"Skipping {int(outside.sum())} fire rows outside the grid list")
+    positive &= ~outside
+    order = np.argsort(offsets[positive], kind='stable')
+    fire_days, fire_grids = offsets[positive][order], grid_pos[positive][order]
+    logger.info(f"{len(fire_days)} fire rows over {n_days} days ({start} ~ {end}) x {len(grid_ids)} grids, "
+                f"horizons {horizons}")
+
+    output_dir = os.path.dirname(args.output_file)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    columns = [f'fire_next_{h}d' for h in horizons]
+    dates = start + np.arange(n_days).astype('timedelta64[D]')
+    writer = None
+    frames = []
+    total_rows = 0
+    with metrics.stage('label', rows_in=len(af_df)) as st:
+        for c0, labels, known in future_fire_labels(fire_days, fire_grids, len(grid_ids), n_days, horizons,
+                                                    args.chunk_days):
+            n = len(labels[horizons[0]])
+            if args.dense:
+                table = {
+                    date_col: pa.array(np.repeat(dates[c0:c0 + n], len(grid_ids)), type=pa.date32()),
+                    'grid_id': pa.array(np.tile(grid_ids, n).astype(np.int32)),
+                }
+                for h, name in zip(horizons, columns):
+                    values = labels[h].astype(np.float32)
+                    values[known[h]:] = np.nan
+                    table[name] = pa.array(values.ravel(), from_pandas=True)
+                table = cast_table(pa.table(table), writer.schema if writer is not None else None)
+                if writer is None:
+                    writer = pq.ParquetWriter(args.output_file, table.schema, compression='zstd')
+                writer.write_table(table)
+                total_rows += table.num_rows
+            else:
+                # 양성 행만: 기간이 길수록 라벨이 포함 관계이므로 가장 긴 기간이 양성인 행을 모음
+                rows, cols = np.nonzero(labels[horizons[-1]])
+                frame = pd.DataFrame({date_col: dates[c0 + rows], 'grid_id': grid_ids[cols]})
+                for h, name in zip(horizons, columns):
+                    frame[name] = labels[h][rows, cols].astype(np.uint8)
+                frames.append(frame)
+                total_rows += len(frame)
+
+        if writer is not None:
+            writer.close()
+        elif not args.dense:
+            result = pd.concat(frames, ignore_index=True) if frames else \
+                pd.DataFrame({date_col: pd.Series(dtype='datetime64[ns]'), 'grid_id': pd.Series(dtype=np.int32),
+                              **{name: pd.Series(dtype=np.uint8) for name in columns}})
+            for name in columns:
+                logger.info(f"{name}: {int(result[name].sum())} positive rows")
+            write_frame(result, args.output_file)
+        st.rows_out = total_rows
+        st.add_output_file(args.output_file)
+    logger.info(f"Saved {total_rows} {'dense' if args.dense else 'positive'} label rows to {args.output_file}")
+
+if __name__ == '__main__':
+    main()
@@ -10,6 +10,13 @@ from datetime import datetime
 import logging
 import glob
 
+# 공용 모듈(src/common) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+from common import metrics
+from common.grid import add_grid_arguments, registry_from_args
+from common.prefetch import prefetch, add_prefetch_arguments
+from common.schema import write_frame
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -23,7 +30,7 @@ def setup_arg_parser():
     parser.add_argument('--input-dir', type=str, required=True,
                         help='원시 MODIS 활성 화재 CSV 파일이 포함된 디렉토리')
     parser.add_argument('--output-file', type=str, required=True,
-                        help='처리된 데이터의 출력 파일 경로(CSV 형식)')
+                        help='처리된 데이터의 출력 파일 경로(CSV 또는 Parquet 형식)')
     parser.add_argument('--min-confidence', type=int, default=30,
                         help='화재 감지를 위한 최소 신뢰도 수준(기본값: 30)')
     parser.add_argument('--date-col', type=str, default='acq_date',
@@ -32,10 +39,18 @@ def setup_arg_parser():
                         help='필터링을 위한 시작 날짜(YYYY-MM-DD 형식)')
     parser.add_argument('--end-date', type=str, 
                         help='필터링을 위한 종료 날짜(YYYY-MM-DD 형식)')
+    parser.add_argument('--confidence-thresholds', type=int, nargs='+', default=None,
+                        help='신뢰도 기준 목록(예: 30 50 80), 지정 시 (날짜, 그리드)별 최대 신뢰도 confidence_max와 '
+                             '기준별 af_flag_<기준> 열을 한 번에 생성')
+    parser.add_argument('--fire-stats', action='store_true',
+                        help='감지 수, FRP 최대/합계, 평균 밝기, 주/야간 및 Terra/Aqua 감지 수 열 추가')
+    add_grid_arguments(parser)
+    add_prefetch_arguments(parser)
+    metrics.add_metrics_arguments(parser)
     
     return parser
 
-def load_af_data(input_dir, date_col='acq_date', start_date=None, end_date=None):
+def load_af_data(input_dir, date_col='acq_date', start_date=None, end_date=None, prefetch_depth=None):
     """
     입력 디렉토리의 CSV 파일에서 MODIS 활성 화재 데이터를 로드합니다.
     
@@ -49,6 +64,8 @@ def load_af_data(input_dir, date_col='acq_date', start_date=None, end_date=None)
         필터링을 위한 선택적 시작 날짜(YYYY-MM-DD 형식)
     end_date : str 또는 None
         필터링을 위한 선택적 종료 날짜(YYYY-MM-DD 형식)
+    prefetch_depth : int 또는 None
+        현재 파일을 처리하는 동안 미리 읽을 파일 수(None이면 common.prefetch 기본값, 0이면 순차)
         
     반환:
     --------
@@ -67,12 +84,12 @@ def load_af_data(input_dir, date_col='acq_date', start_date=None, end_date=None)
     
     logger.info(f"Found {len(csv_files)} CSV files")
     
-    # 모든 CSV 파일을 데이터프레임 목록으로 로드
+    # 모든 CSV 파일을 데이터프레임 목록으로 로드(다음 파일은 백그라운드 스레드에서 미리 읽음)
     dfs = []
-    for file in csv_files:
+    for file, fetch in prefetch(csv_files, pd.read_csv, depth=prefetch_depth):
         logger.debug(f"Loading {file}")
         try:
-            df = pd.read_csv(file)
+            df = fetch()
             dfs.append(df)
         except Exception as e:
             logger.error(f"Error loading {file}: {e}")
@@ -128,7 +145,104 @@ def latlon_to_grid_id(lat, lon):
     
     return grid_id
 
-def process_af_data(df, min_confidence=30):
+# (날짜, 그리드) 정수 키 = 날짜(1970-01-01 기준 일수) * GRID_KEY_SPAN + grid_id
+GRID_KEY_SPAN = 1800 * 3600
+
+# --fire-stats로 추가되는 열과 저장 형식
+FIRE_STAT_DTYPES = {
+    'fire_count': np.uint16,
+    'frp_max': np.float32,
+    'frp_sum': np.float32,
+    'brightness_mean': np.float32,
+    'day_count': np.uint16,
+    'night_count': np.uint16,
+    'terra_count': np.uint16,
+    'aqua_count': np.uint16,
+}
+
+def date_grid_keys(dates, grid_ids):
+    """
+    날짜와 그리드 ID를 하나의 int64 키로 결합합니다.
+
+    매개변수:
+    -----------
+    dates : pandas.Series
+        datetime 형식의 날짜
+    grid_ids : array-like
+        그리드 ID
+
+    반환:
+    --------
+    numpy.ndarray
+        정렬 순서가 (날짜, grid_id) 순서와 같은 int64 키
+    """
+    days = dates.to_numpy().astype('datetime64[D]').astype(np.int64)
+    return days * GRID_KEY_SPAN + np.asarray(grid_ids, dtype=np.int64)
+
+def aggregate_fire_stats(df, inverse, n_groups):
+    """
+    (날짜, 그리드) 그룹별 화재 통계를 그룹 번호에 대한 np.bincount로 한 번에 계산합니다.
+
+    입력에 없는 열(frp, brightness, daynight, satellite)의 통계는 생략합니다.
+
+    매개변수:
+    -----------
+    df : pandas.DataFrame
+        그룹에 속한 활성 화재 감지 행
+    inverse : numpy.ndarray
+        각 행의 그룹 번호(0 ~ n_groups-1)
+    n_groups : int
+        그룹 수
+
+    반환:
+    --------
+    dict
+        열 이름 → FIRE_STAT_DTYPES 형식의 배열
+    """
+    stats = {}
+    counts = np.bincount(inverse, minlength=n_groups)
+    stats['fire_count'] = counts
+
+    if 'frp' in df.columns:
+        frp = df['frp'].to_numpy(dtype=np.float64)
+        stats['frp_sum'] = np.bincount(inverse, weights=np.nan_to_num(frp), minlength=n_groups)
+        stats['frp_max'] = group_max(frp, inverse, n_groups)
+
+    if 'brightness' in df.columns:
+        brightness = df['brightness'].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(brightness)
+        total = np.bincount(inverse[valid], weights=brightness[valid], minlength=n_groups)
+        n_valid = np.bincount(inverse[valid], minlength=n_groups)
+        stats['brightness_mean'] = np.where(n_valid > 0, total / np.maximum(n_valid, 1), np.nan)
+
+    if 'daynight' in df.columns:
+        daynight = df['daynight'].astype(str).str.upper().to_numpy()
+        stats['day_count'] = np.bincount(inverse, weights=(daynight == 'D'), minlength=n_groups)
+        stats['night_count'] = np.bincount(inverse, weights=(daynight == 'N'), minlength=n_groups)
+
+    if 'satellite' in df.columns:
+        # FIRMS 표기: 'Terra'/'Aqua' 또는 'T'/'A'
+        satellite = df['satellite'].astype(str).str.upper().str[0].to_numpy()
+        stats['terra_count'] = np.bincount(inverse, weights=(satellite == 'T'), minlength=n_groups)
+        stats['aqua_count'] = np.bincount(inverse, weights=(satellite == 'A'), minlength=n_groups)
+
+    return {name: stats[name].astype(dtype) for name, dtype in FIRE_STAT_DTYPES.items() if name in stats}
+
+def group_max(values, inverse, n_groups):
+    """
+    그룹 번호별 최대값을 정렬 후 그룹 경계에서 np.maximum.reduceat으로 계산합니다.
+
+    결측값은 건너뛰며, 값이 모두 결측인 그룹은 NaN입니다.
+    """
+    if n_groups == 0:
+        return np.zeros(0, dtype=np.float64)
+    order = np.argsort(inverse, kind='stable')
+    starts = np.concatenate(([0], np.cumsum(np.bincount(inverse, minlength=n_groups))[:-1]))
+    values = np.asarray(values, dtype=np.float64)[order]
+    result = np.maximum.reduceat(np.where(np.isnan(values), -np.inf, values), starts)
+    return np.where(np.isneginf(result), np.nan, result)
+
+def process_af_data(df, min_confidence=30, registry=None, fire_stats=False, thresholds=None):
     """
     활성 화재 데이터를 그리드 기반 형식으로 처리합니다.
     
@@ -138,36 +252,66 @@ def process_af_data(df, min_confidence=30):
         활성 화재 데이터가 포함된 데이터프레임
     min_confidence : int
         화재 감지를 위한 최소 신뢰도 수준
+    registry : GridRegistry 또는 None
+        지정 시 유효 그리드(육지)에 속한 화재만 유지
+    fire_stats : bool
+        True이면 감지 수, FRP 최대/합계, 평균 밝기, 주/야간 및 Terra/Aqua 감지 수 열 추가
+    thresholds : list of int 또는 None
+        지정 시 가장 낮은 기준 이상의 감지로 (날짜, 그리드)별 최대 신뢰도(confidence_max)를 한 번 계산하고
+        기준마다 af_flag_<기준> 열(최대 신뢰도 >= 기준)을 추가. af_flag는 min_confidence 기준 값이며,
+        fire_stats 통계는 가장 낮은 기준 이상의 감지로 계산
         
     반환:
     --------
     pandas.DataFrame
-        그리드 ID와 af_flag=1이 있는 처리된 데이터프레임
+        그리드 ID와 af_flag가 있는 처리된 데이터프레임
+        (thresholds가 없으면 화재가 있는 행만 있으므로 af_flag는 항상 1)
     """
-    logger.info(f"Processing active fire data with min_confidence={min_confidence}")
+    thresholds = sorted(set(thresholds)) if thresholds else []
+    lowest = min([min_confidence] + thresholds)
+    logger.info(f"Processing active fire data with min_confidence={min_confidence}"
+                + (f", thresholds={thresholds}" if thresholds else ""))
     
-    # 신뢰도 수준으로 필터링
-    high_conf_df = df[df['confidence'] >= min_confidence].copy()
-    logger.info(f"Filtered data with confidence >= {min_confidence}, {len(high_conf_df)} rows remaining")
+    # 신뢰도 수준으로 필터링(기준 목록이 있으면 가장 낮은 기준)
+    high_conf_df = df[df['confidence'] >= lowest].copy()
+    logger.info(f"Filtered data with confidence >= {lowest}, {len(high_conf_df)} rows remaining")
     
     # 위도/경도를 그리드 ID로 변환
     high_conf_df['grid_id'] = latlon_to_grid_id(high_conf_df['latitude'], high_conf_df['longitude'])
     
-    # 고유한 날짜-그리드 조합으로 새 데이터프레임 생성
+    # 유효 그리드 밖(바다, 범위 밖)의 감지 제외
+    if registry is not None:
+        before = len(high_conf_df)
+        high_conf_df = registry.filter_frame(high_conf_df)
+        logger.info(f"Kept {len(high_conf_df)}/{before} detections inside {len(registry)} registry grids")
+    
+    # 고유한 (날짜, 그리드) 정수 키로 그룹화, np.unique 결과는 (날짜, grid_id) 순으로 정렬됨
     # 적어도 하나의 화재가 있는 각 날짜-그리드 조합은 af_flag=1을 얻음
-    result_df = high_conf_df.groupby(['acq_date', 'grid_id']).size().reset_index()
-    result_df.rename(columns={0: 'fire_count'}, inplace=True)
+    keys = date_grid_keys(high_conf_df['acq_date'], high_conf_df['grid_id'])
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
     
-    # af_flag 열 추가(화재가 있는 그리드만 유지하므로 항상 1)
-    result_df['af_flag'] = 1
+    result_df = pd.DataFrame({
+        'acq_date': (unique_keys // GRID_KEY_SPAN).astype('datetime64[D]').astype('datetime64[ns]'),
+        'grid_id': unique_keys % GRID_KEY_SPAN,
+        # af_flag 열 추가(화재가 있는 그리드만 유지하므로 항상 1)
+        'af_flag': np.ones(len(unique_keys), dtype=np.uint8),
+    })
     
-    logger.info(f"Final processed data has {len(result_df)} rows")
+    if thresholds:
+        # 그룹별 최대 신뢰도를 한 번 계산한 뒤 기준별 플래그는 비교 연산으로만 생성
+        confidence_max = group_max(high_conf_df['confidence'], inverse, len(unique_keys))
+        result_df['af_flag'] = (confidence_max >= min_confidence).astype(np.uint8)
+        result_df['confidence_max'] = confidence_max.astype(np.uint8)
+        for threshold in thresholds:
+            result_df[f'af_flag_{threshold}'] = (confidence_max >= threshold).astype(np.uint8)
+            logger.info(f"af_flag_{threshold}: {int(result_df[f'af_flag_{threshold}'].sum())} positive rows")
     
-    # 선택 사항: 날짜 및 grid_id로 정렬
-    result_df.sort_values(['acq_date', 'grid_id'], inplace=True)
+    if fire_stats:
+        for name, values in aggregate_fire_stats(high_conf_df, inverse, len(unique_keys)).items():
+            result_df[name] = values
+        logger.info(f"Added fire statistics: {', '.join(c for c in result_df.columns if c in FIRE_STAT_DTYPES)}")
     
-    # 필요한 열만 유지
-    result_df = result_df[['acq_date', 'grid_id', 'af_flag']]
+    logger.info(f"Final processed data has {len(result_df)} rows")
     
     return result_df
 
@@ -176,24 +320,40 @@ def main():
     # 명령줄 인수 구문 분석
     parser = setup_arg_parser()
     args = parser.parse_args()
+    metrics.configure_from_args(args)
     
     # 활성 화재 데이터 로드
-    af_data = load_af_data(
-        args.input_dir,
-        date_col=args.date_col,
-        start_date=args.start_date,
-        end_date=args.end_date
-    )
+    with metrics.stage('load') as st:
+        af_data = load_af_data(
+            args.input_dir,
+            date_col=args.date_col,
+            start_date=args.start_date,
+            end_date=args.end_date,
+            prefetch_depth=args.prefetch
+        )
+        for file in glob.glob(os.path.join(args.input_dir, "*.csv")):
+            st.add_input_file(file)
+        st.rows_out = len(af_data)
     
     # 데이터 처리
-    processed_data = process_af_data(af_data, min_confidence=args.min_confidence)
+    with metrics.stage('transform', rows_in=len(af_data)) as st:
+        processed_data = process_af_data(
+            af_data,
+            min_confidence=args.min_confidence,
+            registry=registry_from_args(args),
+            fire_stats=args.fire_stats,
+            thresholds=args.confidence_thresholds
+        )
+        st.rows_out = len(processed_data)
     
     # 처리된 데이터 저장
     output_dir = os.path.dirname(args.output_file)
     if output_dir and not os.path.exists(output_dir):
         os.makedirs(output_dir)
     
-    processed_data.to_csv(args.output_file, index=False)
+    with metrics.stage('write', rows_in=len(processed_data)) as st:
+        write_frame(processed_data, args.output_file)
+        st.add_output_file(args.output_file)
     logger.info(f"Saved processed data to {args.output_file}")
 
 if __name__ == '__main__':
@@ -5,9 +5,16 @@ import pandas as pd
 import numpy as np
 import argparse
 import os
+import sys
 import logging
 from datetime import datetime
 
+# 공용 모듈(src/common) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+from common import metrics
+from common.grid import add_grid_arguments, registry_from_args
+from common.schema import read_frame
+
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
@@ -15,6 +22,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger('validate_af_flag')
 
+# (날짜, 그리드) 정수 키 = 날짜(1970-01-01 기준 일수) * GRID_KEY_SPAN + grid_id
+GRID_KEY_SPAN = 1800 * 3600
+
 def setup_arg_parser():
     """인자 파서를 설정하고 반환합니다."""
     parser = argparse.ArgumentParser(description='af_flag 데이터 처리 검증')
@@ -22,13 +32,17 @@ def setup_arg_parser():
     parser.add_argument('--original-data', type=str, required=True,
                         help='원본 MODIS 활성 화재 데이터 파일 경로 (CSV 형식)')
     parser.add_argument('--processed-data', type=str, required=True,
-                        help='처리된 af_flag 데이터 파일 경로 (CSV 형식)')
+                        help='처리된 af_flag 데이터 파일 경로 (CSV 또는 Parquet 형식)')
     parser.add_argument('--output-dir', type=str, default='outputs/validation',
                         help='검증 결과 출력 디렉토리')
     parser.add_argument('--min-confidence', type=int, default=30,
                         help='화재 감지 최소 신뢰도 수준 (기본값: 30)')
     parser.add_argument('--date-col', type=str, default='acq_date',
                         help='날짜 열 이름 (기본값: acq_date)')
+    parser.add_argument('--confidence-thresholds', type=int, nargs='+', default=None,
+                        help='신뢰도 기준 목록 (예: 30 50 80), 지정 시 처리된 데이터의 af_flag_<기준> 열을 기준별로 검증')
+    add_grid_arguments(parser)
+    metrics.add_metrics_arguments(parser)
     
     return parser
 
@@ -63,7 +77,8 @@ def latlon_to_grid_id(lat, lon):
     
     return grid_id
 
-def validate_af_flag_processing(original_file, processed_file, min_confidence=30, date_col='acq_date'):
+def validate_af_flag_processing(original_file, processed_file, min_confidence=30, date_col='acq_date',
+                                registry=None):
     """
     원본 데이터의 모든 화재 이벤트가 처리된 데이터에 af_flag=1로 
     적절하게 표현되었는지 검증합니다.
@@ -78,6 +93,8 @@ def validate_af_flag_processing(original_file, processed_file, min_confidence=30
         화재 감지 최소 신뢰도 수준
     date_col : str
         날짜 열 이름
+    registry : GridRegistry
+        유효 그리드 목록(처리 단계와 같은 목록, None이면 모든 셀 비교)
         
     반환값:
     --------
@@ -90,7 +107,7 @@ def validate_af_flag_processing(original_file, processed_file, min_confidence=30
     
     # 데이터 로드
     original_df = pd.read_csv(original_file)
-    processed_df = pd.read_csv(processed_file)
+    processed_df = read_frame(processed_file, strict=True)
     
     logger.info(f"원본 데이터 크기: {original_df.shape}")
     logger.info(f"처리된 데이터 크기: {processed_df.shape}")
@@ -102,6 +119,11 @@ def validate_af_flag_processing(original_file, processed_file, min_confidence=30
     # 원본 데이터에서 위도/경도를 그리드 ID로 변환
     high_conf_df['grid_id'] = latlon_to_grid_id(high_conf_df['latitude'], high_conf_df['longitude'])
     
+    # 처리 단계에서 제외된 그리드(바다 등)는 누락으로 세지 않도록 같은 유효 그리드 목록으로 필터링
+    if registry is not None:
+        high_conf_df = registry.filter_frame(high_conf_df)
+        logger.info(f"유효 그리드 안의 원본 데이터: {len(high_conf_df)} 행")
+    
     # 날짜 열이 datetime 형식인지 확인
     high_conf_df[date_col] = pd.to_datetime(high_conf_df[date_col])
     processed_df[date_col] = pd.to_datetime(processed_df[date_col])
@@ -185,31 +207,135 @@ def validate_af_flag_processing(original_file, processed_file, min_confidence=30
     
     return detailed_results
 
+def validate_af_flag_thresholds(original_file, processed_file, thresholds, date_col='acq_date', registry=None):
+    """
+    여러 신뢰도 기준의 af_flag_<기준> 열을 한 번의 로드로 검증합니다.
+    
+    원본의 (날짜, 그리드)별 최대 신뢰도를 한 번 계산한 뒤, 기준마다 정수 키 배열의
+    집합 연산으로 누락/추가 쌍을 셉니다.
+    
+    매개변수:
+    -----------
+    original_file : str
+        원본 MODIS 활성 화재 데이터 파일 경로
+    processed_file : str
+        af_flag_<기준> 열이 있는 처리된 데이터 파일 경로
+    thresholds : list of int
+        검증할 신뢰도 기준 목록
+    date_col : str
+        날짜 열 이름
+    registry : GridRegistry
+        유효 그리드 목록(처리 단계와 같은 목록, None이면 모든 셀 비교)
+        
+    반환값:
+    --------
+    list of dict
+        기준별 검증 결과
+    """
+    logger.info(f"신뢰도 기준 {thresholds}의 af_flag 처리 검증 중")
+    
+    original_df = pd.read_csv(original_file, usecols=['latitude', 'longitude', 'confidence', date_col])
+    processed_df = read_frame(processed_file, strict=True)
+    
+    # 원본의 (날짜, 그리드)별 최대 신뢰도를 한 번 계산
+    days = pd.to_datetime(original_df[date_col]).to_numpy().astype('datetime64[D]').astype(np.int64)
+    grid_ids = latlon_to_grid_id(original_df['latitude'].to_numpy(), original_df['longitude'].to_numpy())
+    if registry is not None:
+        inside = registry.contains(grid_ids)
+        original_df = original_df[inside]
+        days, grid_ids = days[inside], grid_ids[inside]
+        logger.info(f"유효 그리드 안의 원본 데이터: {len(original_df)} 행")
+    original_keys, inverse = np.unique(days * GRID_KEY_SPAN + grid_ids, return_inverse=True)
+    max_confidence = np.full(len(original_keys), -np.inf)
+    np.maximum.at(max_confidence, inverse, original_df['confidence'].to_numpy(dtype=np.float64))
+    
+    processed_days = pd.to_datetime(processed_df[date_col]).to_numpy().astype('datetime64[D]').astype(np.int64)
+    processed_keys = processed_days * GRID_KEY_SPAN + processed_df['grid_id'].to_numpy(dtype=np.int64)
+    
+    results = []
+    for threshold in sorted(set(thresholds)):
+        flag_col = f'af_flag_{threshold}'
+        if flag_col not in processed_df.columns:
+            logger.error(f"처리된 데이터에 {flag_col} 열이 없습니다")
+            continue
+        
+        original_pairs = original_keys[max_confidence >= threshold]
+        processed_pairs = np.unique(processed_keys[processed_df[flag_col].to_numpy() == 1])
+        
+        missing = len(np.setdiff1d(original_pairs, processed_pairs, assume_unique=True))
+        extra = len(np.setdiff1d(processed_pairs, original_pairs, assume_unique=True))
+        total_original = len(original_pairs)
+        total_processed = len(processed_pairs)
+        
+        recall = (total_original - missing) / total_original if total_original > 0 else 0
+        precision = (total_processed - extra) / total_processed if total_processed > 0 else 0
+        f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
+        
+        results.append({
+            'original_file': original_file,
+            'processed_file': processed_file,
+            'min_confidence': threshold,
+            'original_rows': len(original_df),
+            'high_conf_rows': int((original_df['confidence'] >= threshold).sum()),
+            'processed_rows': len(processed_df),
+            'original_date_grid_pairs': total_original,
+            'processed_positive_pairs': total_processed,
+            'missing_pairs': missing,
+            'extra_pairs': extra,
+            'exact_match': missing == 0 and extra == 0,
+            'recall': recall,
+            'precision': precision,
+            'f1_score': f1
+        })
+        logger.info(f"  기준 {threshold}: 원본 쌍 {total_original}, {flag_col}=1 쌍 {total_processed}, "
+                    f"누락 {missing}, 추가 {extra}, F1 {f1:.4f}")
+    
+    return results
+
 def main():
     """af_flag 처리를 검증하는 메인 함수."""
     # 명령줄 인자 파싱
     parser = setup_arg_parser()
     args = parser.parse_args()
+    metrics.configure_from_args(args)
     
     # 출력 디렉토리가 없으면 생성
     if not os.path.exists(args.output_dir):
         os.makedirs(args.output_dir)
     
+    registry = registry_from_args(args)
+    
     # af_flag 처리 검증
-    validation_results = validate_af_flag_processing(
-        args.original_data,
-        args.processed_data,
-        min_confidence=args.min_confidence,
-        date_col=args.date_col
-    )
-    
-    # 검증 결과를 CSV로 저장
+    with metrics.stage('validate') as st:
+        if args.confidence_thresholds:
+            results = validate_af_flag_thresholds(
+                args.original_data,
+                args.processed_data,
+                args.confidence_thresholds,
+                date_col=args.date_col,
+                registry=registry
+            )
+        else:
+            results = [validate_af_flag_processing(
+                args.original_data,
+                args.processed_data,
+                min_confidence=args.min_confidence,
+                date_col=args.date_col,
+                registry=registry
+            )]
+        st.add_input_file(args.original_data)
+        st.add_input_file(args.processed_data)
+        if results:
+            st.rows_in = results[0]['original_rows'] + results[0]['processed_rows']
+        st.rows_out = sum(r['missing_pairs'] + r['extra_pairs'] for r in results)
+    
+    # 검증 결과를 CSV로 저장(기준별 한 행)
     output_file = os.path.join(args.output_dir, 'af_flag_validation_results.csv')
-    pd.DataFrame([validation_results]).to_csv(output_file, index=False)
+    pd.DataFrame(results).to_csv(output_file, index=False)
     logger.info(f"검증 결과를 {output_file}에 저장했습니다")
     
     # 성공 또는 실패 코드 반환
-    if validation_results['exact_match']:
+    if results and all(r['exact_match'] for r in results):
         logger.info("검증 통과: 모든 원본 화재 이벤트가 처리된 데이터에 적절하게 표현되었습니다")
         return 0
     else:
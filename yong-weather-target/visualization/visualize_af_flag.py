@@ -10,8 +10,21 @@ import cartopy.crs as ccrs
 import cartopy.feature as cfeature
 import argparse
 import os
+import sys
+import multiprocessing as mp
+from functools import partial
 from datetime import datetime
 
+# 공용 모듈(src/common) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+from common.schema import read_frame
+
+# 한국 지역 범위 [서쪽 경도, 동쪽 경도, 남쪽 위도, 북쪽 위도]
+KOREA_EXTENT = [124, 132, 33, 39]
+
+# 배치 모드에서 재사용하는 배경 지도 캐시 파일명(범위, 크기, 해상도가 다르면 다른 파일)
+BASEMAP_CACHE_FILE = 'basemap_{west:g}_{east:g}_{south:g}_{north:g}_{width:g}in_{dpi}dpi.png'
+
 def grid_id_to_latlon(grid_id):
     """
     그리드 ID를 위도와 경도로 변환합니다.
@@ -36,31 +49,26 @@ def grid_id_to_latlon(grid_id):
     
     return lat, lon
 
-def visualize_af_flag_by_year(af_flag_file, output_dir, start_year=None, end_year=None):
+def load_af_flag_positive(af_flag_file, start_year=None, end_year=None):
     """
-    연도별로 한국 지도에 af_flag=1인 그리드를 시각화합니다.
+    af_flag 데이터를 로드하고 af_flag=1인 레코드만 위도/경도와 함께 반환합니다.
     
     매개변수:
     -----------
     af_flag_file : str
         전처리된 af_flag 데이터 파일 경로
-    output_dir : str
-        출력 디렉토리 경로
     start_year : int, 선택사항
         시작 연도(기본값: 데이터의 최소 연도)
     end_year : int, 선택사항
         종료 연도(기본값: 데이터의 최대 연도)
-    """
-    print(f"\n=== af_flag Data Visualization ===")
-    print(f"af_flag data: {af_flag_file}")
-    print(f"Output directory: {output_dir}")
-    
-    # 출력 디렉토리 생성
-    os.makedirs(output_dir, exist_ok=True)
     
-    # 데이터 로드
+    반환:
+    --------
+    tuple : (af_flag=1 데이터프레임, 처리할 연도 목록) 튜플
+        af_flag=1 레코드가 없으면 (None, [])
+    """
     print("\n[1/4] Loading data...")
-    df = pd.read_csv(af_flag_file)
+    df = read_frame(af_flag_file, strict=True)
     print(f"Data size: {df.shape}")
     
     # af_flag 값 개수
@@ -71,7 +79,7 @@ def visualize_af_flag_by_year(af_flag_file, output_dir, start_year=None, end_yea
     if 1 not in af_flag_counts:
         print("\nERROR: No af_flag=1 records found in the data!")
         print("Please check if the data file contains fire events.")
-        return
+        return None, []
     
     # 날짜 변환
     df['acq_date'] = pd.to_datetime(df['acq_date'])
@@ -95,7 +103,7 @@ def visualize_af_flag_by_year(af_flag_file, output_dir, start_year=None, end_yea
     
     if len(positive_df) == 0:
         print("ERROR: No af_flag=1 records in the specified year range!")
-        return
+        return None, []
     
     # 그리드 ID를 위도/경도로 변환
     print("\n[2/4] Converting grid IDs to lat/lon...")
@@ -103,6 +111,35 @@ def visualize_af_flag_by_year(af_flag_file, output_dir, start_year=None, end_yea
     positive_df['latitude'] = lats
     positive_df['longitude'] = lons
     
+    return positive_df, years_to_process
+
+def visualize_af_flag_by_year(af_flag_file, output_dir, start_year=None, end_year=None):
+    """
+    연도별로 한국 지도에 af_flag=1인 그리드를 시각화합니다.
+    
+    매개변수:
+    -----------
+    af_flag_file : str
+        전처리된 af_flag 데이터 파일 경로
+    output_dir : str
+        출력 디렉토리 경로
+    start_year : int, 선택사항
+        시작 연도(기본값: 데이터의 최소 연도)
+    end_year : int, 선택사항
+        종료 연도(기본값: 데이터의 최대 연도)
+    """
+    print(f"\n=== af_flag Data Visualization ===")
+    print(f"af_flag data: {af_flag_file}")
+    print(f"Output directory: {output_dir}")
+    
+    # 출력 디렉토리 생성
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # 데이터 로드
+    positive_df, years_to_process = load_af_flag_positive(af_flag_file, start_year, end_year)
+    if positive_df is None:
+        return
+    
     # 연도별 시각화
     print("\n[3/4] Visualizing by year...")
     for year in years_to_process:
@@ -232,25 +269,526 @@ def visualize_af_flag_by_year(af_flag_file, output_dir, start_year=None, end_yea
     
     print("\n=== af_flag data visualization complete ===")
 
+def basemap_cache_file(output_dir, extent=KOREA_EXTENT, width_inches=12, dpi=200):
+    """배경 지도의 범위, 가로 크기, 해상도를 이름에 담은 캐시 파일 경로를 반환합니다."""
+    west, east, south, north = extent
+    return os.path.join(output_dir, BASEMAP_CACHE_FILE.format(west=west, east=east, south=south, north=north,
+                                                              width=width_inches, dpi=dpi))
+
+def build_basemap_image(cache_file, extent=KOREA_EXTENT, width_inches=12, dpi=200):
+    """
+    한국 지역 배경 지도(LAND/OCEAN/COASTLINE/BORDERS)를 한 번만 렌더링하여 
+    PNG 이미지로 캐시합니다. 캐시 파일이 이미 있고 이미지 크기가 지금 설정과 같으면
+    다시 그리지 않고 읽어옵니다(파일 이름은 basemap_cache_file 참고).
+    
+    매개변수:
+    -----------
+    cache_file : str
+        배경 지도 이미지 캐시 파일 경로
+    extent : list
+        [서쪽 경도, 동쪽 경도, 남쪽 위도, 북쪽 위도]
+    width_inches : float
+        배경 지도 이미지의 가로 크기(인치)
+    dpi : int
+        배경 지도 이미지 해상도
+    
+    반환:
+    --------
+    numpy.ndarray : RGBA 배경 이미지 배열
+    """
+    # PlateCarree는 등장방형이므로 경위도 비율로 그림 크기를 맞추면 축이 그림 전체를 채움
+    height_inches = width_inches * (extent[3] - extent[2]) / (extent[1] - extent[0])
+    
+    if os.path.exists(cache_file):
+        image = plt.imread(cache_file)
+        if image.shape[:2] == (int(height_inches * dpi), int(width_inches * dpi)):
+            print(f"Using cached base map: {cache_file}")
+            return image
+        print(f"Cached base map {cache_file} has size {image.shape[1]}x{image.shape[0]}, rendering again")
+    
+    print(f"Rendering base map once: {cache_file}")
+    
+    fig = plt.figure(figsize=(width_inches, height_inches), dpi=dpi)
+    ax = fig.add_axes([0, 0, 1, 1], projection=ccrs.PlateCarree())
+    ax.set_extent(extent, crs=ccrs.PlateCarree())
+    
+    # 지도 레이어 추가
+    ax.add_feature(cfeature.LAND)
+    ax.add_feature(cfeature.OCEAN)
+    ax.add_feature(cfeature.COASTLINE)
+    ax.add_feature(cfeature.BORDERS, linestyle=':')
+    ax.spines['geo'].set_visible(False)
+    
+    fig.canvas.draw()
+    image = np.asarray(fig.canvas.buffer_rgba()).copy()
+    plt.close(fig)
+    
+    cache_dir = os.path.dirname(cache_file)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    plt.imsave(cache_file, image)
+    
+    return image
+
+def draw_basemap(ax, basemap, extent=KOREA_EXTENT):
+    """캐시된 배경 지도 이미지를 일반 matplotlib 축에 경위도 좌표로 배치합니다."""
+    ax.imshow(basemap, extent=extent, origin='upper', interpolation='bilinear', zorder=0)
+    ax.set_xlim(extent[0], extent[1])
+    ax.set_ylim(extent[2], extent[3])
+    ax.set_aspect('equal')
+    ax.set_xticks([])
+    ax.set_yticks([])
+
+def render_year_frame(task, basemap_file, output_dir, dpi=300):
+    """
+    캐시된 배경 지도 위에 한 해의 화재 산점도 레이어만 그려 저장합니다.
+    프로세스 풀에서 호출되므로 모듈 최상위 함수로 정의합니다.
+    
+    매개변수:
+    -----------
+    task : tuple
+        (연도, 경도 배열, 위도 배열, 12개월 빈도 목록)
+    basemap_file : str
+        캐시된 배경 지도 이미지 경로
+    output_dir : str
+        출력 디렉토리 경로
+    dpi : int
+        저장 해상도
+    
+    반환:
+    --------
+    str : 저장된 이미지 경로
+    """
+    year, lons, lats, monthly_data = task
+    basemap = plt.imread(basemap_file)
+    
+    fig = plt.figure(figsize=(15, 10))
+    ax = plt.axes()
+    draw_basemap(ax, basemap)
+    
+    # 그리드 포인트 표시(단순 산점도)
+    ax.scatter(
+        lons,
+        lats,
+        c='red',
+        s=10,
+        alpha=0.7,
+        label=f'Fire events ({len(lons)} points)'
+    )
+    
+    # 정보 추가
+    plt.title(f"Fire Locations in {year}")
+    plt.legend(loc='upper right')
+    
+    # 월별 빈도 차트 추가
+    ax_inset = fig.add_axes([0.15, 0.15, 0.2, 0.2])
+    months = range(1, 13)
+    ax_inset.bar(months, monthly_data, color='darkred')
+    ax_inset.set_title('Monthly Fire Occurrences')
+    ax_inset.set_xlabel('Month')
+    ax_inset.set_ylabel('Count')
+    ax_inset.set_xticks(months)
+    
+    # 파일 저장
+    output_file = os.path.join(output_dir, f"af_flag_map_{year}.png")
+    plt.savefig(output_file, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    
+    return output_file
+
+def render_panel_figure(tasks, basemap, output_file, dpi=300, ncols=6):
+    """
+    모든 연도를 하나의 다중 패널 그림으로 렌더링합니다. 배경 지도는 캐시된 이미지를 재사용합니다.
+    
+    매개변수:
+    -----------
+    tasks : list
+        render_year_frame과 동일한 (연도, 경도, 위도, 월별 빈도) 튜플 목록
+    basemap : numpy.ndarray
+        캐시된 배경 지도 이미지
+    output_file : str
+        출력 이미지 경로
+    dpi : int
+        저장 해상도
+    ncols : int
+        패널 열 개수
+    """
+    ncols = min(ncols, len(tasks))
+    nrows = int(np.ceil(len(tasks) / ncols))
+    fig, axes = plt.subplots(nrows, ncols, figsize=(3 * ncols, 2.4 * nrows), squeeze=False)
+    
+    for ax, (year, lons, lats, _) in zip(axes.flat, tasks):
+        draw_basemap(ax, basemap)
+        ax.scatter(lons, lats, c='red', s=2, alpha=0.7, linewidths=0)
+        ax.set_title(f"{year} ({len(lons)})", fontsize='small')
+    
+    # 남는 패널 숨기기
+    for ax in axes.flat[len(tasks):]:
+        ax.set_visible(False)
+    
+    fig.suptitle(f"Fire Locations {tasks[0][0]}-{tasks[-1][0]}")
+    fig.tight_layout()
+    fig.savefig(output_file, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    print(f"Multi-panel map saved: {output_file}")
+
+def save_animated_gif(frame_files, output_file, duration=800):
+    """
+    연도별 이미지들을 하나의 애니메이션 GIF로 결합합니다.
+    
+    매개변수:
+    -----------
+    frame_files : list
+        연도 순서대로 정렬된 이미지 경로 목록
+    output_file : str
+        출력 GIF 경로
+    duration : int
+        프레임당 표시 시간(밀리초)
+    """
+    from PIL import Image
+    
+    frames = [Image.open(f).convert('RGB') for f in frame_files]
+    # bbox_inches='tight' 때문에 프레임 크기가 조금씩 다를 수 있으므로 첫 프레임에 맞춤
+    size = frames[0].size
+    frames = [frame if frame.size == size else frame.resize(size) for frame in frames]
+    frames[0].save(output_file, save_all=True, append_images=frames[1:], duration=duration, loop=0)
+    print(f"Animated GIF saved: {output_file}")
+
+def visualize_af_flag_batch(af_flag_file, output_dir, start_year=None, end_year=None,
+                            n_processes=1, dpi=300, panel=False, gif=False, gif_duration=800):
+    """
+    배경 지도를 한 번만 렌더링해 캐시하고, 연도별 산점도 레이어만 교체하여 
+    여러 프로세스에서 병렬로 지도를 생성합니다.
+    
+    매개변수:
+    -----------
+    af_flag_file : str
+        전처리된 af_flag 데이터 파일 경로
+    output_dir : str
+        출력 디렉토리 경로
+    start_year : int, 선택사항
+        시작 연도(기본값: 데이터의 최소 연도)
+    end_year : int, 선택사항
+        종료 연도(기본값: 데이터의 최대 연도)
+    n_processes : int
+        연도별 렌더링에 사용할 프로세스 수
+    dpi : int
+        저장 해상도
+    panel : bool
+        모든 연도를 하나의 다중 패널 그림으로 추가 저장할지 여부
+    gif : bool
+        연도별 지도를 애니메이션 GIF로 추가 저장할지 여부
+    gif_duration : int
+        GIF 프레임당 표시 시간(밀리초)
+    """
+    print(f"\n=== af_flag Data Visualization (batch mode) ===")
+    print(f"af_flag data: {af_flag_file}")
+    print(f"Output directory: {output_dir}")
+    
+    # 출력 디렉토리 생성
+    os.makedirs(output_dir, exist_ok=True)
+    
+    positive_df, years_to_process = load_af_flag_positive(af_flag_file, start_year, end_year)
+    if positive_df is None:
+        return
+    
+    # 연도별 작업 목록 생성(한 번의 groupby로 분할)
+    positive_df = positive_df[positive_df['year'].isin(years_to_process)]
+    positive_df['month'] = positive_df['acq_date'].dt.month
+    tasks = []
+    for year, year_df in positive_df.groupby('year', sort=True):
+        monthly_counts = np.bincount(year_df['month'].values, minlength=13)[1:]
+        tasks.append((
+            int(year),
+            year_df['longitude'].values,
+            year_df['latitude'].values,
+            monthly_counts.tolist()
+        ))
+    
+    skipped_years = sorted(set(years_to_process) - {task[0] for task in tasks})
+    for year in skipped_years:
+        print(f"  No af_flag=1 data for year {year}.")
+    
+    if not tasks:
+        print("\nERROR: No af_flag=1 data in the specified year range!")
+        return
+    
+    # 배경 지도는 한 번만 렌더링
+    basemap_file = basemap_cache_file(output_dir)
+    basemap = build_basemap_image(basemap_file)
+    
+    # 연도별 렌더링(잠재적으로 병렬)
+    print(f"\n[3/4] Rendering {len(tasks)} years with {n_processes} process(es)...")
+    render_func = partial(render_year_frame, basemap_file=basemap_file, output_dir=output_dir, dpi=dpi)
+    if n_processes > 1:
+        with mp.Pool(processes=n_processes) as pool:
+            frame_files = pool.map(render_func, tasks)
+    else:
+        frame_files = [render_func(task) for task in tasks]
+    
+    for frame_file in frame_files:
+        print(f"  Map saved: {frame_file}")
+    
+    # 통합 연도 지도 생성
+    print("\n[4/4] Creating combined outputs...")
+    fig = plt.figure(figsize=(15, 10))
+    ax = plt.axes()
+    draw_basemap(ax, basemap)
+    
+    num_years = len(tasks)
+    if num_years <= 10:
+        cmap = plt.cm.tab10
+    elif num_years <= 20:
+        cmap = plt.cm.tab20
+    else:
+        cmap = plt.cm.hsv
+    year_colors = cmap(np.linspace(0, 1, num_years))
+    
+    for i, (year, lons, lats, _) in enumerate(tasks):
+        ax.scatter(lons, lats, c=[year_colors[i]], s=15, alpha=0.7, label=f'{year} ({len(lons)} points)')
+    
+    plt.title(f"Fire Locations {tasks[0][0]}-{tasks[-1][0]}")
+    if num_years > 15:
+        ncol = 3 if num_years > 25 else 2
+        plt.legend(loc='upper right', fontsize='small', ncol=ncol)
+    else:
+        plt.legend(loc='upper right')
+    
+    output_file = os.path.join(output_dir, "af_flag_map_combined_all_years.png")
+    plt.savefig(output_file, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    print(f"Combined map with all years saved: {output_file}")
+    
+    if panel:
+        render_panel_figure(tasks, basemap, os.path.join(output_dir, "af_flag_map_panels.png"), dpi=dpi)
+    
+    if gif:
+        save_animated_gif(frame_files, os.path.join(output_dir, "af_flag_map_animation.gif"), duration=gif_duration)
+    
+    # 연도별 통계 출력
+    print("\nYearly af_flag=1 counts:")
+    for year, lons, _, _ in tasks:
+        print(f"{year}: {len(lons)} points")
+    
+    print("\n=== af_flag data visualization complete ===")
+
+def grid_id_to_raster_index(grid_id, extent=KOREA_EXTENT):
+    """
+    그리드 ID를 한국 범위 밀집 래스터의 (행, 열) 인덱스로 벡터화 변환합니다.
+    행 0은 가장 남쪽, 열 0은 가장 서쪽 셀입니다.
+    
+    매개변수:
+    -----------
+    grid_id : array-like
+        변환할 그리드 ID
+    extent : list
+        [서쪽 경도, 동쪽 경도, 남쪽 위도, 북쪽 위도]
+    
+    반환:
+    --------
+    tuple : (행 인덱스, 열 인덱스, 범위 내 여부 마스크, 래스터 모양) 튜플
+    """
+    grid_id = np.asarray(grid_id, dtype=np.int64)
+    lat_idx = np.floor_divide(grid_id, 3600) - 900
+    lon_idx = np.remainder(grid_id, 3600) - 1800
+    
+    # 0.1도 셀 단위의 래스터 원점과 크기
+    lat0, lat1 = int(round(extent[2] * 10)), int(round(extent[3] * 10))
+    lon0, lon1 = int(round(extent[0] * 10)), int(round(extent[1] * 10))
+    shape = (lat1 - lat0, lon1 - lon0)
+    
+    rows = lat_idx - lat0
+    cols = lon_idx - lon0
+    valid = (rows >= 0) & (rows < shape[0]) & (cols >= 0) & (cols < shape[1])
+    
+    return rows, cols, valid, shape
+
+def bin_af_flag_counts(grid_id, group_idx, n_groups, extent=KOREA_EXTENT):
+    """
+    그룹(연도, 월 등)별 화재 건수를 (그룹, 위도, 경도) 밀집 배열로 한 번에 집계합니다.
+    
+    매개변수:
+    -----------
+    grid_id : array-like
+        af_flag=1 레코드의 그리드 ID
+    group_idx : array-like
+        각 레코드의 그룹 인덱스(0 ~ n_groups-1)
+    n_groups : int
+        그룹 개수
+    extent : list
+        [서쪽 경도, 동쪽 경도, 남쪽 위도, 북쪽 위도]
+    
+    반환:
+    --------
+    numpy.ndarray : (n_groups, 위도 셀 수, 경도 셀 수) 모양의 건수 배열
+    """
+    rows, cols, valid, shape = grid_id_to_raster_index(grid_id, extent)
+    n_cells = shape[0] * shape[1]
+    
+    # (그룹, 행, 열)을 하나의 평탄화 인덱스로 결합하여 단일 bincount로 집계
+    flat_idx = np.asarray(group_idx, dtype=np.int64)[valid] * n_cells + rows[valid] * shape[1] + cols[valid]
+    counts = np.bincount(flat_idx, minlength=n_groups * n_cells)
+    
+    return counts.reshape(n_groups, shape[0], shape[1])
+
+def visualize_af_flag_heatmap(af_flag_file, output_dir, start_year=None, end_year=None,
+                              aggregate='year', dpi=300):
+    """
+    af_flag=1 레코드를 0.1도 격자 건수 히트맵으로 시각화합니다.
+    산점도 대신 밀집 배열 하나를 imshow로 그리므로 렌더링 비용이 화재 건수와 무관합니다.
+    
+    매개변수:
+    -----------
+    af_flag_file : str
+        전처리된 af_flag 데이터 파일 경로
+    output_dir : str
+        출력 디렉토리 경로
+    start_year : int, 선택사항
+        시작 연도(기본값: 데이터의 최소 연도)
+    end_year : int, 선택사항
+        종료 연도(기본값: 데이터의 최대 연도)
+    aggregate : str
+        'year'(연도별 지도), 'month'(1~12월별 다중 패널), 'cumulative'(전체 누적 지도)
+    dpi : int
+        저장 해상도
+    """
+    print(f"\n=== af_flag Heatmap Visualization ({aggregate}) ===")
+    print(f"af_flag data: {af_flag_file}")
+    print(f"Output directory: {output_dir}")
+    
+    # 출력 디렉토리 생성
+    os.makedirs(output_dir, exist_ok=True)
+    
+    positive_df, years_to_process = load_af_flag_positive(af_flag_file, start_year, end_year)
+    if positive_df is None:
+        return
+    if not years_to_process:
+        print("\nERROR: No data in the specified year range!")
+        return
+    
+    positive_df = positive_df[positive_df['year'].isin(years_to_process)]
+    grid_ids = positive_df['grid_id'].values
+    
+    # 집계 단위별 그룹 인덱스와 라벨
+    if aggregate == 'year':
+        labels = [str(y) for y in years_to_process]
+        group_idx = positive_df['year'].values - years_to_process[0]
+        n_groups = years_to_process[-1] - years_to_process[0] + 1
+        year_offsets = [y - years_to_process[0] for y in years_to_process]
+    elif aggregate == 'month':
+        labels = [f"Month {m:02d}" for m in range(1, 13)]
+        group_idx = positive_df['acq_date'].dt.month.values - 1
+        n_groups = 12
+    else:
+        labels = [f"{years_to_process[0]}-{years_to_process[-1]}"]
+        group_idx = np.zeros(len(positive_df), dtype=np.int64)
+        n_groups = 1
+    
+    print("\n[3/4] Binning fire counts into grid raster...")
+    counts = bin_af_flag_counts(grid_ids, group_idx, n_groups)
+    if aggregate == 'year':
+        counts = counts[year_offsets]
+    print(f"Raster shape: {counts.shape}, max count per cell: {counts.max()}")
+    
+    basemap = build_basemap_image(basemap_cache_file(output_dir))
+    
+    # 0인 셀은 투명하게 표시하고, 모든 지도에서 같은 색상 척도를 사용
+    norm = colors.LogNorm(vmin=1, vmax=max(int(counts.max()), 2))
+    cmap = plt.cm.YlOrRd.copy()
+    cmap.set_bad(alpha=0)
+    
+    print("\n[4/4] Rendering heatmaps...")
+    if aggregate == 'month':
+        fig, axes = plt.subplots(3, 4, figsize=(16, 10))
+        for ax, label, grid in zip(axes.flat, labels, counts):
+            draw_basemap(ax, basemap)
+            im = ax.imshow(np.ma.masked_equal(grid, 0), extent=KOREA_EXTENT, origin='lower',
+                           cmap=cmap, norm=norm, interpolation='nearest')
+            ax.set_title(f"{label} ({int(grid.sum())})", fontsize='small')
+        fig.colorbar(im, ax=axes, shrink=0.6, label='Fire count per grid')
+        fig.suptitle(f"Monthly Fire Heatmap {years_to_process[0]}-{years_to_process[-1]}")
+        output_file = os.path.join(output_dir, "af_flag_heatmap_monthly.png")
+        fig.savefig(output_file, dpi=dpi, bbox_inches='tight')
+        plt.close(fig)
+        print(f"Heatmap saved: {output_file}")
+    else:
+        # 그림과 이미지 아티스트를 한 번만 만들고 그룹마다 데이터만 교체
+        fig = plt.figure(figsize=(15, 10))
+        ax = plt.axes()
+        draw_basemap(ax, basemap)
+        im = ax.imshow(np.ma.masked_equal(counts[0], 0), extent=KOREA_EXTENT, origin='lower',
+                       cmap=cmap, norm=norm, interpolation='nearest')
+        fig.colorbar(im, ax=ax, shrink=0.7, label='Fire count per grid')
+        title = ax.set_title('')
+        
+        for label, grid in zip(labels, counts):
+            im.set_data(np.ma.masked_equal(grid, 0))
+            title.set_text(f"Fire Heatmap {label} ({int(grid.sum())} fire grid-days)")
+            suffix = label if aggregate == 'year' else 'cumulative'
+            output_file = os.path.join(output_dir, f"af_flag_heatmap_{suffix}.png")
+            fig.savefig(output_file, dpi=dpi, bbox_inches='tight')
+            print(f"  Heatmap saved: {output_file}")
+        plt.close(fig)
+    
+    print("\n=== af_flag heatmap visualization complete ===")
+
 def main():
     parser = argparse.ArgumentParser(description='af_flag data visualization')
     parser.add_argument('--input', type=str, required=True,
-                        help='Path to preprocessed af_flag data file')
+                        help='Path to preprocessed af_flag data file (CSV or Parquet)')
     parser.add_argument('--output-dir', type=str, default='outputs/visualizations',
                         help='Output directory path (default: outputs/visualizations)')
     parser.add_argument('--start-year', type=int,
                         help='Start year')
     parser.add_argument('--end-year', type=int,
                         help='End year')
+    parser.add_argument('--render-mode', type=str, default='scatter', choices=['scatter', 'batch', 'heatmap'],
+                        help='scatter: draw a full cartopy map per year, '
+                             'batch: cache the base map once and render years in parallel, '
+                             'heatmap: render gridded fire counts as a raster (default: scatter)')
+    parser.add_argument('--aggregate', type=str, default='year', choices=['year', 'month', 'cumulative'],
+                        help='Heatmap mode: aggregate counts per year, per month of year, or cumulatively (default: year)')
+    parser.add_argument('--n-processes', type=int, default=1,
+                        help='Number of processes for batch rendering (default: 1)')
+    parser.add_argument('--dpi', type=int, default=300,
+                        help='Output image resolution for batch/heatmap rendering (default: 300)')
+    parser.add_argument('--panel', action='store_true',
+                        help='Batch mode: also save all years as a single multi-panel figure')
+    parser.add_argument('--gif', action='store_true',
+                        help='Batch mode: also save the yearly maps as an animated GIF')
+    parser.add_argument('--gif-duration', type=int, default=800,
+                        help='GIF frame duration in milliseconds (default: 800)')
     
     args = parser.parse_args()
     
-    visualize_af_flag_by_year(
-        args.input,
-        args.output_dir,
-        start_year=args.start_year,
-        end_year=args.end_year
-    )
+    if args.render_mode == 'heatmap':
+        visualize_af_flag_heatmap(
+            args.input,
+            args.output_dir,
+            start_year=args.start_year,
+            end_year=args.end_year,
+            aggregate=args.aggregate,
+            dpi=args.dpi
+        )
+    elif args.render_mode == 'batch':
+        visualize_af_flag_batch(
+            args.input,
+            args.output_dir,
+            start_year=args.start_year,
+            end_year=args.end_year,
+            n_processes=args.n_processes,
+            dpi=args.dpi,
+            panel=args.panel,
+            gif=args.gif,
+            gif_duration=args.gif_duration
+        )
+    else:
+        visualize_af_flag_by_year(
+            args.input,
+            args.output_dir,
+            start_year=args.start_year,
+            end_year=args.end_year
+        )
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+처리된 날씨 데이터(날짜, grid_id, 변수 형식의 긴 테이블)를
+(변수 × 날짜 × 그리드) float32 메모리 맵 큐브(src/common/cube.py)로 변환합니다.
+
+큐브가 이미 있으면 새 날짜만큼 확장한 뒤 값을 기록합니다.
+"""
+
+import os
+import sys
+import argparse
+import logging
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+# 공용 모듈(src/common) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+from common import metrics
+from common.grid import add_grid_arguments, registry_from_args
+from common.cube import GridCube, INDEX_FILE
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('build_weather_cube')
+
+DEFAULT_VARIABLES = ['temperature', 'relative_humidity', 'precipitation', 'wind_speed']
+
+def setup_arg_parser():
+    """인자 파서를 설정하고 반환합니다."""
+    parser = argparse.ArgumentParser(description='날씨 데이터를 메모리 맵 그리드 큐브로 변환')
+
+    parser.add_argument('--input-file', type=str, required=True,
+                        help='결합된 날씨 데이터 파일 경로(CSV 또는 Parquet)')
+    parser.add_argument('--cube-dir', type=str, required=True,
+                        help='큐브 디렉토리(없으면 생성, 있으면 새 날짜 추가)')
+    parser.add_argument('--date-col', type=str, default='acq_date',
+                        help='날짜 열 이름(기본값: acq_date)')
+    parser.add_argument('--variables', type=str, nargs='+', default=DEFAULT_VARIABLES,
+                        help=f'큐브에 저장할 변수(기본값: {" ".join(DEFAULT_VARIABLES)})')
+    add_grid_arguments(parser)
+    parser.add_argument('--start-date', type=str,
+                        help='큐브 시작 날짜(새 큐브 생성 시, 기본값: 입력 데이터의 최소 날짜)')
+    parser.add_argument('--chunk-size', type=int, default=1_000_000,
+                        help='한 번에 읽어 기록할 행 수(기본값: 1000000)')
+    metrics.add_metrics_arguments(parser)
+
+    return parser
+
+def iter_table_chunks(file_path, columns, chunk_size):
+    """
+    CSV 또는 Parquet 파일을 지정한 열만 청크 단위로 읽습니다.
+
+    반환:
+    --------
+    iterator : pandas.DataFrame 청크
+    """
+    if file_path.lower().endswith('.parquet'):
+        parquet_file = pq.ParquetFile(file_path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        for chunk in pd.read_csv(file_path, usecols=columns, chunksize=chunk_size):
+            yield chunk
+
+def scan_keys(file_path, date_col, chunk_size):
+    """
+    날짜와 grid_id 열만 읽어 날짜 범위와 grid_id 집합을 구합니다.
+
+    반환:
+    --------
+    tuple : (최소 날짜, 최대 날짜, 정렬된 grid_id 배열)
+    """
+    min_date, max_date = None, None
+    grid_ids = []
+    for chunk in iter_table_chunks(file_path, [date_col, 'grid_id'], chunk_size):
+        dates = pd.to_datetime(chunk[date_col])
+        min_date = dates.min() if min_date is None else min(min_date, dates.min())
+        max_date = dates.max() if max_date is None else max(max_date, dates.max())
+        grid_ids.append(np.unique(chunk['grid_id'].values))
+    return min_date, max_date, np.unique(np.concatenate(grid_ids)) if grid_ids else np.array([], dtype=np.int64)
+
+def build_weather_cube(input_file, cube_dir, variables, date_col='acq_date', grid_ids=None,
+                       start_date=None, chunk_size=1_000_000):
+    """
+    날씨 데이터를 큐브에 기록합니다. 큐브가 없으면 생성하고, 있으면 날짜 축을 확장합니다.
+
+    매개변수:
+    -----------
+    input_file : str
+        날씨 데이터 파일 경로(CSV 또는 Parquet)
+    cube_dir : str
+        큐브 디렉토리
+    variables : list
+        저장할 변수 목록
+    date_col : str
+        날짜 열 이름
+    grid_ids : array-like 또는 None
+        새 큐브의 그리드 인덱스(기본값: 입력 데이터의 grid_id)
+    start_date : str 또는 None
+        새 큐브의 시작 날짜(기본값: 입력 데이터의 최소 날짜)
+    chunk_size : int
+        한 번에 읽어 기록할 행 수
+
+    반환:
+    --------
+    GridCube : 기록이 끝난 큐브
+    """
+    with metrics.stage('scan') as st:
+        min_date, max_date, data_grid_ids = scan_keys(input_file, date_col, chunk_size)
+        st.add_input_file(input_file)
+    if min_date is None:
+        raise ValueError(f"No rows in {input_file}")
+    logger.info(f"Input covers {min_date.date()} ~ {max_date.date()} with {len(data_grid_ids)} grids")
+
+    if os.path.exists(os.path.join(cube_dir, INDEX_FILE)):
+        cube = GridCube(cube_dir, mode='r+')
+        missing_vars = set(variables) - set(cube.variables)
+        if missing_vars:
+            raise ValueError(f"Cube {cube_dir} has no variables {sorted(missing_vars)}")
+        unknown = np.setdiff1d(data_grid_ids, cube.grid_ids)
+        if len(unknown):
+            logger.warning(f"{len(unknown)} grid_ids are not in the cube index and will be skipped")
+        old_days = cube.n_days
+        cube.extend_to(max_date)
+        logger.info(f"Opened cube {cube_dir}: extended from {old_days} to {cube.n_days} days")
+    else:
+        cube_grid_ids = data_grid_ids if grid_ids is None else np.asarray(grid_ids)
+        cube_start = pd.to_datetime(start_date) if start_date else min_date
+        n_days = (max_date.normalize() - cube_start.normalize()).days + 1
+        cube = GridCube.create(cube_dir, variables, cube_grid_ids, cube_start, n_days)
+        logger.info(f"Created cube {cube_dir}: {len(variables)} variables x {n_days} days x {len(cube_grid_ids)} grids")
+
+    total = 0
+    with metrics.stage('write') as st:
+        for chunk in iter_table_chunks(input_file, [date_col, 'grid_id'] + list(variables), chunk_size):
+            total += cube.write_frame(chunk, date_col, variables)
+        cube.flush()
+        st.rows_out = total
+        for var in variables:
+            st.add_output_file(cube.variable_path(var))
+
+    logger.info(f"Wrote {total} rows into cube {cube_dir}")
+    return cube
+
+def main():
+    """날씨 큐브를 생성하는 메인 함수."""
+    parser = setup_arg_parser()
+    args = parser.parse_args()
+    metrics.configure_from_args(args)
+
+    registry = registry_from_args(args)
+    grid_ids = registry.grid_ids if registry is not None else None
+
+    build_weather_cube(
+        args.input_file,
+        args.cube_dir,
+        args.variables,
+        date_col=args.date_col,
+        grid_ids=grid_ids,
+        start_date=args.start_date,
+        chunk_size=args.chunk_size
+    )
+
+if __name__ == '__main__':
+    main()
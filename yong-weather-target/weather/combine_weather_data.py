@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 
 import os
+import sys
 import pandas as pd
 import numpy as np
 import argparse
@@ -9,6 +10,12 @@ import glob
 import logging
 from datetime import datetime
 
+# 공용 모듈(src/common) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+from common import metrics
+from common.prefetch import prefetch, add_prefetch_arguments
+from common.schema import write_frame
+
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
@@ -28,10 +35,20 @@ def setup_arg_parser():
                         help='필터링 시작 날짜 (YYYY-MM-DD 형식)')
     parser.add_argument('--end-date', type=str, 
                         help='필터링 종료 날짜 (YYYY-MM-DD 형식)')
+    add_prefetch_arguments(parser)
+    metrics.add_metrics_arguments(parser)
     
     return parser
 
-def combine_weather_files(input_dir, start_date=None, end_date=None):
+def read_weather_file(file):
+    """확장자에 따라 CSV 또는 Parquet 날씨 파일을 읽습니다. 지원하지 않는 형식이면 None."""
+    if file.endswith('.csv'):
+        return pd.read_csv(file)
+    if file.endswith('.parquet'):
+        return pd.read_parquet(file)
+    return None
+
+def combine_weather_files(input_dir, start_date=None, end_date=None, prefetch_depth=None):
     """
     입력 디렉토리의 모든 처리된 날씨 데이터 파일을 결합합니다.
     
@@ -43,6 +60,8 @@ def combine_weather_files(input_dir, start_date=None, end_date=None):
         필터링 시작 날짜 (YYYY-MM-DD 형식, 선택적)
     end_date : str 또는 None
         필터링 종료 날짜 (YYYY-MM-DD 형식, 선택적)
+    prefetch_depth : int 또는 None
+        현재 파일을 처리하는 동안 미리 읽을 파일 수 (None이면 common.prefetch 기본값, 0이면 순차)
         
     반환값:
     --------
@@ -66,17 +85,13 @@ def combine_weather_files(input_dir, start_date=None, end_date=None):
     
     logger.info(f"{len(all_files)}개의 날씨 데이터 파일을 찾았습니다")
     
-    # 모든 파일 로드 및 결합
+    # 모든 파일 로드 및 결합(다음 파일은 백그라운드 스레드에서 미리 읽음)
     dfs = []
-    for file in all_files:
+    for file, fetch in prefetch(all_files, read_weather_file, depth=prefetch_depth):
         logger.info(f"{file} 처리 중")
         try:
-            # 확장자에 따라 파일 로드
-            if file.endswith('.csv'):
-                df = pd.read_csv(file)
-            elif file.endswith('.parquet'):
-                df = pd.read_parquet(file)
-            else:
+            df = fetch()
+            if df is None:
                 logger.warning(f"지원되지 않는 파일 형식: {file}")
                 continue
                 
@@ -129,13 +144,20 @@ def main():
     # 명령줄 인자 파싱
     parser = setup_arg_parser()
     args = parser.parse_args()
+    metrics.configure_from_args(args)
     
     # 날씨 파일 결합
-    combined_data = combine_weather_files(
-        args.input_dir,
-        start_date=args.start_date,
-        end_date=args.end_date
-    )
+    with metrics.stage('combine') as st:
+        combined_data = combine_weather_files(
+            args.input_dir,
+            start_date=args.start_date,
+            end_date=args.end_date,
+            prefetch_depth=args.prefetch
+        )
+        for pattern in ("*.csv", "*.parquet"):
+            for file in glob.glob(os.path.join(args.input_dir, pattern)):
+                st.add_input_file(file)
+        st.rows_out = None if combined_data is None else len(combined_data)
     
     if combined_data is None:
         return
@@ -145,15 +167,10 @@ def main():
     if output_dir and not os.path.exists(output_dir):
         os.makedirs(output_dir)
     
-    # 파일 확장자에서 출력 형식 결정
-    _, ext = os.path.splitext(args.output_file)
-    ext = ext.lower()
-    
-    # 결합된 데이터 저장
-    if ext == '.parquet':
-        combined_data.to_parquet(args.output_file, index=False)
-    else:  # 기본적으로 CSV
-        combined_data.to_csv(args.output_file, index=False)
+    # 결합된 데이터 저장(파일 확장자에 따라 CSV 또는 Parquet, 공용 dtype 정책 적용)
+    with metrics.stage('write', rows_in=len(combined_data)) as st:
+        write_frame(combined_data, args.output_file)
+        st.add_output_file(args.output_file)
     
     logger.info(f"결합된 날씨 데이터를 {args.output_file}에 저장했습니다")
 
@@ -2,14 +2,25 @@
 # -*- coding: utf-8 -*-
 
 import os
+import sys
 import pandas as pd
 import numpy as np
 import argparse
 import glob
 import logging
+import shutil
+import tempfile
 from datetime import datetime
 import multiprocessing as mp
 from functools import partial
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# 공용 모듈(src/common) 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+from common import metrics
+from common.schema import compact_frame, to_table, cast_table
 
 # 로깅 설정
 logging.basicConfig(
@@ -36,6 +47,16 @@ def setup_arg_parser():
                         help='병렬 처리에 사용할 프로세스 수')
     parser.add_argument('--include-wind', action='store_true',
                         help='출력에 바람 데이터 포함')
+    parser.add_argument('--chunksize', type=int, default=1,
+                        help='병렬 처리 시 작업자에게 한 번에 넘길 파일 수(기본값: 1)')
+    parser.add_argument('--merge-window-days', type=int, default=31,
+                        help='샤드 병합 시 한 번에 읽을 날짜 범위(일, 기본값: 31)')
+    parser.add_argument('--shard-dir', type=str, default=None,
+                        help='파일별 Parquet 샤드를 기록할 디렉토리(기본값: 출력 디렉토리의 임시 디렉토리, '
+                             '지정한 디렉토리는 병합 후 이번 실행이 기록한 샤드 파일만 삭제)')
+    parser.add_argument('--keep-shards', action='store_true',
+                        help='병합 후 샤드를 삭제하지 않음')
+    metrics.add_metrics_arguments(parser)
     
     return parser
 
@@ -197,11 +218,151 @@ def grid_id_to_latlon(grid_id):
     
     return lat, lon
 
+def find_date_column(columns):
+    """열 이름 중 'date'를 포함하는 첫 번째 열(날짜 열)을 반환합니다. 없으면 None."""
+    date_columns = [col for col in columns if 'date' in col.lower()]
+    return date_columns[0] if date_columns else None
+
+def shard_path_for(shard_dir, index, file_path):
+    """파일 순번과 날씨 파일 경로로 샤드 파일 경로를 만듭니다."""
+    return os.path.join(shard_dir, f"{index:05d}_{os.path.splitext(os.path.basename(file_path))[0]}.parquet")
+
+def process_file_to_shard(task, shard_dir, start_date=None, end_date=None, include_wind=False):
+    """
+    날씨 파일 하나를 처리하여 Parquet 샤드로 기록하고 메타데이터만 반환합니다.
+    
+    작업자 프로세스는 데이터프레임을 부모 프로세스로 보내지 않으므로, 결과 크기와 관계없이
+    프로세스 간 통신량은 파일당 작은 딕셔너리 하나입니다.
+    
+    매개변수:
+    -----------
+    task : tuple
+        (파일 순번, 날씨 데이터 파일 경로); 순번은 병합 시 원래 파일 순서를 유지하는 데 사용
+    shard_dir : str
+        샤드를 기록할 디렉토리
+    start_date, end_date, include_wind :
+        process_weather_file에 전달
+        
+    반환:
+    --------
+    dict
+        index, file, shard(기록하지 않았으면 None), rows, date_col, min_date, max_date
+    """
+    index, file_path = task
+    df = process_weather_file(file_path, start_date=start_date, end_date=end_date, include_wind=include_wind)
+    info = {'index': index, 'file': file_path, 'shard': None, 'rows': 0,
+            'date_col': None, 'min_date': None, 'max_date': None}
+    if df is None:
+        return info
+    
+    # (날짜, grid_id) 순으로 정렬하여 기록하면 병합 시 날짜 범위 필터가 row group 단위로 적용됨
+    date_col = find_date_column(df.columns)
+    key_cols = ([date_col] if date_col else []) + ['grid_id']
+    df = df.sort_values(key_cols, kind='stable')
+    
+    shard_path = shard_path_for(shard_dir, index, file_path)
+    df.to_parquet(shard_path, index=False, row_group_size=100_000)
+    
+    info.update(shard=shard_path, rows=len(df), date_col=date_col)
+    if date_col and df[date_col].notna().any():
+        info['min_date'] = df[date_col].min()
+        info['max_date'] = df[date_col].max()
+    return info
+
+def iter_merge_windows(shard_infos, window_days=31):
+    """
+    샤드를 날짜 범위 단위로 읽어 중복을 제거한 데이터프레임을 생성합니다.
+    
+    같은 (날짜, grid_id) 행은 같은 날짜 범위에 속하므로 범위마다 중복을 제거해도 전체 중복 제거와
+    결과가 같고, 메모리에는 한 범위의 행만 유지됩니다. 범위 안에서는 원래 파일 순서로 이어 붙인 뒤
+    첫 번째 행을 남기고 (날짜, grid_id) 순으로 정렬합니다.
+    
+    매개변수:
+    -----------
+    shard_infos : list of dict
+        process_file_to_shard가 반환한 메타데이터
+    window_days : int
+        한 번에 읽을 날짜 범위(일)
+        
+    반환:
+    --------
+    generator of pandas.DataFrame
+    """
+    infos = sorted((info for info in shard_infos if info['shard']), key=lambda info: info['index'])
+    if not infos:
+        return
+    
+    # 파일마다 열 구성/형식이 다를 수 있으므로(정수/실수, 일부 파일에만 있는 열) 모든 샤드의 스키마를 통합
+    shards = [info['shard'] for info in infos]
+    schema = pa.unify_schemas([pq.read_schema(shard) for shard in shards], promote_options='permissive')
+    dataset = ds.dataset(shards, schema=schema, format='parquet')
+    date_col = infos[0]['date_col']
+    key_cols = ([date_col] if date_col else []) + ['grid_id']
+    
+    filters = []
+    dated = [info for info in infos if info['min_date'] is not None]
+    if date_col and dated:
+        lo = min(info['min_date'] for info in dated).normalize()
+        hi = max(info['max_date'] for info in dated)
+        step = pd.Timedelta(days=window_days)
+        while lo <= hi:
+            filters.append((ds.field(date_col) >= pa.scalar(lo, pa.timestamp('ns')))
+                           & (ds.field(date_col) < pa.scalar(lo + step, pa.timestamp('ns'))))
+            lo += step
+        # 날짜가 없는 행은 마지막에 한 번 처리
+        filters.append(ds.field(date_col).is_null())
+    else:
+        filters.append(None)
+    
+    for flt in filters:
+        table = dataset.to_table(filter=flt)
+        if table.num_rows == 0:
+            continue
+        df = table.to_pandas().drop_duplicates()
+        yield df.sort_values(key_cols, kind='stable')
+
+def write_frames(frames, output_file):
+    """
+    데이터프레임들을 파일 확장자에 따라 Parquet 또는 CSV 파일 하나에 순서대로 기록합니다.
+    
+    열 형식은 공용 dtype 정책(common.schema)을 따르며, Parquet은 첫 데이터프레임의 스키마로 고정됩니다.
+    
+    반환:
+    --------
+    int
+        기록한 행 수
+    """
+    _, ext = os.path.splitext(output_file)
+    is_parquet = ext.lower() == '.parquet'
+    tmp_path = f"{output_file}.tmp"
+    writer = None
+    rows = 0
+    try:
+        for i, df in enumerate(frames):
+            if is_parquet:
+                table = to_table(df)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                else:
+                    table = cast_table(table, writer.schema)
+                writer.write_table(table)
+            else:
+                compact_frame(df).to_csv(tmp_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False,
+                                         date_format='%Y-%m-%d')
+            rows += len(df)
+    finally:
+        if writer is not None:
+            writer.close()
+    if os.path.exists(tmp_path):
+        os.replace(tmp_path, output_file)
+    return rows
+
 def main():
     """날씨 데이터를 처리하는 주요 함수."""
     # 명령줄 인수 구문 분석
     parser = setup_arg_parser()
     args = parser.parse_args()
+    metrics.configure_from_args(args)
     
     # 날씨 파일 찾기
     weather_files = find_weather_files(args.input_dir)
@@ -210,70 +371,70 @@ def main():
         logger.error(f"No weather files found in {args.input_dir}")
         return
     
-    # 파일 처리(잠재적으로 병렬)
-    if args.n_processes > 1:
-        logger.info(f"Processing files in parallel with {args.n_processes} processes")
-        pool = mp.Pool(processes=args.n_processes)
-        process_func = partial(
-            process_weather_file,
-            start_date=args.start_date,
-            end_date=args.end_date,
-            include_wind=args.include_wind
-        )
-        results = pool.map(process_func, weather_files)
-        pool.close()
-        pool.join()
-        
-        # None 결과 필터링
-        valid_results = [df for df in results if df is not None]
-        
-        # 결과 결합
-        if valid_results:
-            combined_df = pd.concat(valid_results, ignore_index=True)
-        else:
-            logger.error("No valid results after processing")
-            return
+    # 출력 디렉토리가 없으면 생성
+    output_dir = os.path.dirname(args.output_file)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    
+    # 작업자는 파일별 결과를 샤드 디렉토리에 직접 기록
+    created_shard_dir = not args.shard_dir
+    if args.shard_dir:
+        shard_dir = args.shard_dir
+        os.makedirs(shard_dir, exist_ok=True)
     else:
-        # 순차적으로 처리
-        logger.info("Processing files sequentially")
-        results = []
-        for file in weather_files:
-            result = process_weather_file(
-                file,
+        shard_dir = tempfile.mkdtemp(prefix='.weather_shards_', dir=output_dir or '.')
+    
+    try:
+        # 파일 처리(잠재적으로 병렬)
+        with metrics.stage('process', rows_in=len(weather_files)) as st:
+            for file in weather_files:
+                st.add_input_file(file)
+            tasks = list(enumerate(weather_files))
+            process_func = partial(
+                process_file_to_shard,
+                shard_dir=shard_dir,
                 start_date=args.start_date,
                 end_date=args.end_date,
                 include_wind=args.include_wind
             )
-            if result is not None:
-                results.append(result)
+            if args.n_processes > 1:
+                logger.info(f"Processing files in parallel with {args.n_processes} processes (chunksize={args.chunksize})")
+                # 큰 파일부터 배정하여 크기가 고르지 않아도 모든 작업자가 끝까지 바쁘도록 함
+                tasks.sort(key=lambda task: os.path.getsize(task[1]), reverse=True)
+                with mp.Pool(processes=args.n_processes) as pool:
+                    shard_infos = list(pool.imap_unordered(process_func, tasks, chunksize=args.chunksize))
+            else:
+                # 순차적으로 처리
+                logger.info("Processing files sequentially")
+                shard_infos = [process_func(task) for task in tasks]
+            
+            total_rows = sum(info['rows'] for info in shard_infos)
+            st.rows_out = total_rows
         
-        # 결과 결합
-        if results:
-            combined_df = pd.concat(results, ignore_index=True)
-        else:
+        if not any(info['shard'] for info in shard_infos):
             logger.error("No valid results after processing")
             return
-    
-    # 중복 제거
-    logger.info(f"Combined data has {len(combined_df)} rows")
-    combined_df = combined_df.drop_duplicates()
-    logger.info(f"After removing duplicates: {len(combined_df)} rows")
-    
-    # 출력 디렉토리가 없으면 생성
-    output_dir = os.path.dirname(args.output_file)
-    if output_dir and not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    
-    # 파일 확장자에 따라 결과 저장
-    _, ext = os.path.splitext(args.output_file)
-    ext = ext.lower()
-    
-    if ext == '.parquet':
-        combined_df.to_parquet(args.output_file, index=False)
-    else:  # 기본적으로 CSV로 설정
-        combined_df.to_csv(args.output_file, index=False)
+        logger.info(f"Wrote {sum(1 for info in shard_infos if info['shard'])} shards with {total_rows} rows to {shard_dir}")
+        
+        # 날짜 범위 단위로 샤드를 읽어 중복 제거 후 출력 파일에 이어서 기록
+        with metrics.stage('merge', rows_in=total_rows) as st:
+            rows = write_frames(iter_merge_windows(shard_infos, args.merge_window_days), args.output_file)
+            st.rows_out = rows
+            st.add_output_file(args.output_file)
+        logger.info(f"After removing duplicates: {rows} rows")
+    finally:
+        if args.keep_shards:
+            logger.info(f"Keeping shards in {shard_dir}")
+        elif created_shard_dir:
+            shutil.rmtree(shard_dir, ignore_errors=True)
+        else:
+            # 사용자가 지정한 디렉토리는 남기고 이번 실행이 기록한 샤드 파일만 삭제
+            for index, file_path in enumerate(weather_files):
+                shard_path = shard_path_for(shard_dir, index, file_path)
+                if os.path.exists(shard_path):
+                    os.remove(shard_path)
     
     logger.info(f"Saved processed weather data to {args.output_file}")
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()